@@ -2,24 +2,39 @@ import tkinter as tk
 from tkinter import messagebox
 import requests
 import threading
+import json
 import time
+from collections import deque
+
+REFRESH_MS = 1000  # How often the Tk main loop moves new data into the widgets
+POLL_INTERVAL = 1  # Seconds between /api/traffic polls
+MAX_VIEW_LINES = 1000  # Oldest lines are dropped from the log view beyond this
+HIGH_TRAFFIC_FILE = "high_traffic_logs.log"  # Entries received while the flood alert is raised
 
 
 class IDSApp:
-    def __init__(self, root, server_url):
+    def __init__(self, root, server_url, use_stream=False):
         self.root = root
         self.server_url = server_url
         self.root.title("Interactive IDS/IPS Logs")
         self.running = True
-        self.high_traffic_logs = []  # Store high traffic logs for file generation
+        self.use_stream = use_stream  # Subscribe to /api/stream instead of polling /api/traffic
+        self.high_traffic_file = None  # Opened on the first capture; entries are appended as they arrive
+        self.session = requests.Session()  # Reuse one connection for polling
+        self.data_lock = threading.Lock()  # Guards traffic_data between the stream and UI threads
+        self.stream_thread = None  # Live-stream subscriber thread
+        self.poll_thread = None  # Polling thread when not streaming
+        self.refresh_job = None  # Pending root.after() call of update_logs
+        self.generation = 0  # Bumped by reset_cursors(); data fetched under an older generation is dropped
+        self.stream_response = None  # Open /api/stream response, closed when the server URL changes
+        self.reset_cursors()
 
         # Create widgets for the UI
         self.create_widgets()
 
-        # Start a background thread for real-time updates
-        self.update_thread = threading.Thread(target=self.update_logs)
-        self.update_thread.daemon = True
-        self.update_thread.start()
+        # Network I/O runs on a background thread; widgets are only touched from the Tk main loop
+        self.start_fetching()
+        self.refresh_job = self.root.after(REFRESH_MS, self.update_logs)
 
     def create_widgets(self):
         # Input for server IP address
@@ -71,72 +86,194 @@ class IDSApp:
         new_ip = self.ip_entry.get().strip()
         if new_ip.startswith("http://") or new_ip.startswith("https://"):
             self.server_url = new_ip
+            self.reset_cursors()
+            response = self.stream_response
+            if response is not None:  # Drop the old server's stream; the loop reconnects to the new URL
+                response.close()
             self.log_display.insert(tk.END, f"\nServer URL updated to: {self.server_url}\n")
         else:
             messagebox.showerror("Invalid IP", "Please enter a valid server IP starting with 'http://' or 'https://'.")
 
+    def reset_cursors(self):
+        """Forget the polling cursors and the locally merged traffic data."""
+        with self.data_lock:
+            self.generation += 1  # Anything still in flight belongs to the previous view
+            self.log_cursor = None  # Last request sequence received from the server
+            self.sample_cursor = None  # Last metric sample sequence received from the server
+            self.etag = None  # ETag of the last full response
+            self.flood_detected = False  # Server's heavy-hitter detector flags a source IP
+            self.top_offenders = []  # Heaviest source IPs reported by the server
+            self.new_logs = deque(maxlen=MAX_VIEW_LINES)  # Entries received but not yet shown
+            self.traffic_data = {
+                "traffic_logs": deque(maxlen=100),
+                "throughput": deque(maxlen=60),
+                "latency": deque(maxlen=60),
+                "cpu_usage": deque(maxlen=60),
+                "memory_usage": deque(maxlen=60),
+            }
+
     def fetch_traffic_data(self):
-        """Fetch the traffic data from the Flask server."""
+        """Fetch only new traffic data from the Flask server and merge it into the local view."""
+        params = {}
+        with self.data_lock:
+            generation = self.generation
+            if self.log_cursor is not None:
+                params["since"] = self.log_cursor
+            if self.sample_cursor is not None:
+                params["since_sample"] = self.sample_cursor
+            headers = {"If-None-Match": self.etag} if self.etag else {}
         try:
-            response = requests.get(f"{self.server_url}/api/traffic")
-            if response.status_code == 200:
-                return response.json()
+            response = self.session.get(f"{self.server_url}/api/traffic", params=params, headers=headers)
+            if response.status_code == 304:  # Nothing new since the last poll
+                return self.current_traffic_data()
+            if response.status_code == 200 and self.merge_traffic_data(response.json(), generation):
+                self.etag = response.headers.get("ETag")
+                return self.current_traffic_data()
         except Exception as e:
             return None
 
-    def update_logs(self):
-        """Continuously update logs and metrics."""
+    def merge_traffic_data(self, data, generation):
+        """Merge a polled or pushed delta, skipping entries that were already received.
+
+        Returns False (merging nothing) when the data was fetched before the last cursor reset.
+        """
+        with self.data_lock:
+            if generation != self.generation:  # Fetched from the previous server URL
+                return False
+            if ((self.log_cursor is not None and data["seq"] < self.log_cursor)
+                    or (self.sample_cursor is not None and data["sample_seq"] < self.sample_cursor)):
+                self.log_cursor = self.sample_cursor = None  # The server restarted; this is a fresh snapshot
+            first_sample = data["sample_seq"] - len(data["latency"]) + 1
+            skip = 0 if self.sample_cursor is None else max(0, self.sample_cursor - first_sample + 1)
+            for name in ("throughput", "latency", "cpu_usage", "memory_usage"):
+                self.traffic_data[name].extend(data[name][skip:])
+            new_logs = [log for log in data["traffic_logs"] if self.log_cursor is None or log["seq"] > self.log_cursor]
+            self.traffic_data["traffic_logs"].extend(new_logs)
+            self.new_logs.extend(new_logs)
+            self.flood_detected = data.get("flood_detected", False)
+            if self.flood_detected:
+                self.capture_high_traffic(new_logs)
+            self.top_offenders = data.get("top_offenders", [])
+            self.log_cursor = max(self.log_cursor or 0, data["seq"])
+            self.sample_cursor = max(self.sample_cursor or 0, data["sample_seq"])
+            return True
+
+    def current_traffic_data(self):
+        """Return a copy of the merged traffic data that is safe to iterate, and take the entries not yet shown."""
+        with self.data_lock:
+            data = {name: list(merged) for name, merged in self.traffic_data.items()}
+            data["flood_detected"] = self.flood_detected
+            data["top_offenders"] = list(self.top_offenders)
+            data["new_logs"] = list(self.new_logs)
+            self.new_logs.clear()
+            return data
+
+    def capture_high_traffic(self, logs):
+        """Append entries received during a flood alert to the high traffic log (each sequence is new, so written once)."""
+        if not logs:
+            return
+        if self.high_traffic_file is None:
+            self.high_traffic_file = open(HIGH_TRAFFIC_FILE, "w")
+        self.high_traffic_file.writelines(self.format_log(log) for log in logs)
+        self.high_traffic_file.flush()  # Keep the file current on long runs
+
+    def format_log(self, log):
+        return f"{log['timestamp']} - {log['method']} {log['path']} (IP: {log['ip']}) - {log['response_status']}\n"
+
+    def start_fetching(self):
+        """Start the live-stream subscriber thread, or the polling thread when stream mode is disabled."""
+        if self.use_stream:
+            if self.stream_thread is None or not self.stream_thread.is_alive():
+                self.stream_thread = threading.Thread(target=self.stream_traffic_data)
+                self.stream_thread.daemon = True
+                self.stream_thread.start()
+        elif self.poll_thread is None or not self.poll_thread.is_alive():
+            self.poll_thread = threading.Thread(target=self.poll_traffic_data)
+            self.poll_thread.daemon = True
+            self.poll_thread.start()
+
+    def poll_traffic_data(self):
+        """Poll /api/traffic every POLL_INTERVAL seconds while monitoring."""
+        while self.running:
+            self.fetch_traffic_data()
+            time.sleep(POLL_INTERVAL)
+
+    def stream_traffic_data(self):
+        """Receive pushed updates from /api/stream, resuming from the last event after a reconnect.
+
+        Each connection belongs to one cursor generation; changing the server URL bumps the
+        generation and closes the response, so the loop reconnects to the new URL at once.
+        """
         while self.running:
-            data = self.fetch_traffic_data()
-
-            if data:
-                traffic_logs = data["traffic_logs"]
-                throughput = data["throughput"]
-                latency = data["latency"]
-                cpu_usage = data["cpu_usage"]
-                memory_usage = data["memory_usage"]
-                high_traffic_alert = False
-
-                # Check for high traffic (>= 100 requests per second)
-                request_count = len(traffic_logs)
-                if request_count >= 100:
-                    high_traffic_alert = True
-
-                # Update logs
-                self.log_display.delete(1.0, tk.END)
-                for log in traffic_logs:
-                    log_entry = f"{log['timestamp']} - {log['method']} {log['path']} (IP: {log['ip']}) - {log['response_status']}\n"
-                    self.log_display.insert(tk.END, log_entry)
-
-                    # Save high traffic logs
-                    if high_traffic_alert:
-                        self.high_traffic_logs.append(log_entry)
-
-                # Update metrics
-                if throughput:
-                    self.throughput_label.config(text=f"Throughput (Bytes Sent/Received): Sent: {throughput[-1]['bytes_sent']} / Received: {throughput[-1]['bytes_recv']}")
-                if latency:
-                    self.latency_label.config(text=f"Latency (ms): {latency[-1]:.2f}")
-                if cpu_usage:
-                    self.cpu_usage_label.config(text=f"CPU Usage (%): {cpu_usage[-1]:.2f}")
-                if memory_usage:
-                    self.memory_usage_label.config(text=f"Memory Usage (%): {memory_usage[-1]:.2f}")
-
-                # Update high traffic alert status
-                if high_traffic_alert:
-                    self.high_traffic_alert_label.config(text="High Traffic Alert: YES", fg="red")
-                else:
-                    self.high_traffic_alert_label.config(text="High Traffic Alert: NO", fg="black")
-
-            time.sleep(1)  # Update every second
+            headers = {}
+            with self.data_lock:
+                generation = self.generation
+                server_url = self.server_url
+                if self.log_cursor is not None:
+                    headers["Last-Event-ID"] = f"{self.log_cursor}-{self.sample_cursor}"
+            try:
+                with requests.get(f"{server_url}/api/stream", headers=headers, stream=True,
+                                  timeout=(5, 30)) as response:
+                    self.stream_response = response
+                    if generation != self.generation:  # URL changed while connecting
+                        continue
+                    for line in response.iter_lines(chunk_size=None, decode_unicode=True):  # Lines as they arrive
+                        if not self.running or generation != self.generation:
+                            break
+                        if line.startswith("data: "):
+                            self.merge_traffic_data(json.loads(line[len("data: "):]), generation)
+            except Exception as e:
+                if generation == self.generation:  # A URL change reconnects immediately
+                    time.sleep(1)  # Back off before reconnecting
+            finally:
+                self.stream_response = None
+
+    def update_logs(self):
+        """Move new entries and the latest metrics into the widgets (Tk main loop only)."""
+        data = self.current_traffic_data()
+        throughput = data["throughput"]
+        latency = data["latency"]
+        cpu_usage = data["cpu_usage"]
+        memory_usage = data["memory_usage"]
+        # High traffic is flagged by the server's sliding-window heavy-hitter detector
+        high_traffic_alert = data["flood_detected"]
+
+        # Append only the entries not shown yet, keeping the view to the newest MAX_VIEW_LINES lines
+        if data["new_logs"]:
+            follow = self.log_display.yview()[1] >= 1.0  # Keep scrolling only if the view is at the bottom
+            self.log_display.insert(tk.END, "".join(self.format_log(log) for log in data["new_logs"]))
+            excess = int(self.log_display.index("end-1c").split(".")[0]) - MAX_VIEW_LINES
+            if excess > 0:
+                self.log_display.delete("1.0", f"{excess + 1}.0")
+            if follow:
+                self.log_display.see(tk.END)
+
+        # Update metrics
+        if throughput:
+            self.throughput_label.config(text=f"Throughput (Bytes/s): Sent: {throughput[-1]['bytes_sent']:.0f} / Received: {throughput[-1]['bytes_recv']:.0f}")
+        if latency:
+            self.latency_label.config(text=f"Latency (ms): {latency[-1]:.2f}")
+        if cpu_usage:
+            self.cpu_usage_label.config(text=f"CPU Usage (%): {cpu_usage[-1]:.2f}")
+        if memory_usage:
+            self.memory_usage_label.config(text=f"Memory Usage (%): {memory_usage[-1]:.2f}")
+
+        # Update high traffic alert status
+        if high_traffic_alert:
+            top = data["top_offenders"][0] if data["top_offenders"] else None
+            detail = f" (top source: {top['key']} at {top['rate']} req/s)" if top else ""
+            self.high_traffic_alert_label.config(text=f"High Traffic Alert: YES{detail}", fg="red")
+        elif throughput or latency:
+            self.high_traffic_alert_label.config(text="High Traffic Alert: NO", fg="black")
+
+        self.refresh_job = self.root.after(REFRESH_MS, self.update_logs) if self.running else None
 
     def start_monitoring(self):
         """Start monitoring traffic."""
         self.running = True
-        if not self.update_thread.is_alive():
-            self.update_thread = threading.Thread(target=self.update_logs)
-            self.update_thread.daemon = True
-            self.update_thread.start()
+        self.start_fetching()
+        if self.refresh_job is None:
+            self.refresh_job = self.root.after(REFRESH_MS, self.update_logs)
 
     def stop_monitoring(self):
         """Stop monitoring traffic."""
@@ -151,28 +288,34 @@ class IDSApp:
         self.cpu_usage_label.config(text="CPU Usage (%): N/A")
         self.memory_usage_label.config(text="Memory Usage (%): N/A")
         self.high_traffic_alert_label.config(text="High Traffic Alert: N/A", fg="black")
-        self.high_traffic_logs = []
+        with self.data_lock:
+            self.new_logs.clear()
+            self.close_high_traffic_logs()  # The next capture starts a new file
         self.log_display.insert(tk.END, "All settings reset to normal.\n")
 
-    def save_high_traffic_logs(self):
-        """Save high traffic logs to a .log file."""
-        if self.high_traffic_logs:
-            with open("high_traffic_logs.log", "w") as file:
-                file.writelines(self.high_traffic_logs)
+    def close_high_traffic_logs(self):
+        """Close the high traffic log; its entries were already written as they arrived."""
+        if self.high_traffic_file is not None:
+            self.high_traffic_file.close()
+            self.high_traffic_file = None
 
     def on_close(self):
         """Handle the close event."""
         self.stop_monitoring()
-        self.save_high_traffic_logs()
+        if self.refresh_job is not None:
+            self.root.after_cancel(self.refresh_job)
+        with self.data_lock:
+            self.close_high_traffic_logs()
         self.root.destroy()
 
 
 def main():
     # Define the Flask server URL
     server_url = "http://192.168.223.33:5000/"  # Change this to your Flask server's URL
+    use_stream = True  # Receive pushed updates from /api/stream; set to False to poll /api/traffic
 
     root = tk.Tk()
-    app = IDSApp(root, server_url)
+    app = IDSApp(root, server_url, use_stream=use_stream)
 
     # Close the Tkinter window safely
     root.protocol("WM_DELETE_WINDOW", app.on_close)
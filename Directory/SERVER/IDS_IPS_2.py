@@ -1,10 +1,18 @@
+import os
 import tkinter as tk
 from tkinter import messagebox
 import requests
 import threading
 import time
+from collections import deque
 import random
 
+REFRESH_MS = 1000  # How often the Tk main loop moves new data into the widgets
+POLL_INTERVAL = 1  # Seconds between /api/traffic polls
+MAX_VIEW_LINES = 1000  # Oldest lines are dropped from the log view beyond this
+HIGH_TRAFFIC_FILE = "high_traffic_logs.log"  # Entries received while the flood alert is raised
+BLOCK_API_TOKEN = os.environ.get("BLOCK_API_TOKEN", "")  # Operator token the server requires for /api/block changes
+
 
 class IDSApp:
     def __init__(self, root, server_url):
@@ -13,15 +21,20 @@ class IDSApp:
         self.root.title("Interactive IDS/IPS Logs")
         self.running = True
         self.vulnerable_mode = False  # Toggle for vulnerability mode
-        self.high_traffic_logs = []  # Store high traffic logs for file generation
+        self.high_traffic_file = None  # Opened on the first capture; entries are appended as they arrive
+        self.session = requests.Session()  # Reuse one connection for polling
+        self.data_lock = threading.Lock()  # Guards traffic_data between the polling and UI threads
+        self.refresh_job = None  # Pending root.after() call of update_logs
+        self.reset_cursors()
 
         # Create widgets for the UI
         self.create_widgets()
 
-        # Start a background thread for real-time updates
-        self.update_thread = threading.Thread(target=self.update_logs)
-        self.update_thread.daemon = True
-        self.update_thread.start()
+        # Poll on a background thread; widgets are only touched from the Tk main loop
+        self.poll_thread = threading.Thread(target=self.poll_traffic_data)
+        self.poll_thread.daemon = True
+        self.poll_thread.start()
+        self.refresh_job = self.root.after(REFRESH_MS, self.update_logs)
 
     def create_widgets(self):
         # Input for server IP address
@@ -79,71 +92,134 @@ class IDSApp:
         new_ip = self.ip_entry.get().strip()
         if new_ip.startswith("http://") or new_ip.startswith("https://"):
             self.server_url = new_ip
+            self.reset_cursors()
             self.log_display.insert(tk.END, f"\nServer URL updated to: {self.server_url}\n")
         else:
             messagebox.showerror("Invalid IP", "Please enter a valid server IP starting with 'http://' or 'https://'.")
 
+    def reset_cursors(self):
+        """Forget the polling cursors and the locally merged traffic data."""
+        with self.data_lock:
+            self.log_cursor = None  # Last request sequence received from the server
+            self.sample_cursor = None  # Last metric sample sequence received from the server
+            self.etag = None  # ETag of the last full response
+            self.flood_detected = False  # Server's heavy-hitter detector flags a source IP
+            self.top_offenders = []  # Heaviest source IPs reported by the server
+            self.new_logs = deque(maxlen=MAX_VIEW_LINES)  # Entries received but not yet shown
+            self.traffic_data = {
+                "traffic_logs": deque(maxlen=100),
+                "throughput": deque(maxlen=60),
+                "latency": deque(maxlen=60),
+                "cpu_usage": deque(maxlen=60),
+                "memory_usage": deque(maxlen=60),
+            }
+
     def fetch_traffic_data(self):
-        """Fetch the traffic data from the Flask server."""
+        """Fetch only new traffic data from the Flask server and merge it into the local view."""
+        params = {}
+        if self.log_cursor is not None:
+            params["since"] = self.log_cursor
+        if self.sample_cursor is not None:
+            params["since_sample"] = self.sample_cursor
+        headers = {"If-None-Match": self.etag} if self.etag else {}
         try:
-            response = requests.get(f"{self.server_url}/api/traffic")
+            response = self.session.get(f"{self.server_url}/api/traffic", params=params, headers=headers)
             if response.status_code == 200:
-                return response.json()
+                data = response.json()
+                with self.data_lock:
+                    for name, merged in self.traffic_data.items():
+                        merged.extend(data[name])
+                    self.new_logs.extend(data["traffic_logs"])  # The server only sends entries after the cursor
+                    self.flood_detected = data.get("flood_detected", False)
+                    self.top_offenders = data.get("top_offenders", [])
+                    self.log_cursor = data["seq"]
+                    self.sample_cursor = data["sample_seq"]
+                    self.etag = response.headers.get("ETag")
+                    if self.flood_detected and not self.vulnerable_mode:
+                        self.capture_high_traffic(data["traffic_logs"])
         except Exception as e:
-            return None
+            pass
 
-    def update_logs(self):
-        """Continuously update logs and metrics."""
+    def poll_traffic_data(self):
+        """Poll /api/traffic every POLL_INTERVAL seconds while monitoring."""
         while self.running:
-            data = self.fetch_traffic_data()
-
-            if data:
-                traffic_logs = data["traffic_logs"]
-                throughput = data["throughput"]
-                latency = data["latency"]
-                cpu_usage = data["cpu_usage"]
-                memory_usage = data["memory_usage"]
-                high_traffic_alert = False
-
-                # Check for high traffic (>= 100 requests per second)
-                request_count = len(traffic_logs)
-                if request_count >= 100 and not self.vulnerable_mode:
-                    high_traffic_alert = True
-
-                # Update logs
-                self.log_display.delete(1.0, tk.END)
-                for log in traffic_logs:
-                    log_entry = f"{log['timestamp']} - {log['method']} {log['path']} (IP: {log['ip']}) - {log['response_status']}\n"
-                    self.log_display.insert(tk.END, log_entry)
-
-                    # Save high traffic logs
-                    if high_traffic_alert:
-                        self.high_traffic_logs.append(log_entry)
-
-                # Update metrics
-                if throughput:
-                    self.throughput_label.config(text=f"Throughput (Bytes Sent/Received): Sent: {throughput[-1]['bytes_sent']} / Received: {throughput[-1]['bytes_recv']}")
-                if latency:
-                    self.latency_label.config(text=f"Latency (ms): {latency[-1]:.2f}")
-                if cpu_usage:
-                    self.cpu_usage_label.config(text=f"CPU Usage (%): {cpu_usage[-1]:.2f}")
-                if memory_usage:
-                    self.memory_usage_label.config(text=f"Memory Usage (%): {memory_usage[-1]:.2f}")
-
-                # Update high traffic alert status
-                if high_traffic_alert:
-                    self.high_traffic_alert_label.config(text="High Traffic Alert: YES", fg="red")
-                else:
-                    self.high_traffic_alert_label.config(text="High Traffic Alert: NO", fg="black")
-
-            time.sleep(1)  # Update every second
+            self.fetch_traffic_data()
+            time.sleep(POLL_INTERVAL)
+
+    def current_traffic_data(self):
+        """Return a copy of the merged traffic data and the server's flood verdict, and take the entries not yet shown."""
+        with self.data_lock:
+            data = {name: list(merged) for name, merged in self.traffic_data.items()}
+            data["flood_detected"] = self.flood_detected
+            data["top_offenders"] = list(self.top_offenders)
+            data["new_logs"] = list(self.new_logs)
+            self.new_logs.clear()
+            return data
+
+    def capture_high_traffic(self, logs):
+        """Append entries received during a flood alert to the high traffic log (each sequence is new, so written once)."""
+        if not logs:
+            return
+        if self.high_traffic_file is None:
+            self.high_traffic_file = open(HIGH_TRAFFIC_FILE, "w")
+        self.high_traffic_file.writelines(self.format_log(log) for log in logs)
+        self.high_traffic_file.flush()
+
+    def format_log(self, log):
+        return f"{log['timestamp']} - {log['method']} {log['path']} (IP: {log['ip']}) - {log['response_status']}\n"
+
+    def update_logs(self):
+        """Move new entries and the latest metrics into the widgets (Tk main loop only)."""
+        data = self.current_traffic_data()
+        throughput = data["throughput"]
+        latency = data["latency"]
+        cpu_usage = data["cpu_usage"]
+        memory_usage = data["memory_usage"]
+        high_traffic_alert = False
+
+        # High traffic is flagged by the server's sliding-window heavy-hitter detector
+        if data["flood_detected"] and not self.vulnerable_mode:
+            high_traffic_alert = True
+
+        # Append only the entries not shown yet, keeping the view to the newest MAX_VIEW_LINES lines
+        if data["new_logs"]:
+            follow = self.log_display.yview()[1] >= 1.0
+            self.log_display.insert(tk.END, "".join(self.format_log(log) for log in data["new_logs"]))
+            excess = int(self.log_display.index("end-1c").split(".")[0]) - MAX_VIEW_LINES
+            if excess > 0:
+                self.log_display.delete("1.0", f"{excess + 1}.0")
+            if follow:
+                self.log_display.see(tk.END)
+
+        # Update metrics
+        if throughput:
+            self.throughput_label.config(text=f"Throughput (Bytes/s): Sent: {throughput[-1]['bytes_sent']:.0f} / Received: {throughput[-1]['bytes_recv']:.0f}")
+        if latency:
+            self.latency_label.config(text=f"Latency (ms): {latency[-1]:.2f}")
+        if cpu_usage:
+            self.cpu_usage_label.config(text=f"CPU Usage (%): {cpu_usage[-1]:.2f}")
+        if memory_usage:
+            self.memory_usage_label.config(text=f"Memory Usage (%): {memory_usage[-1]:.2f}")
+
+        # Update high traffic alert status
+        if high_traffic_alert:
+            top = data["top_offenders"][0] if data["top_offenders"] else None
+            detail = f" (top source: {top['key']} at {top['rate']} req/s)" if top else ""
+            self.high_traffic_alert_label.config(text=f"High Traffic Alert: YES{detail}", fg="red")
+        elif throughput or latency:
+            self.high_traffic_alert_label.config(text="High Traffic Alert: NO", fg="black")
+
+        self.refresh_job = self.root.after(REFRESH_MS, self.update_logs) if self.running else None
 
     def block_flood_traffic(self):
         """Simulate blocking of high traffic sources."""
         try:
-            response = requests.post(f"{self.server_url}/api/block")
+            headers = {"Authorization": f"Bearer {BLOCK_API_TOKEN}"} if BLOCK_API_TOKEN else {}
+            response = requests.post(f"{self.server_url}/api/block", headers=headers)
             if response.status_code == 200:
                 self.log_display.insert(tk.END, "\nFlood traffic successfully blocked!\n")
+            elif response.status_code == 403:
+                self.log_display.insert(tk.END, "\nFailed to block traffic: set BLOCK_API_TOKEN to the server's token.\n")
             else:
                 self.log_display.insert(tk.END, "\nFailed to block traffic.\n")
         except Exception as e:
@@ -158,10 +234,12 @@ class IDSApp:
     def start_monitoring(self):
         """Start monitoring traffic."""
         self.running = True
-        if not self.update_thread.is_alive():
-            self.update_thread = threading.Thread(target=self.update_logs)
-            self.update_thread.daemon = True
-            self.update_thread.start()
+        if not self.poll_thread.is_alive():
+            self.poll_thread = threading.Thread(target=self.poll_traffic_data)
+            self.poll_thread.daemon = True
+            self.poll_thread.start()
+        if self.refresh_job is None:
+            self.refresh_job = self.root.after(REFRESH_MS, self.update_logs)
 
     def stop_monitoring(self):
         """Stop monitoring traffic."""
@@ -176,19 +254,24 @@ class IDSApp:
         self.cpu_usage_label.config(text="CPU Usage (%): N/A")
         self.memory_usage_label.config(text="Memory Usage (%): N/A")
         self.high_traffic_alert_label.config(text="High Traffic Alert: N/A", fg="black")
-        self.high_traffic_logs = []
+        with self.data_lock:
+            self.new_logs.clear()
+            self.close_high_traffic_logs()  # The next capture starts a new file
         self.log_display.insert(tk.END, "All settings reset to normal.\n")
 
-    def save_high_traffic_logs(self):
-        """Save high traffic logs to a .log file."""
-        if self.high_traffic_logs:
-            with open("high_traffic_logs.log", "w") as file:
-                file.writelines(self.high_traffic_logs)
+    def close_high_traffic_logs(self):
+        """Close the high traffic log; its entries were already written as they arrived."""
+        if self.high_traffic_file is not None:
+            self.high_traffic_file.close()
+            self.high_traffic_file = None
 
     def on_close(self):
         """Handle the close event."""
         self.stop_monitoring()
-        self.save_high_traffic_logs()
+        if self.refresh_job is not None:
+            self.root.after_cancel(self.refresh_job)
+        with self.data_lock:
+            self.close_high_traffic_logs()
         self.root.destroy()
 
 
@@ -0,0 +1,182 @@
+import tkinter as tk
+from tkinter import messagebox
+from tkinter import ttk
+import sys
+
+from fleet import FleetMonitor, Sensor, SENSORS_FILE, DOWN, aggregate, check_names, load_sensors
+
+REFRESH_MS = 1000  # How often the Tk main loop moves the latest fleet state into the widgets
+DETAIL_LOGS = 100  # Requests shown in a sensor's drill-down window
+COLUMNS = (("status", "Status", 70), ("rps", "Req/s", 80), ("mbps", "MB/s", 80), ("p99", "p99 (ms)", 80),
+           ("cpu", "CPU %", 60), ("memory", "Mem %", 60), ("alert", "Alert", 60), ("error", "Last error", 260))
+
+
+class FleetApp:
+    """One console for many sensors: fleet totals, one row per sensor, double-click to drill down."""
+
+    def __init__(self, root, sensors):
+        self.root = root
+        self.root.title("IDS/IPS Fleet")
+        self.fleet = FleetMonitor(sensors)  # Polls on background threads; widgets are only touched here
+        self.rows = {}  # Sensor name -> values last shown in its row
+        self.details = {}  # Sensor name -> (window, text widget, labels) of open drill-downs
+        self.refresh_job = None  # Pending root.after() call of update_view
+
+        self.create_widgets()
+        self.fleet.start()
+        self.refresh_job = self.root.after(REFRESH_MS, self.update_view)
+
+    def create_widgets(self):
+        # Fleet totals
+        self.summary_label = tk.Label(self.root, text="Sensors: N/A", font=("TkDefaultFont", 11, "bold"))
+        self.summary_label.pack(pady=5)
+
+        self.alert_label = tk.Label(self.root, text="High Traffic Alerts: N/A", fg="black")
+        self.alert_label.pack(pady=5)
+
+        # One row per sensor
+        table_frame = tk.Frame(self.root)
+        table_frame.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+        self.table = ttk.Treeview(table_frame, columns=[name for name, _, _ in COLUMNS], height=20)
+        self.table.heading("#0", text="Sensor")
+        self.table.column("#0", width=200)
+        for name, heading, width in COLUMNS:
+            self.table.heading(name, text=heading)
+            self.table.column(name, width=width, anchor=tk.W if name == "error" else tk.E)
+        self.table.tag_configure("down", foreground="grey")
+        self.table.tag_configure("alert", foreground="red")
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.table.yview)
+        self.table.configure(yscrollcommand=scrollbar.set)
+        self.table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.table.bind("<Double-1>", self.open_selected)
+
+        for sensor in self.fleet.sensors:
+            self.table.insert("", tk.END, iid=sensor.name, text=sensor.name)
+
+        # Buttons
+        button_frame = tk.Frame(self.root)
+        button_frame.pack(pady=10)
+
+        self.start_button = tk.Button(button_frame, text="Start Monitoring", command=self.start_monitoring)
+        self.start_button.pack(side=tk.LEFT, padx=5)
+
+        self.stop_button = tk.Button(button_frame, text="Stop Monitoring", command=self.stop_monitoring)
+        self.stop_button.pack(side=tk.LEFT, padx=5)
+
+        self.detail_button = tk.Button(button_frame, text="Sensor Details", command=self.open_selected)
+        self.detail_button.pack(side=tk.LEFT, padx=5)
+
+    def update_view(self):
+        """Show the latest fleet totals and update only the rows that changed (Tk main loop only)."""
+        snapshots = self.fleet.snapshots()
+        summary = aggregate(snapshots)
+        worst = (f"{summary['worst_p99']:.2f} ms ({summary['worst_p99_sensor']})"
+                 if summary["worst_p99"] is not None else "N/A")
+        self.summary_label.config(
+            text=f"Sensors: {summary['up']}/{summary['sensors']} up | Throughput: {summary['requests_per_sec']} req/s, "
+                 f"{summary['bytes_per_sec'] / 1e6:.2f} MB/s | Worst p99: {worst}")
+        if summary["alerts"]:
+            self.alert_label.config(text=f"High Traffic Alerts: {summary['alerts']} sensor(s)", fg="red")
+        else:
+            self.alert_label.config(text="High Traffic Alerts: NONE", fg="black")
+
+        for snapshot in snapshots:
+            values = (
+                snapshot["status"],
+                f"{snapshot['requests_per_sec']:.1f}",
+                f"{snapshot['bytes_per_sec'] / 1e6:.2f}",
+                f"{snapshot['p99']:.2f}" if snapshot["p99"] is not None else "-",
+                f"{snapshot['cpu_usage']:.0f}" if snapshot["cpu_usage"] is not None else "-",
+                f"{snapshot['memory_usage']:.0f}" if snapshot["memory_usage"] is not None else "-",
+                "YES" if snapshot["alert"] else "",
+                snapshot["error"],
+            )
+            if self.rows.get(snapshot["name"]) != values:  # Unchanged rows cost nothing
+                self.rows[snapshot["name"]] = values
+                tags = ("alert",) if snapshot["alert"] else ("down",) if snapshot["status"] == DOWN else ()
+                self.table.item(snapshot["name"], values=values, tags=tags)
+
+        for name in list(self.details):
+            self.update_detail(name)
+
+        self.refresh_job = self.root.after(REFRESH_MS, self.update_view)
+
+    def open_selected(self, event=None):
+        """Open the drill-down window of the selected sensor."""
+        selection = self.table.selection()
+        if not selection:
+            messagebox.showinfo("Sensor Details", "Select a sensor first.")
+            return
+        name = selection[0]
+        if name in self.details:
+            self.details[name][0].lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title(f"Sensor {name}")
+        labels = tk.Label(window, justify=tk.LEFT, anchor=tk.W)
+        labels.pack(padx=10, pady=5, fill=tk.X)
+        text_widget = tk.Text(window, height=20, width=100)
+        text_widget.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        self.details[name] = (window, text_widget, labels)
+        window.protocol("WM_DELETE_WINDOW", lambda: self.close_detail(name))
+        self.update_detail(name)
+
+    def update_detail(self, name):
+        """Refresh one drill-down window with the sensor's metrics, offenders and recent requests."""
+        window, text_widget, labels = self.details[name]
+        sensor = next(sensor for sensor in self.fleet.sensors if sensor.name == name)
+        snapshot = sensor.snapshot(logs=True)
+        offenders = ", ".join(f"{top['key']} ({top['rate']} req/s)" for top in snapshot["top_offenders"]) or "none"
+        poll = f"{snapshot['poll_ms']:.0f} ms" if snapshot["poll_ms"] is not None else "N/A"
+        labels.config(text=f"URL: {snapshot['url']}\nStatus: {snapshot['status']} (poll {poll}, "
+                           f"{snapshot['failures']} consecutive failures) {snapshot['error']}\n"
+                           f"High Traffic Alert: {'YES' if snapshot['alert'] else 'NO'} | Top sources: {offenders}\n"
+                           f"Signature matches: {snapshot['signature_matches']}")
+        text_widget.delete(1.0, tk.END)
+        text_widget.insert(tk.END, "".join(
+            f"{log['timestamp']} - {log['method']} {log['path']} (IP: {log['ip']}) - {log['response_status']}\n"
+            for log in snapshot["logs"][-DETAIL_LOGS:]))
+        text_widget.see(tk.END)
+
+    def close_detail(self, name):
+        window = self.details.pop(name)[0]
+        window.destroy()
+
+    def start_monitoring(self):
+        """Start monitoring the fleet."""
+        self.fleet.start()
+
+    def stop_monitoring(self):
+        """Stop monitoring the fleet."""
+        self.fleet.stop()
+
+    def on_close(self):
+        """Handle the close event."""
+        if self.refresh_job is not None:
+            self.root.after_cancel(self.refresh_job)
+        self.fleet.close()
+        self.root.destroy()
+
+
+def main():
+    # Sensor URLs from the command line, else one per line in sensors.txt (URL [name] [timeout])
+    try:
+        sensors = check_names(Sensor(url) for url in sys.argv[1:]) or load_sensors(SENSORS_FILE)
+    except FileNotFoundError:
+        sys.exit(f"Pass sensor URLs or list them in {SENSORS_FILE}")
+    except ValueError as e:  # Repeated sensor name or non-numeric timeout
+        sys.exit(f"Invalid sensors: {e}")
+    if not sensors:  # File exists but every line is blank or a comment
+        sys.exit(f"No sensors configured: pass sensor URLs or list them in {SENSORS_FILE}")
+
+    root = tk.Tk()
+    app = FleetApp(root, sensors)
+
+    # Close the Tkinter window safely
+    root.protocol("WM_DELETE_WINDOW", app.on_close)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
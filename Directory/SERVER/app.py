@@ -1,58 +1,180 @@
+import os  # Import os for environment-based configuration
+import gzip  # Import gzip for compressing API responses
+import json  # Import json for serializing API responses
+import atexit  # Import atexit to flush queued log records on shutdown
+import hmac  # Import hmac for constant-time operator token checks
 import psutil  # Import system and process utilities
 import time  # Import time module for time-related functions
 import threading  # Import threading for concurrent execution
-from flask import Flask, request, jsonify, render_template, send_file  # Import Flask components
-from collections import deque  # Import deque for efficient queue operations
-import random  # Import random for generating random numbers
+from flask import Flask, request, render_template, Response, g  # Import Flask components
+from histogram import LatencyRecorder  # Import rolling log-linear latency histograms
+from ring_buffer import RequestRing  # Import lock-free request history ring buffer
+from log_writer import LogWriter, rotated_segments, stream_segments  # Import batched background log writer
+from broadcaster import Broadcaster, encode_event, parse_event_id  # Import live update fan-out
+from net_metrics import NetworkMetrics, TIERS  # Import per-NIC rate and rollup engine
+from enforcement import Enforcer, FORBIDDEN  # Import IPS rate limiting, blocklist and bans
+from heavy_hitters import FloodDetector, DIMENSIONS  # Import streaming heavy-hitter detection
+from signatures import SignatureEngine  # Import multi-pattern signature matching
+from metric_samples import SampleHistory  # Import once-per-second metric sample history
+
+try:  # WebSocket support is optional
+    from flask_sock import Sock  # Import WebSocket extension for Flask
+except ImportError:
+    Sock = None
 
 app = Flask(__name__)  # Initialize Flask application
 
 # File to store traffic logs
 LOG_FILE = "traffic_logs.txt"  # Define log file name
 
+# Log file rotation and queueing
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024))  # Rotate after this many bytes
+LOG_MAX_AGE = int(os.environ.get("LOG_MAX_AGE", 3600))  # Rotate after this many seconds
+LOG_BACKUPS = int(os.environ.get("LOG_BACKUPS", 10))  # Rotated segments kept on disk
+LOG_COMPRESS = os.environ.get("LOG_COMPRESS", "1") == "1"  # Gzip rotated segments
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 65536))  # Records buffered before backpressure
+LOG_BACKPRESSURE = os.environ.get("LOG_BACKPRESSURE", "drop-oldest")  # "drop-oldest" or "block"
+
+# Request history sizing
+TRAFFIC_LOG_CAPACITY = int(os.environ.get("TRAFFIC_LOG_CAPACITY", 10000))  # Requests kept in memory
+TRAFFIC_LOG_DISPLAY = int(os.environ.get("TRAFFIC_LOG_DISPLAY", 100))  # Newest requests returned by the API
+
+# API response handling
+API_COMPRESS = os.environ.get("API_COMPRESS", "1") == "1"  # Gzip API responses when the client accepts it
+API_COMPRESS_MIN_BYTES = 1024  # Smaller bodies are sent uncompressed
+HIGH_TRAFFIC_BYTES_PER_SEC = 1e6  # Smoothed send or receive rate that raises the alert
+
+MONITORING_PATHS = {  # Monitoring and control endpoints kept out of the request history
+    "/api/traffic", "/api/network", "/api/top", "/api/stream", "/api/stream/ws", "/api/block",
+    "/api/signatures",
+}
+
+# IPS enforcement settings
+RATE_LIMIT_RPS = float(os.environ.get("RATE_LIMIT_RPS", 100))  # Sustained requests per second per IP (0 disables)
+RATE_LIMIT_BURST = float(os.environ.get("RATE_LIMIT_BURST", 200))  # Token bucket capacity per IP
+BAN_AFTER = int(os.environ.get("BAN_AFTER", 100))  # Rate-limited requests before an automatic ban (0 disables)
+BAN_SECONDS = float(os.environ.get("BAN_SECONDS", 60))  # Length of automatic and /api/block bans
+BLOCK_API_TOKEN = os.environ.get("BLOCK_API_TOKEN", "")  # Bearer token allowing POST/DELETE /api/block ('' disables)
+ADMIN_ADDRESSES = {  # Client addresses allowed to change blocks without the token
+    address.strip() for address in os.environ.get("ADMIN_ADDRESSES", "127.0.0.1,::1").split(",") if address.strip()
+}
+
+# Flood detection settings (requests per second over a sliding window)
+FLOOD_WINDOW = float(os.environ.get("FLOOD_WINDOW", 10))  # Sliding window length in seconds
+FLOOD_THRESHOLDS = {  # Rate that flags a key as a heavy hitter, per dimension
+    "ip": float(os.environ.get("FLOOD_IP_RPS", 50)),
+    "path": float(os.environ.get("FLOOD_PATH_RPS", 500)),
+    "user_agent": float(os.environ.get("FLOOD_UA_RPS", 200)),
+}
+
+# Signature inspection settings
+SIGNATURES_FILE = os.environ.get("SIGNATURES_FILE", "signatures.rules")  # Rule file ('' disables inspection)
+SIGNATURE_MAX_BODY = int(os.environ.get("SIGNATURE_MAX_BODY", 64 * 1024))  # Body bytes inspected per request
+
+# Ground-truth labelling of generated traffic (see Test_Attack_Vector/traffic_mix.py)
+TRUTH_HEADER = os.environ.get("TRUTH_HEADER", "X-Traffic-Id")  # Request header carrying the traffic generator's ID
+VERDICT_FILE = os.environ.get("VERDICT_FILE", "verdicts.log")  # Verdicts of labelled requests ('' disables)
+
+# Live stream settings
+STREAM_TICK = float(os.environ.get("STREAM_TICK", 0.25))  # Seconds of updates coalesced into one event
+STREAM_BACKLOG = int(os.environ.get("STREAM_BACKLOG", 64))  # Events buffered per slow subscriber
+
 # Global variables to store logs and metrics
-traffic_logs = []  # Stores HTTP logs for display
-throughput = deque(maxlen=60)  # Bytes sent/received per second
-latency = deque(maxlen=60)  # Simulated latency data
-cpu_usage = deque(maxlen=60)  # CPU usage over time
-memory_usage = deque(maxlen=60)  # Memory usage over time
-high_traffic_alert = False  # Flag for high traffic alert
+traffic_logs = RequestRing(TRAFFIC_LOG_CAPACITY)  # Stores HTTP request history
+samples = SampleHistory(60)  # Throughput, p99 latency, CPU and memory of the last 60 samples
+latency_recorder = LatencyRecorder()  # Per-route/status-class request latency histograms
+network_metrics = NetworkMetrics()  # Per-NIC deltas, EWMA rates and rollups
+enforcer = Enforcer(RATE_LIMIT_RPS, RATE_LIMIT_BURST, BAN_AFTER, BAN_SECONDS)  # IPS enforcement layer
+flood_detector = FloodDetector(FLOOD_THRESHOLDS, window=FLOOD_WINDOW)  # Heavy hitters by IP, path and agent
+signature_engine = (  # Content inspection; None when no rule file is configured
+    SignatureEngine.from_file(SIGNATURES_FILE, max_body=SIGNATURE_MAX_BODY)
+    if SIGNATURES_FILE and os.path.exists(SIGNATURES_FILE) else None
+)
+
+
+def format_log_record(record):
+    """Turn a queued log record into one line of the traffic log file."""
+    if record[0] == "request":  # Per-request record
+        _, timestamp, ip, method, path, status, latency_ns = record
+        return (
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))} - "
+            f"{ip} {method} {path} {status} {latency_ns / 1e6:.3f}ms\n"
+        )
+    _, timestamp, rates = record  # Periodic counter sample (all-interface rates)
+    return (
+        f"{timestamp} - Bytes Sent/s: {rates['bytes_sent']:.0f}, Bytes Received/s: {rates['bytes_recv']:.0f}, "
+        f"Packets Sent/s: {rates['packets_sent']:.0f}, Packets Received/s: {rates['packets_recv']:.0f}, "
+        f"Errors/s: {rates['errin'] + rates['errout']:.0f}, Drops/s: {rates['dropin'] + rates['dropout']:.0f}\n"
+    )
+
+
+def format_verdict_record(record):
+    """Turn a queued verdict into one tab-separated line: time, traffic ID, verdict, status, rules."""
+    timestamp, traffic_id, verdict, status, rules = record
+    return f"{timestamp:.6f}\t{traffic_id}\t{verdict}\t{status}\t{rules}\n"
+
+
+def make_log_writer(path):
+    """Create the background writer for request records and counter samples."""
+    return LogWriter(
+        path, format_log_record, max_bytes=LOG_MAX_BYTES, max_age=LOG_MAX_AGE, backups=LOG_BACKUPS,
+        compress=LOG_COMPRESS, queue_size=LOG_QUEUE_SIZE, backpressure=LOG_BACKPRESSURE,
+    )
+
+
+def make_verdict_writer(path):
+    """Create the background writer for verdicts on labelled requests, or None when disabled."""
+    if not path:
+        return None
+    return LogWriter(path, format_verdict_record, max_bytes=0, max_age=0, queue_size=LOG_QUEUE_SIZE,
+                     backpressure=LOG_BACKPRESSURE)
+
+
+log_writer = make_log_writer(LOG_FILE)  # Single background writer for this process
+verdict_writer = make_verdict_writer(VERDICT_FILE)  # Verdicts joined to traffic labels by score.py
+log_paths = [LOG_FILE]  # Active log files of every process serving the app
+shared_metrics = None  # SharedMetrics segment when running under serve.py
+broadcaster = Broadcaster(  # Single fan-out thread for every live-stream subscriber
+    lambda since, since_sample: collect_updates(since, since_sample, idle_summary=False),
+    tick=STREAM_TICK, backlog=STREAM_BACKLOG,
+)
 
 
 def log_network_traffic():
     """Continuously log incoming and outgoing traffic system-wide."""
-    global high_traffic_alert  # Access global variable
-
     while True:  # Infinite loop for continuous logging
-        net_io = psutil.net_io_counters()  # Get network I/O statistics
+        rates = network_metrics.sample()  # Per-interval rates summed over every NIC
+        flood_detector.refresh()  # Clear heavy-hitter detections that have cooled down
         timestamp = time.strftime("%Y-%m-%d %H:%M:%S")  # Get current timestamp
-        log_entry = (  # Create log entry string
-            f"{timestamp} - Bytes Sent: {net_io.bytes_sent}, "
-            f"Bytes Received: {net_io.bytes_recv}\n"
-        )
 
-        # Write to log file
-        with open(LOG_FILE, "a") as f:  # Open log file in append mode
-            f.write(log_entry)  # Write log entry to file
+        # Queue the counter sample for the background log writer
+        if samples.publisher:  # Under serve.py only the publishing worker logs samples
+            log_writer.submit(("counters", timestamp, rates))
 
-        # Calculate throughput (bytes per second)
-        throughput.append({  # Append current throughput data
-            "timestamp": timestamp,
-            "bytes_sent": net_io.bytes_sent,
-            "bytes_recv": net_io.bytes_recv,
-        })
+        # Record the p99 of requests measured during the last complete second
+        last_second, _ = latency_recorder.window(1, time.perf_counter_ns() // 1_000_000_000 - 1)  # Last full second
+        cpu_percent = psutil.cpu_percent(interval=None)  # Get CPU usage percentage
+        memory_percent = psutil.virtual_memory().percent  # Get memory usage percentage
 
-        # Simulate latency data for testing (replace with real latency data if available)
-        latency.append(random.uniform(10, 100))  # Random latency in milliseconds
+        # Check for high traffic on the smoothed rates
+        sent_rate = network_metrics.total_ewma("bytes_sent")  # Smoothed bytes sent per second
+        recv_rate = network_metrics.total_ewma("bytes_recv")  # Smoothed bytes received per second
 
-        # Capture system resource usage
-        cpu_usage.append(psutil.cpu_percent(interval=None))  # Get CPU usage percentage
-        memory_usage.append(psutil.virtual_memory().percent)  # Get memory usage percentage
-
-        # Check for high traffic (arbitrary threshold: > 1MB/sec sent or received)
-        sent_rate = (throughput[-1]["bytes_sent"] - throughput[0]["bytes_sent"]) / len(throughput)  # Calculate sent rate
-        recv_rate = (throughput[-1]["bytes_recv"] - throughput[0]["bytes_recv"]) / len(throughput)  # Calculate received rate
-        high_traffic_alert = sent_rate > 1e6 or recv_rate > 1e6  # Set alert if traffic exceeds threshold
+        samples.publish(  # Publish the whole sample at once
+            {  # Throughput (per-second rates over the last interval)
+                "timestamp": timestamp,
+                "bytes_sent": rates["bytes_sent"],
+                "bytes_recv": rates["bytes_recv"],
+                "packets_sent": rates["packets_sent"],
+                "packets_recv": rates["packets_recv"],
+                "errors": rates["errin"] + rates["errout"],
+                "drops": rates["dropin"] + rates["dropout"],
+            },
+            last_second.percentile(99) / 1e6,  # Convert nanoseconds to milliseconds
+            cpu_percent,
+            memory_percent,
+            max(sent_rate, recv_rate) > HIGH_TRAFFIC_BYTES_PER_SEC,  # High traffic alert
+        )
 
         time.sleep(1)  # Log every second
 
@@ -65,43 +187,339 @@ def index():
 
 @app.route('/api/traffic')  # Define route for traffic logs API
 def get_traffic_logs():
-    """Provide traffic logs and metrics for the frontend."""
-    return jsonify({  # Return JSON response
-        "traffic_logs": traffic_logs,
-        "throughput": list(throughput),
-        "latency": list(latency),
-        "cpu_usage": list(cpu_usage),
-        "memory_usage": list(memory_usage),
-        "high_traffic_alert": high_traffic_alert,
-    })
+    """Provide traffic logs and metrics for the frontend.
+
+    Without parameters the newest requests and every retained metric sample are returned.
+    With `since=<seq>` only requests newer than that sequence number are returned, and with
+    `since_sample=<seq>` only newer metric samples; the response carries `seq` and
+    `sample_seq` to pass back on the next poll. The ETag changes only when new data exists,
+    so a poll sending If-None-Match with nothing new costs a 304.
+    """
+    etag = f"{traffic_logs.head}-{samples.seq}-{int(samples.alert)}{int(flood_detector.flood_detected())}"
+    if request.if_none_match.contains_weak(etag):  # Client already has everything
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    since = request.args.get("since", type=int)  # Request history cursor
+    since_sample = request.args.get("since_sample", type=int)  # Metric sample cursor
+    body = json.dumps(collect_updates(since, since_sample)).encode()  # Serialize the response payload
+    return compressed_response(body, etag)
+
+
+def collect_updates(since, since_sample, idle_summary=True):
+    """Gather request records and metric samples newer than the given cursors.
+
+    A cursor of None means "no cursor": the newest TRAFFIC_LOG_DISPLAY requests and every
+    retained sample are returned. A cursor ahead of this server's sequence came from before
+    a restart and is treated the same way, so clients get a fresh snapshot instead of
+    waiting for the sequence to catch up. Latency percentiles are skipped when
+    `idle_summary` is False and no new sample exists, since they only move once per sample.
+    """
+    if since is not None and since > traffic_logs.head:  # Server restarted since the client's last read
+        since = None
+    if since_sample is not None and since_sample > samples.seq:
+        since_sample = None
+    if since is None:
+        logs, cursor = traffic_logs.snapshot(limit=TRAFFIC_LOG_DISPLAY)  # Newest requests only
+    else:
+        logs, cursor = traffic_logs.snapshot(since=since)  # Everything after the cursor
+
+    new_samples, current_sample = samples.since(since_sample)  # Newest entries of every metric series
+
+    data = {
+        "traffic_logs": logs,
+        **new_samples,
+        "high_traffic_alert": samples.alert,
+        "network": network_metrics.snapshot(),  # Latest and EWMA rates per NIC
+        "enforcement": merged_metrics(enforcer),  # Verdict counters and per-request overhead
+        "flood_detected": flood_detector.flood_detected(),  # A source IP is above the flood threshold
+        "top_offenders": flood_detector.top("ip", 5),  # Heaviest source IPs in the sliding window
+        "signatures": merged_metrics(signature_engine) if signature_engine else None,  # Matches and matching cost
+        "log_writer": log_writer.metrics(),  # Queue depth, drops and write counters
+        "stream": broadcaster.metrics(),  # Live-stream subscribers and dropped events
+        "seq": cursor,  # Pass back as since=
+        "sample_seq": current_sample,  # Pass back as since_sample=
+    }
+    if idle_summary or new_samples["latency"]:
+        data["latency_percentiles"] = latency_recorder.summary()  # p50/p90/p99/p99.9/max over 1s/10s/60s
+    return data
+
+
+@app.route('/api/stream')  # Define route for the Server-Sent Events stream
+def stream_traffic():
+    """Push request records and metric samples to the client as Server-Sent Events.
+
+    The first event is a full snapshot (or the delta since Last-Event-ID on reconnect);
+    after that the client receives the broadcaster's coalesced updates.
+    """
+    since, since_sample = parse_event_id(request.headers.get("Last-Event-ID"))  # Resume point on reconnect
+    first = collect_updates(since, since_sample)  # Initial snapshot or catch-up delta
+    first_event = encode_event(first)
+    subscription = broadcaster.subscribe(first["seq"], first["sample_seq"])  # Updates continue from the snapshot
+
+    def generate():
+        try:
+            yield first_event
+            while True:
+                for event in subscription.drain(timeout=broadcaster.heartbeat):
+                    yield event
+        finally:  # Client disconnected
+            broadcaster.unsubscribe(subscription)
+
+    return Response(generate(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+if Sock is not None:  # Register the WebSocket variant only when flask-sock is installed
+    sock = Sock(app)
+
+    @sock.route('/api/stream/ws')  # Define route for the WebSocket stream
+    def stream_traffic_ws(ws):
+        """Push the same updates as /api/stream over a WebSocket, one JSON message per event."""
+        first = collect_updates(None, None)  # Initial snapshot
+        subscription = broadcaster.subscribe(first["seq"], first["sample_seq"])  # Updates continue from the snapshot
+        try:
+            ws.send(json.dumps(first))
+            while True:
+                for event in subscription.drain(timeout=broadcaster.heartbeat):
+                    if event.startswith("id:"):  # Skip SSE keep-alive comments
+                        ws.send(event.split("data: ", 1)[1].rstrip("\n"))
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+
+def merged_metrics(component):
+    """Return a component's metrics with its counters summed over every serve.py worker."""
+    metrics = component.metrics()
+    if shared_metrics is not None:
+        metrics.update(component.counters.totals())
+    return metrics
+
+
+def compressed_response(body, etag):
+    """Build a JSON response, gzipping it when enabled and accepted by the client."""
+    response = Response(body, mimetype="application/json")
+    if API_COMPRESS and len(body) >= API_COMPRESS_MIN_BYTES and "gzip" in request.accept_encodings:
+        response.set_data(gzip.compress(body, compresslevel=1))  # Fast level: bodies are mostly repetitive JSON
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"  # Always revalidate with If-None-Match
+    response.set_etag(etag, weak=True)
+    return response
+
+
+@app.route('/api/network')  # Define route for network rollup history
+def get_network_rollups():
+    """Provide per-second rates of one rollup tier (?tier=1s|10s|1m|1h, ?nic=<name>|all)."""
+    tier = request.args.get("tier", "10s")  # Rollup resolution
+    nic = request.args.get("nic", "all")  # Interface, or "all" for the sum
+    if tier not in {name for name, _, _ in TIERS}:
+        return Response(json.dumps({"error": f"Unknown tier: {tier}"}), status=400, mimetype="application/json")
+    etag = f"{tier}-{nic}-{samples.seq}"  # Rollups only change when a new sample is taken
+    if request.if_none_match.contains_weak(etag):  # Client already has this version
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+    body = json.dumps({"tier": tier, "nic": nic, "series": network_metrics.rollup(tier, nic)}).encode()
+    return compressed_response(body, etag)
+
+
+@app.route('/api/top')  # Define route for heavy-hitter rankings
+def get_top_offenders():
+    """Provide the top-k keys of one dimension (?dimension=ip|path|user_agent&k=10)."""
+    dimension = request.args.get("dimension", "ip")  # Attribute to rank
+    k = request.args.get("k", 10, type=int)  # Number of keys returned
+    if dimension not in DIMENSIONS:
+        return Response(json.dumps({"error": f"Unknown dimension: {dimension}"}), status=400,
+                        mimetype="application/json")
+    return Response(json.dumps({"dimension": dimension, "top": flood_detector.top(dimension, k)}),
+                    mimetype="application/json")
+
+
+@app.route('/api/block', methods=['GET', 'POST', 'DELETE'])  # Define route for IPS enforcement control
+def block_traffic():
+    """List, add or remove blocks.
+
+    Anyone may GET the listing. POST and DELETE need `Authorization: Bearer <BLOCK_API_TOKEN>`
+    or a client address in ADMIN_ADDRESSES (loopback by default). POST with a JSON body {"cidr": "10.0.0.0/8", "seconds": 300} blocks a prefix or IP
+    (permanently if "seconds" is omitted). POST without a "cidr" bans every source that is
+    currently exceeding its rate limit or flagged by the flood detector. DELETE with
+    {"cidr": ...} lifts a block or ban.
+    """
+    if request.method != 'GET' and not is_operator():
+        return Response(json.dumps({"error": "Changing blocks requires an operator token or admin address"}),
+                        status=403, mimetype="application/json")
+    body = request.get_json(silent=True) or {}  # Optional JSON parameters
+    seconds = body.get("seconds")  # Block or ban length; None means permanent / BAN_SECONDS
+    if seconds is not None and (isinstance(seconds, bool) or not isinstance(seconds, (int, float))
+                                or not 0 <= seconds < float("inf")):
+        return Response(json.dumps({"error": f"Invalid seconds: {seconds!r} (expected a non-negative number)"}),
+                        status=400, mimetype="application/json")
+    try:
+        if request.method == 'POST' and body.get("cidr"):
+            blocked = enforcer.block(body["cidr"], seconds)  # Add to the blocklist
+            result = {"blocked": [blocked]}
+        elif request.method == 'POST':
+            banned = enforcer.ban_offenders(seconds)  # Ban sources over their rate limit
+            for ip in flood_detector.offenders("ip"):  # Ban heavy hitters the detector flagged
+                if ip not in banned:
+                    enforcer.ban(ip, seconds or BAN_SECONDS)
+                    banned.append(ip)
+            result = {"banned": banned}  # Ban current flood sources
+        elif request.method == 'DELETE':
+            result = {"removed": enforcer.unblock(body.get("cidr", ""))}
+        else:
+            result = enforcer.listing()
+    except ValueError as e:  # Invalid CIDR
+        return Response(json.dumps({"error": str(e)}), status=400, mimetype="application/json")
+    return Response(json.dumps(result), mimetype="application/json")
+
+
+def is_operator():
+    """Return True when the request carries the operator token or comes from an admin address."""
+    if request.remote_addr in ADMIN_ADDRESSES:
+        return True
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return bool(BLOCK_API_TOKEN) and scheme.lower() == "bearer" and hmac.compare_digest(token, BLOCK_API_TOKEN)
+
+
+@app.route('/api/signatures')  # Define route for signature alerts
+def get_signature_alerts():
+    """Provide the most recent signature matches, per-rule hit counts and matching cost."""
+    if signature_engine is None:
+        return Response(json.dumps({"error": "Signature inspection is disabled"}), status=404,
+                        mimetype="application/json")
+    return Response(json.dumps({
+        **merged_metrics(signature_engine),
+        "alerts": list(signature_engine.alerts),  # Oldest first
+        "hits": {signature.rule_id: signature.hits for signature in signature_engine.signatures if signature.hits},
+    }), mimetype="application/json")
 
 
 @app.route('/download_logs')  # Define route for downloading logs
 def download_logs():
-    """Download the traffic log file."""
-    return send_file(LOG_FILE, as_attachment=True)  # Send log file as attachment
+    """Stream the rotated log segments followed by the active log file, per serving process."""
+    paths = [segment for path in log_paths for segment in rotated_segments(path) + [path]]  # Oldest segment first
+    return Response(  # Stream in chunks instead of loading the files into memory
+        stream_segments(paths),
+        mimetype="text/plain",
+        headers={"Content-Disposition": f"attachment; filename={os.path.basename(LOG_FILE)}"},
+    )
+
+
+@app.before_request  # Define function to run before each request
+def start_request_timer():
+    """Remember when the request started so its latency can be measured."""
+    g.request_start_ns = time.perf_counter_ns()  # Monotonic start time in nanoseconds
+
+
+@app.before_request  # Runs after start_request_timer, so enforcement cost shows up in latency
+def enforce_policy():
+    """Reject requests from banned, blocklisted or rate-limited sources."""
+    if request.path in MONITORING_PATHS and (request.path != "/api/block" or request.method == "GET"):
+        return None  # Never lock operators out of monitoring; block changes are enforced like any request
+    verdict = enforcer.check(request.remote_addr)  # None means allowed
+    if verdict is not None:
+        status, reason = verdict
+        g.verdict = ("block", reason)
+        return Response(reason, status=status, mimetype="text/plain")  # Short-circuits the view
+
+    if signature_engine is not None:  # Inspect path, query, headers and body in one pass
+        small_body = (request.content_length or 0) <= SIGNATURE_MAX_BODY  # Larger bodies are left to the view
+        matches = signature_engine.inspect(
+            request.remote_addr, request.method, request.path,
+            request.query_string.decode("latin-1"), request.headers.items(),
+            request.get_data(cache=True, as_text=True) if small_body else "",  # Cached, so the view can still read it
+        )
+        if matches:
+            blocked = any(signature.action == "block" for signature in matches)
+            g.verdict = ("block" if blocked else "alert", ",".join(signature.rule_id for signature in matches))
+            if blocked:
+                return Response("signature match", status=FORBIDDEN, mimetype="text/plain")
 
 
 @app.after_request  # Define function to run after each request
 def log_traffic(response):
     """Log incoming and outgoing HTTP requests to the home page."""
-    log_entry = {  # Create log entry dictionary
-        "ip": request.remote_addr,  # Get client IP address
-        "method": request.method,  # Get HTTP method
-        "path": request.path,  # Get request path
-        "response_status": response.status_code,  # Get response status code
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),  # Get current timestamp
-    }
-    traffic_logs.append(log_entry)  # Append log entry to traffic logs
+    start_ns = g.get("request_start_ns")  # Start time set by start_request_timer
+    end_ns = time.perf_counter_ns()  # Request end time
+    if start_ns is not None:
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"  # Route template keeps keys bounded
+        latency_recorder.record(route, response.status_code, start_ns, end_ns)  # Record latency
 
-    # Limit logs to the last 100 entries for display
-    if len(traffic_logs) > 100:  # Check if logs exceed limit
-        traffic_logs.pop(0)  # Remove oldest log entry
+    now = time.time()  # Epoch timestamp, formatted when read or written
+    if request.path not in MONITORING_PATHS:  # Dashboard polls would otherwise change the data they poll
+        flood_detector.observe(  # Count the request towards heavy-hitter detection
+            request.remote_addr, request.path, request.headers.get("User-Agent", ""), now,
+        )
+        traffic_logs.append(  # Record the request; the oldest entry is overwritten in O(1) once full
+            request.remote_addr,  # Client IP address
+            request.method,  # HTTP method
+            request.path,  # Request path
+            response.status_code,  # Response status code
+            now,
+        )
+    log_writer.submit((  # Queue the request for the forensic log on disk
+        "request", now, request.remote_addr, request.method, request.path, response.status_code,
+        end_ns - start_ns if start_ns is not None else 0,
+    ))
+
+    traffic_id = request.headers.get(TRUTH_HEADER)  # Set only by the traffic generator
+    if traffic_id and verdict_writer is not None:
+        verdict, rules = g.get("verdict", ("allow", ""))
+        # Every generated request comes from the generator's host, so floods are attributed by the
+        # User-Agent identity it assigns; a flagged IP would mark all labelled traffic as flood.
+        if verdict == "allow" and flood_detector.flagged("user_agent", request.headers.get("User-Agent", "")):
+            verdict, rules = "alert", "flood"  # Source identity is a flagged heavy hitter
+        verdict_writer.submit((now, traffic_id, verdict, response.status_code, rules))
 
     return response  # Return response
 
 
-if __name__ == '__main__':  # Check if script is run directly
+def use_shared_metrics(shared, worker):
+    """Switch this process to the shared-memory metrics of serve.py worker `worker`.
+
+    Must run before start_background_threads(). The request ring and metric samples
+    become global, counters and cost histograms move into this worker's region, and the
+    worker gets its own log file so no two processes write to the same file.
+    """
+    global traffic_logs, latency_recorder, samples, log_writer, verdict_writer, shared_metrics
+    shared_metrics = shared
+    traffic_logs = shared.ring()
+    latency_recorder = shared.latency(worker)
+    samples = shared.samples(publisher=worker == 0)  # One worker publishes the once-per-second samples
+    enforcer.counters = shared.counters(worker, "enforcement")
+    enforcer.overhead = shared.histogram(worker, "enforcement_overhead")
+    if signature_engine is not None:
+        signature_engine.counters = shared.counters(worker, "signatures")
+        signature_engine.cost = shared.histogram(worker, "signature_cost")
+    log_paths[:] = [worker_log_path(index) for index in range(shared.workers)]
+    log_writer = make_log_writer(log_paths[worker])
+    verdict_writer = make_verdict_writer(VERDICT_FILE and worker_log_path(worker, VERDICT_FILE))
+
+
+def worker_log_path(worker, path=LOG_FILE):
+    """Return the log file of one serve.py worker (traffic_logs.txt -> traffic_logs.<worker>.txt)."""
+    base, extension = os.path.splitext(path)
+    return f"{base}.{worker}{extension}"
+
+
+def start_background_threads():
+    """Start the log writer, the live-stream broadcaster and the network sampler."""
+    # Start the background log writer and flush it on exit
+    log_writer.start()  # Start writer thread
+    atexit.register(log_writer.stop)  # Write remaining records on shutdown
+    if verdict_writer is not None:
+        verdict_writer.start()
+        atexit.register(verdict_writer.stop)
+
+    # Start the live-stream broadcaster
+    broadcaster.start()  # Start fan-out thread
+
     # Start network traffic logging in a separate thread
     threading.Thread(target=log_network_traffic, daemon=True).start()  # Start logging thread
-    app.run(host='0.0.0.0', port=5000, debug=True)  # Run Flask app
+
+
+if __name__ == '__main__':  # Check if script is run directly
+    start_background_threads()
+    app.run(host='0.0.0.0', port=5000, debug=True)  # Run Flask app (development server; see serve.py)
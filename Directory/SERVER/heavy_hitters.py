@@ -0,0 +1,200 @@
+import threading  # Import threading for guarding sketch updates
+import time  # Import time for detection timestamps
+from array import array  # Import array for compact sketch counters
+
+DIMENSIONS = ("ip", "path", "user_agent")  # Request attributes tracked for heavy hitters
+
+
+class SlidingCountMinSketch:
+    """Count-Min Sketch over a sliding time window made of `slices` rotating sub-sketches.
+
+    Each update touches `depth` counters of the current slice. An estimate sums a key's
+    counters over the live slices and takes the minimum across rows, so it never
+    undercounts and overcounts by at most ~e/width of the window's total traffic.
+    """
+
+    def __init__(self, width=2048, depth=4, window=10.0, slices=10):
+        self.width = width  # Counters per row
+        self.depth = depth  # Independent hash rows
+        self.window = window  # Window length in seconds
+        self.slices = slices  # Sub-windows the window is split into
+        self.slice_seconds = window / slices  # Length of one sub-window
+        self.tables = [[array("I", bytes(4 * width)) for _ in range(depth)] for _ in range(slices)]
+        self.epochs = [-1] * slices  # Sub-window number held by each slice
+        self.zero = array("I", bytes(4 * width))  # Template for clearing recycled rows
+
+    def indexes(self, key):
+        """Derive `depth` row positions from one hash (Kirsch-Mitzenmacher double hashing)."""
+        hashed = hash(key)
+        first = hashed & 0xFFFFFFFF
+        step = (hashed >> 32) | 1
+        return [(first + row * step) % self.width for row in range(self.depth)]
+
+    def add(self, key, now):
+        """Count one occurrence of `key` at time `now` and return its row positions."""
+        epoch = int(now / self.slice_seconds)
+        slot = epoch % self.slices
+        rows = self.tables[slot]
+        if self.epochs[slot] != epoch:  # Slice holds an expired sub-window: clear it
+            for row in rows:
+                row[:] = self.zero
+            self.epochs[slot] = epoch
+        positions = self.indexes(key)
+        for row, position in zip(rows, positions):
+            row[position] += 1
+        return positions
+
+    def estimate(self, key, now, positions=None):
+        """Return the estimated count of `key` over the last `window` seconds."""
+        positions = self.indexes(key) if positions is None else positions
+        newest = int(now / self.slice_seconds)
+        live = [self.tables[slot] for slot in range(self.slices) if newest - self.slices < self.epochs[slot] <= newest]
+        return min(sum(rows[row][position] for rows in live) for row, position in enumerate(positions))
+
+
+class SpaceSaving:
+    """Space-Saving top-k counters with a stream-summary index for O(1) updates.
+
+    At most `capacity` keys are tracked. An untracked key replaces one with the minimum
+    count and inherits that count as its error bound, so `count - error` never exceeds the
+    true count and every key more frequent than total/capacity is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity  # Maximum tracked keys
+        self.counts = {}  # Key -> counted occurrences (upper bound)
+        self.errors = {}  # Key -> overestimation bound
+        self.first_seen = {}  # Key -> time the key entered the summary
+        self.buckets = {}  # Count -> set of keys with that count
+        self.min_count = 0  # Smallest count among tracked keys
+
+    def offer(self, key, now):
+        """Count one occurrence of `key` and return its (upper bound) count."""
+        count = self.counts.get(key)
+        if count is None:
+            if len(self.counts) < self.capacity:
+                count = 0
+                self.errors[key] = 0
+            else:  # Replace a key holding the minimum count
+                victims = self.buckets[self.min_count]
+                victim = victims.pop()
+                if not victims:
+                    del self.buckets[self.min_count]
+                del self.counts[victim], self.errors[victim], self.first_seen[victim]
+                count = self.min_count
+                self.errors[key] = count
+            self.first_seen[key] = now
+        else:
+            keys = self.buckets[count]
+            keys.discard(key)
+            if not keys:
+                del self.buckets[count]
+        self.counts[key] = count + 1
+        self.buckets.setdefault(count + 1, set()).add(key)
+        if count == 0:  # A fresh key always holds the minimum
+            self.min_count = 1
+        elif count == self.min_count and count not in self.buckets:  # Minimum bucket emptied
+            self.min_count = count + 1
+        return count + 1
+
+    def keys(self):
+        """Return the tracked keys."""
+        return list(self.counts)
+
+
+class HeavyHitterTracker:
+    """Heavy hitters of one request attribute over a sliding window.
+
+    The Count-Min Sketch gives windowed counts for any key. Two Space-Saving summaries (the
+    current and the previous window) name the candidates worth reporting. A key is flagged
+    when its windowed rate crosses `threshold` requests per second. The flag clears once
+    the rate falls below half of that.
+    """
+
+    def __init__(self, threshold, window=10.0, capacity=256, width=2048, depth=4):
+        self.threshold = threshold  # Requests per second that flag a key
+        self.window = window  # Sliding window length in seconds
+        self.capacity = capacity  # Space-Saving capacity
+        self.sketch = SlidingCountMinSketch(width, depth, window)
+        self.current = SpaceSaving(capacity)  # Candidates seen in the current window
+        self.previous = SpaceSaving(capacity)  # Candidates from the previous window
+        self.generation = 0  # Window number `current` belongs to
+        self.detections = {}  # Key -> epoch time the key was first flagged
+
+    def observe(self, key, now):
+        """Count one request for `key` at `now`."""
+        generation = int(now / self.window)
+        if generation != self.generation:  # Tumble the candidate summaries
+            self.previous = self.current if generation == self.generation + 1 else SpaceSaving(self.capacity)
+            self.current = SpaceSaving(self.capacity)
+            self.generation = generation
+        positions = self.sketch.add(key, now)
+        self.current.offer(key, now)
+        # Judge on the sliding estimate alone: the tumbling Space-Saving count restarts at
+        # every window boundary and would hold back a flood that straddles one.
+        if key not in self.detections and self.sketch.estimate(key, now, positions) / self.window >= self.threshold:
+            self.detections[key] = now
+
+    def refresh(self, now):
+        """Clear detections whose rate fell below half the threshold."""
+        for key in list(self.detections):
+            if self.sketch.estimate(key, now) / self.window < self.threshold / 2:
+                del self.detections[key]
+
+    def top(self, k, now):
+        """Return the k heaviest candidates with windowed counts, rates and detection times."""
+        candidates = set(self.current.keys()) | set(self.previous.keys())
+        ranked = sorted(((self.sketch.estimate(key, now), key) for key in candidates), reverse=True)[:k]
+        return [
+            {
+                "key": key,
+                "count": count,
+                "rate": round(count / self.window, 2),
+                "error": self.current.errors.get(key, self.previous.errors.get(key, 0)),
+                "detected_at": self.detections.get(key),
+            }
+            for count, key in ranked if count
+        ]
+
+
+class FloodDetector:
+    """Heavy-hitter tracking for source IPs, paths and user agents behind one lock."""
+
+    def __init__(self, thresholds, window=10.0, capacity=256):
+        self.trackers = {
+            dimension: HeavyHitterTracker(thresholds[dimension], window, capacity) for dimension in DIMENSIONS
+        }
+        self.lock = threading.Lock()  # Space-Saving updates are multi-step, so serialize them
+
+    def observe(self, ip, path, user_agent, now):
+        """Count one request in every dimension."""
+        with self.lock:
+            self.trackers["ip"].observe(ip, now)
+            self.trackers["path"].observe(path, now)
+            self.trackers["user_agent"].observe(user_agent, now)
+
+    def refresh(self, now=None):
+        """Expire detections that have cooled down."""
+        now = time.time() if now is None else now
+        with self.lock:
+            for tracker in self.trackers.values():
+                tracker.refresh(now)
+
+    def top(self, dimension, k=10, now=None):
+        """Return the top-k offenders of one dimension."""
+        now = time.time() if now is None else now
+        with self.lock:
+            return self.trackers[dimension].top(k, now)
+
+    def offenders(self, dimension="ip"):
+        """Return the keys currently flagged in one dimension."""
+        with self.lock:
+            return list(self.trackers[dimension].detections)
+
+    def flagged(self, dimension, key):
+        """Return True when `key` is currently flagged in one dimension."""
+        return key in self.trackers[dimension].detections
+
+    def flood_detected(self):
+        """Return True while any source IP is flagged."""
+        return bool(self.trackers["ip"].detections)
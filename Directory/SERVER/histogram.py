@@ -0,0 +1,165 @@
+import threading  # Import threading for per-histogram locks
+import time  # Import time for window bookkeeping
+import os  # Import os to locate the shared bucket layout
+import sys  # Import sys to put the shared bucket layout on the import path
+from array import array  # Import array for compact fixed-size bucket storage
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from log_linear import (  # Import the bucket layout shared with Test_Attack_Vector/latency_histogram.py
+    BUCKET_COUNT, MAX_VALUE, SUB_BUCKET_BITS, SUB_BUCKET_COUNT, SUB_BUCKET_HALF, bucket_index, percentile_from_counts,
+)
+
+ZERO_SLOT = array("I", bytes(4 * BUCKET_COUNT))  # Template used to clear recycled window slots
+
+PERCENTILES = (("p50", 50.0), ("p90", 90.0), ("p99", 99.0), ("p99.9", 99.9))  # Reported percentiles
+WINDOWS = (1, 10, 60)  # Rolling windows in seconds exposed by the API
+
+
+class LogLinearHistogram:
+    """Fixed-memory HDR-style histogram of integer values (nanoseconds by convention)."""
+
+    __slots__ = ("counts", "total", "max_value")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKET_COUNT))  # One 64-bit counter per bucket
+        self.total = 0  # Number of recorded values
+        self.max_value = 0  # Largest recorded value
+
+    def record(self, value):
+        """Record a single value."""
+        self.counts[bucket_index(value)] += 1
+        self.total += 1
+        if value > self.max_value:
+            self.max_value = value
+
+    def merge(self, counts, total, max_value):
+        """Add another set of bucket counts into this histogram."""
+        mine = self.counts
+        for index, count in enumerate(counts):  # Element-wise sum of bucket counts
+            if count:
+                mine[index] += count
+        self.total += total
+        if max_value > self.max_value:
+            self.max_value = max_value
+
+    def percentile(self, percentile):
+        """Return the value at the given percentile (0-100)."""
+        return percentile_from_counts(self.counts, self.total, percentile, self.max_value)
+
+    def summary(self, scale=1e-6):
+        """Return count, reported percentiles and max, scaled (default: ns to ms)."""
+        result = {"count": self.total}
+        for name, percentile in PERCENTILES:
+            result[name] = round(self.percentile(percentile) * scale, 3)
+        result["max"] = round(self.max_value * scale, 3)
+        return result
+
+
+class RollingHistogram:
+    """Ring of one-second histogram slots covering the last `horizon` seconds."""
+
+    __slots__ = ("horizon", "slots", "epochs", "maxima", "current", "current_epoch", "lock")
+
+    def __init__(self, horizon=max(WINDOWS)):
+        self.horizon = horizon  # Number of one-second slots kept
+        self.slots = [array("I", bytes(4 * BUCKET_COUNT)) for _ in range(horizon)]  # Preallocated slots
+        self.epochs = [-1] * horizon  # Second each slot currently holds
+        self.maxima = [0] * horizon  # Largest sample per slot
+        self.current = self.slots[0]  # Slot receiving samples for current_epoch
+        self.current_epoch = -1  # Second the current slot belongs to
+        self.lock = threading.Lock()  # Serializes slot rotation and window reads
+
+    def rotate(self, now_s):
+        """Point the current slot at `now_s`, recycling whatever second it held before."""
+        position = now_s % self.horizon  # Slot for this second
+        if self.epochs[position] != now_s:  # Slot holds an older second: clear it
+            self.slots[position][:] = ZERO_SLOT
+            self.epochs[position] = now_s
+            self.maxima[position] = 0
+        self.current = self.slots[position]
+        self.current_epoch = now_s
+
+    def record(self, value, now_s):
+        """Record a value into the slot for the given whole second (hot path, kept inline)."""
+        if value < SUB_BUCKET_COUNT:  # Same mapping as bucket_index(), inlined for speed
+            index = value if value > 0 else 0
+        else:
+            if value > MAX_VALUE:
+                value = MAX_VALUE
+            shift = value.bit_length() - SUB_BUCKET_BITS
+            index = shift * SUB_BUCKET_HALF + (value >> shift)
+        if now_s != self.current_epoch:  # First sample of a new second: rotate under the lock
+            with self.lock:
+                if now_s < self.current_epoch:  # Straggler from an older second: drop it
+                    return
+                if now_s != self.current_epoch:  # Another thread may have rotated already
+                    self.rotate(now_s)
+        # Increments are left unlocked: a GIL switch mid-increment can lose one count,
+        # which is far cheaper than paying for a lock on every request.
+        self.current[index] += 1
+        position = now_s % self.horizon
+        if value > self.maxima[position]:
+            self.maxima[position] = value
+
+    def window(self, seconds, now_s):
+        """Merge the slots that fall inside the last `seconds` seconds."""
+        merged = LogLinearHistogram()
+        oldest = now_s - seconds  # Slots must be strictly newer than this
+        with self.lock:
+            for position in range(self.horizon):
+                if oldest < self.epochs[position] <= now_s:
+                    slot = self.slots[position]
+                    merged.merge(slot, sum(slot), self.maxima[position])
+        return merged
+
+
+class LatencyRecorder:
+    """Rolling latency histograms keyed by route and status class."""
+
+    def __init__(self, horizon=max(WINDOWS)):
+        self.horizon = horizon  # Seconds of history kept per key
+        self.histograms = {}  # (route, status_code // 100) -> RollingHistogram
+        self.lock = threading.Lock()  # Guards creation of new keys only
+        self.cached_summary = None  # (second, windows, result) of the last summary() call
+
+    def record(self, route, status_code, start_ns, end_ns):
+        """Record one request latency given perf_counter_ns() start and end stamps."""
+        key = (route, status_code // 100)  # Group statuses by class to bound cardinality
+        histogram = self.histograms.get(key)
+        if histogram is None:  # First request for this key
+            with self.lock:
+                histogram = self.histograms.setdefault(key, RollingHistogram(self.horizon))
+        histogram.record(end_ns - start_ns, end_ns // 1_000_000_000)  # Window slots follow the same clock
+
+    def window(self, seconds, now_s=None):
+        """Return per-key histograms and an overall histogram for the window."""
+        now_s = time.perf_counter_ns() // 1_000_000_000 if now_s is None else now_s
+        overall = LogLinearHistogram()
+        per_key = {}
+        for key, histogram in list(self.histograms.items()):
+            merged = histogram.window(seconds, now_s)
+            if merged.total:
+                per_key[key] = merged
+                overall.merge(merged.counts, merged.total, merged.max_value)
+        return overall, per_key
+
+    def summary(self, windows=WINDOWS):
+        """Return percentile summaries (ms) for every window, overall and per key.
+
+        "breakdown" is "route": the "routes" entries are keyed "<route> <status>xx".
+        Merging up to `horizon` slots per key is the expensive part, so the result is
+        computed at most once per second and shared by every poll within that second.
+        """
+        now_s = time.perf_counter_ns() // 1_000_000_000
+        cached = self.cached_summary
+        if cached is not None and cached[0] == now_s and cached[1] == windows:  # Already merged this second
+            return cached[2]
+        result = {"breakdown": "route"}  # How the "routes" entries of each window are keyed
+        for seconds in windows:
+            overall, per_key = self.window(seconds, now_s)
+            result[f"{seconds}s"] = {
+                "all": overall.summary(),
+                "routes": {f"{route} {status}xx": merged.summary() for (route, status), merged in per_key.items()},
+            }
+        self.cached_summary = (now_s, windows, result)
+        return result
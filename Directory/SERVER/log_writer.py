@@ -0,0 +1,273 @@
+import glob  # Import glob for locating rotated segments
+import gzip  # Import gzip for compressing rotated segments
+import os  # Import os for file size and rename operations
+import re  # Import re for parsing rotated segment names
+import shutil  # Import shutil for streaming copies into gzip files
+import threading  # Import threading for the background writer
+import time  # Import time for rotation timestamps
+from collections import deque  # Import deque for the bounded record queue
+
+DROP_OLDEST = "drop-oldest"  # Discard the oldest queued record when the queue is full
+BLOCK = "block"  # Make producers wait for space when the queue is full
+SEGMENT_NAME = re.compile(r"\.(\d{8}-\d{6})(?:-(\d+))?(?:\.gz)?")  # .<timestamp>[-<n>][.gz] after the log path
+
+
+class LogWriter:
+    """Single background thread that batches log records into large buffered writes.
+
+    Producers call `submit()` with any record; the writer thread turns a batch of records
+    into text with `formatter` and writes it in one call. The active file is rotated when
+    it exceeds `max_bytes` or is older than `max_age` seconds, and rotated segments can be
+    gzip-compressed on a second thread so compression never stalls writes. When the queue is full the `backpressure` policy either drops the
+    oldest record or blocks the producer; both outcomes are counted in `metrics()`.
+    Formatting and I/O errors are counted too and never stop the writer thread; if the
+    thread does die, `submit()` discards records instead of waiting for it.
+    """
+
+    def __init__(self, path, formatter, max_bytes=10 * 1024 * 1024, max_age=3600, backups=10,
+                 compress=True, queue_size=65536, backpressure=DROP_OLDEST, batch_size=4096,
+                 flush_interval=0.5, buffer_size=1024 * 1024):
+        if backpressure not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown backpressure policy: {backpressure}")
+        self.path = path  # Active log file
+        self.formatter = formatter  # Callable turning one record into a line of text
+        self.max_bytes = max_bytes  # Rotate once the active file reaches this size (0 disables)
+        self.max_age = max_age  # Rotate once the active file is this many seconds old (0 disables)
+        self.backups = backups  # Rotated segments kept on disk (0 keeps all)
+        self.compress = compress  # Gzip rotated segments
+        self.queue_size = queue_size  # Maximum queued records
+        self.backpressure = backpressure  # DROP_OLDEST or BLOCK
+        self.batch_size = batch_size  # Maximum records per write call
+        self.flush_interval = flush_interval  # Longest time a record waits before being written
+        self.buffer_size = buffer_size  # Size of the file object's write buffer
+
+        self.queue = deque()  # Pending records
+        self.condition = threading.Condition()  # Guards the queue and wakes the writer/producers
+        self.running = False  # Writer thread state
+        self.thread = None  # Background writer thread
+        self.pending = deque()  # Rotated segments waiting for compression
+        self.compress_condition = threading.Condition()  # Guards `pending` and wakes the compressor
+        self.compressor = None  # Background compression thread
+        self.file = None  # Open active file
+        self.opened_at = 0.0  # When the active file was opened
+
+        self.submitted = 0  # Records accepted by submit()
+        self.written = 0  # Records written to disk
+        self.dropped = 0  # Records discarded by the drop-oldest policy
+        self.blocked = 0  # submit() calls that had to wait for space
+        self.batches = 0  # Write calls issued
+        self.bytes_written = 0  # Bytes written to disk
+        self.rotations = 0  # Completed rotations
+        self.format_errors = 0  # Records the formatter rejected (skipped)
+        self.write_errors = 0  # Failed writes, rotations and compressions
+        self.failed = 0  # Records in batches that could not be written
+        self.last_error = None  # Most recent formatting or I/O error
+
+    def start(self):
+        """Start the background writer thread."""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="log-writer", daemon=True)
+        self.thread.start()
+        if self.compress:
+            self.compressor = threading.Thread(target=self.compress_segments, name="log-compressor", daemon=True)
+            self.compressor.start()
+
+    def stop(self):
+        """Write everything still queued and stop the writer thread."""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        with self.compress_condition:  # Writer is done: let the compressor drain and exit
+            self.compress_condition.notify_all()
+        if self.compressor is not None:
+            self.compressor.join()
+            self.compressor = None
+
+    def submit(self, record):
+        """Queue one record for writing, applying the backpressure policy when full.
+
+        Returns False without waiting, and discards the record, when the writer thread has died.
+        """
+        with self.condition:
+            if self.thread is not None and not self.thread.is_alive():  # Nobody will ever drain the queue
+                self.dropped += 1
+                return False
+            if len(self.queue) >= self.queue_size:
+                if self.backpressure == BLOCK and self.running:
+                    self.blocked += 1
+                    while len(self.queue) >= self.queue_size and self.running and self.thread.is_alive():
+                        self.condition.wait(self.flush_interval)
+                else:
+                    self.queue.popleft()
+                    self.dropped += 1
+            self.queue.append(record)
+            self.submitted += 1
+            if len(self.queue) >= self.batch_size:  # Wake the writer early for a full batch
+                self.condition.notify_all()
+        return True
+
+    def run(self):
+        """Writer loop: wait for a batch or the flush interval, then write it in one call."""
+        while True:
+            with self.condition:
+                if self.running and len(self.queue) < self.batch_size:
+                    self.condition.wait(self.flush_interval)
+                batch = [self.queue.popleft() for _ in range(min(len(self.queue), self.batch_size))]
+                stopping = not self.running and not self.queue
+                self.condition.notify_all()  # Wake producers blocked on a full queue
+            try:
+                if self.file is None or self.file.closed:  # First pass, or an earlier open/rotation failed
+                    self.open()
+                if batch:
+                    self.write_batch(batch)
+                elif self.max_age and time.time() - self.opened_at >= self.max_age and self.file.tell():
+                    self.rotate()
+            except Exception as error:  # Disk full, permissions, ...: count it and keep the thread alive
+                self.write_errors += 1
+                self.failed += len(batch)
+                self.last_error = repr(error)
+            if stopping:
+                break
+        if self.file is not None:
+            try:
+                self.file.close()
+            except OSError as error:  # Buffered data could not be flushed
+                self.write_errors += 1
+                self.last_error = repr(error)
+            self.file = None
+
+    def write_batch(self, batch):
+        """Format and write one batch, rotating afterwards if a limit was reached."""
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter(record))
+            except Exception as error:  # One bad record must not cost the rest of the batch
+                self.format_errors += 1
+                self.last_error = repr(error)
+        text = "".join(lines)
+        self.file.write(text)
+        self.file.flush()
+        self.written += len(lines)
+        self.batches += 1
+        self.bytes_written += len(text)
+        if self.max_bytes and self.file.tell() >= self.max_bytes:
+            self.rotate()
+        elif self.max_age and time.time() - self.opened_at >= self.max_age:
+            self.rotate()
+
+    def open(self):
+        """Open the active file in append mode with a large write buffer."""
+        self.file = open(self.path, "a", buffering=self.buffer_size)
+        self.opened_at = time.time()
+
+    def rotate(self):
+        """Close the active file, move it aside as a segment and start a new one."""
+        self.file.close()
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        taken = [suffix for when, suffix in map(segment_key(self.path), self.segments()) if when == stamp]
+        # Several rotations in one second count upwards, so names keep sorting oldest first
+        segment = f"{self.path}.{stamp}-{max(taken) + 1}" if taken else f"{self.path}.{stamp}"
+        os.replace(self.path, segment)
+        self.open()
+        self.rotations += 1
+        if self.compressor is not None:  # Compression and retention happen on the compressor thread
+            with self.compress_condition:
+                self.pending.append(segment)
+                self.compress_condition.notify_all()
+        else:
+            self.enforce_retention()
+
+    def compress_segments(self):
+        """Compressor loop: gzip rotated segments as they arrive, then apply retention."""
+        while True:
+            with self.compress_condition:
+                while not self.pending and self.thread is not None:
+                    self.compress_condition.wait()
+                if not self.pending:  # Writer has stopped and nothing is left
+                    break
+                segment = self.pending.popleft()
+            try:
+                self.compress_segment(segment)
+                self.enforce_retention()
+            except FileNotFoundError:  # Retention removed it before its turn came
+                continue
+            except Exception as error:  # Disk full, permissions, ...: leave the segment uncompressed
+                self.write_errors += 1
+                self.last_error = repr(error)
+
+    def compress_segment(self, segment):
+        """Gzip one segment under a name the segment glob does not match, then swap it in."""
+        directory, name = os.path.split(segment)
+        partial = os.path.join(directory, f".{name}.gz.partial")
+        with open(segment, "rb") as source, gzip.open(partial, "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.replace(partial, segment + ".gz")
+        os.remove(segment)
+
+    def enforce_retention(self):
+        """Remove the oldest rotated segments beyond `backups` (0 keeps all)."""
+        if not self.backups:
+            return
+        for old in self.segments()[:-self.backups]:
+            try:
+                os.remove(old)
+            except FileNotFoundError:  # Already removed
+                continue
+
+    def segments(self):
+        """Return rotated segment paths, oldest first."""
+        return rotated_segments(self.path)
+
+    def metrics(self):
+        """Return writer counters for monitoring."""
+        return {
+            "backpressure": self.backpressure,
+            "queue_depth": len(self.queue),
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "batches": self.batches,
+            "bytes_written": self.bytes_written,
+            "rotations": self.rotations,
+            "format_errors": self.format_errors,
+            "write_errors": self.write_errors,
+            "failed": self.failed,
+            "last_error": self.last_error,
+        }
+
+
+def segment_key(path):
+    """Return a function mapping a rotated segment of `path` to its (timestamp, suffix) sort key."""
+    def key(segment):
+        match = SEGMENT_NAME.fullmatch(segment[len(path):])
+        return match.group(1), int(match.group(2) or 0)
+    return key
+
+
+def rotated_segments(path):
+    """Return the rotated segments of a log file, oldest first (ordered by name, not mtime)."""
+    segments = [segment for segment in glob.glob(glob.escape(path) + ".*")
+                if SEGMENT_NAME.fullmatch(segment[len(path):])]
+    return sorted(segments, key=segment_key(path))
+
+
+def stream_segments(paths, chunk_size=64 * 1024):
+    """Yield the contents of log segments in order, decompressing gzip segments on the fly."""
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rb") as file:
+                while True:
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+        except FileNotFoundError:  # Segment was removed by retention while streaming
+            continue
@@ -0,0 +1,34 @@
+import threading  # Import threading for publishing samples atomically
+from collections import deque  # Import deque for the bounded sample series
+from itertools import islice  # Import islice for taking the newest samples
+
+SERIES = ("throughput", "latency", "cpu_usage", "memory_usage")  # Series kept per sample
+
+
+class SampleHistory:
+    """Last `size` once-per-second metric samples, readable by sequence-number cursor."""
+
+    def __init__(self, size=60):
+        self.series = {name: deque(maxlen=size) for name in SERIES}  # One bounded deque per series
+        self.seq = 0  # Sequence number of the newest sample
+        self.alert = False  # High-traffic flag of the newest sample
+        self.publisher = True  # This process produces the samples
+        self.lock = threading.Lock()  # Keeps the series and seq consistent for readers
+
+    def publish(self, throughput, latency, cpu_usage, memory_usage, alert):
+        """Append one sample to every series and announce it to cursor readers."""
+        with self.lock:  # Publish the whole sample at once
+            self.series["throughput"].append(throughput)
+            self.series["latency"].append(latency)
+            self.series["cpu_usage"].append(cpu_usage)
+            self.series["memory_usage"].append(memory_usage)
+            self.alert = alert
+            self.seq += 1
+
+    def since(self, since_sample=None):
+        """Return ({series: newest samples}, seq) for samples newer than `since_sample`."""
+        with self.lock:  # Copy a consistent set of samples
+            size = len(self.series["latency"])
+            count = size if since_sample is None else max(0, min(size, self.seq - since_sample))
+            samples = {name: list(islice(series, size - count, None)) for name, series in self.series.items()}
+            return samples, self.seq
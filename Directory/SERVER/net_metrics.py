@@ -0,0 +1,123 @@
+import math  # Import math for EWMA decay factors
+import threading  # Import threading for guarding rollups against concurrent readers
+import time  # Import time for sample timestamps
+from array import array  # Import array for preallocated rollup storage
+
+import psutil  # Import system and process utilities
+
+FIELDS = (  # psutil per-NIC counters tracked as per-interval deltas
+    "bytes_sent", "bytes_recv", "packets_sent", "packets_recv",
+    "errin", "errout", "dropin", "dropout",
+)
+TIERS = (  # (name, bucket seconds, buckets kept)
+    ("1s", 1, 300),  # 5 minutes at full resolution
+    ("10s", 10, 360),  # 1 hour
+    ("1m", 60, 1440),  # 1 day
+    ("1h", 3600, 168),  # 1 week
+)
+EWMA_TAU = 10.0  # Time constant of the smoothed rates in seconds
+TOTAL = "all"  # Pseudo-NIC holding the sum over every interface
+
+
+class RollupTier:
+    """Fixed-size ring of time buckets holding summed counter deltas."""
+
+    def __init__(self, resolution, buckets):
+        self.resolution = resolution  # Bucket width in seconds
+        self.buckets = buckets  # Number of buckets kept
+        self.starts = array("q", [-1] * buckets)  # Bucket number held by each slot
+        self.sums = {field: array("d", bytes(8 * buckets)) for field in FIELDS}  # Summed deltas per slot
+
+    def add(self, timestamp, deltas):
+        """Add one interval's deltas to the bucket containing `timestamp`."""
+        bucket = int(timestamp) // self.resolution
+        slot = bucket % self.buckets
+        if self.starts[slot] != bucket:  # Slot holds an expired bucket: recycle it
+            self.starts[slot] = bucket
+            for sums in self.sums.values():
+                sums[slot] = 0.0
+        for field, delta in deltas.items():
+            self.sums[field][slot] += delta
+
+    def series(self, now=None):
+        """Return retained buckets oldest first as dicts of per-second rates."""
+        now = time.time() if now is None else now
+        newest = int(now) // self.resolution
+        points = []
+        for bucket in range(newest - self.buckets + 1, newest + 1):
+            slot = bucket % self.buckets
+            if self.starts[slot] != bucket:
+                continue  # No samples landed in this bucket
+            point = {"timestamp": bucket * self.resolution}
+            for field in FIELDS:
+                point[field] = self.sums[field][slot] / self.resolution
+            points.append(point)
+        return points
+
+
+class NetworkMetrics:
+    """Per-NIC counter deltas, EWMA rates and multi-resolution rollups of psutil counters."""
+
+    def __init__(self, tiers=TIERS, tau=EWMA_TAU):
+        self.tiers = tiers  # Rollup tier definitions
+        self.tau = tau  # EWMA time constant
+        self.previous = None  # Counters from the previous sample, per NIC
+        self.previous_time = None  # Monotonic time of the previous sample
+        self.rates = {}  # NIC -> latest per-second rate per field
+        self.ewma = {}  # NIC -> smoothed per-second rate per field
+        self.rollups = {}  # NIC -> {tier name: RollupTier}
+        self.lock = threading.Lock()  # Guards rates/ewma/rollups for API readers
+
+    def sample(self):
+        """Read the counters once, update every derived series and return the total rates."""
+        counters = psutil.net_io_counters(pernic=True)  # Wrap-around is corrected by psutil
+        now = time.monotonic()
+        wall = time.time()
+        current = {nic: {field: getattr(stats, field) for field in FIELDS} for nic, stats in counters.items()}
+        if self.previous is None:  # First sample only establishes the baseline
+            self.previous, self.previous_time = current, now
+            return {field: 0.0 for field in FIELDS}
+        elapsed = max(now - self.previous_time, 1e-6)
+        decay = 1.0 - math.exp(-elapsed / self.tau)  # EWMA weight of the new observation
+
+        deltas = {}
+        for nic, values in current.items():
+            before = self.previous.get(nic, values)  # New interfaces start from zero delta
+            deltas[nic] = {field: max(values[field] - before[field], 0) for field in FIELDS}  # Resets clamp to 0
+        deltas[TOTAL] = {field: sum(nic_deltas[field] for nic_deltas in deltas.values()) for field in FIELDS}
+
+        with self.lock:
+            for nic, nic_deltas in deltas.items():
+                rates = {field: delta / elapsed for field, delta in nic_deltas.items()}
+                self.rates[nic] = rates
+                smoothed = self.ewma.setdefault(nic, dict(rates))  # Seed the EWMA with the first rate
+                for field, rate in rates.items():
+                    smoothed[field] += decay * (rate - smoothed[field])
+                tiers = self.rollups.get(nic)
+                if tiers is None:
+                    tiers = self.rollups[nic] = {name: RollupTier(width, count) for name, width, count in self.tiers}
+                for tier in tiers.values():
+                    tier.add(wall, nic_deltas)
+        self.previous, self.previous_time = current, now
+        return self.rates[TOTAL]
+
+    def total_ewma(self, field):
+        """Return the smoothed all-interface rate for one field."""
+        with self.lock:
+            return self.ewma.get(TOTAL, {}).get(field, 0.0)
+
+    def snapshot(self):
+        """Return the latest and smoothed rates for every NIC."""
+        with self.lock:
+            return {
+                nic: {"rate": dict(self.rates[nic]), "ewma": dict(self.ewma[nic])}
+                for nic in self.rates
+            }
+
+    def rollup(self, tier, nic=TOTAL):
+        """Return the rollup series of one tier for one NIC (empty if unknown)."""
+        with self.lock:
+            tiers = self.rollups.get(nic)
+            if tiers is None or tier not in tiers:
+                return []
+            return tiers[tier].series()
@@ -0,0 +1,80 @@
+import itertools  # Import itertools for an atomic sequence counter
+import time  # Import time for formatting timestamps at read time
+from array import array  # Import array for compact numeric slot storage
+
+
+class RequestRing:
+    """Preallocated ring buffer of HTTP request records stored in parallel arrays.
+
+    Every record gets a monotonically increasing sequence number. Writers never take a
+    lock: the sequence counter is atomic under the GIL and each slot is published by
+    writing its sequence number last. Readers validate each slot before and after
+    copying it, so a snapshot never blocks writers and never returns a torn record.
+    """
+
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity  # Number of records kept
+        self.counter = itertools.count(1)  # Next sequence number (next() is atomic in CPython)
+        self.head = 0  # Highest sequence number published so far
+        self.seqs = array("q", [0] * capacity)  # Sequence held by each slot (0 = empty, -1 = being written)
+        self.timestamps = array("d", [0.0] * capacity)  # Epoch seconds of each request
+        self.statuses = array("H", [0] * capacity)  # HTTP status codes
+        self.ips = [None] * capacity  # Client IP addresses
+        self.methods = [None] * capacity  # HTTP methods
+        self.paths = [None] * capacity  # Request paths
+
+    def append(self, ip, method, path, status, timestamp):
+        """Store one request record and return its sequence number."""
+        seq = next(self.counter)
+        slot = seq % self.capacity
+        self.seqs[slot] = -1  # Mark the slot as being written so readers skip it
+        self.timestamps[slot] = timestamp
+        self.statuses[slot] = status
+        self.ips[slot] = ip
+        self.methods[slot] = method
+        self.paths[slot] = path
+        self.seqs[slot] = seq  # Publish the record
+        if seq > self.head:
+            self.head = seq
+        return seq
+
+    def snapshot(self, since=0, limit=None):
+        """Return (records, cursor) for records with sequence numbers greater than `since`.
+
+        `cursor` is the sequence number of the last record returned (or `since` if there
+        are none) and can be passed back as `since` to read only newer records. At most
+        `limit` of the newest records are returned when a limit is given.
+        """
+        head = self.head
+        start = max(since + 1, head - self.capacity + 1, 1)  # Oldest sequence still in the ring
+        if limit is not None:
+            start = max(start, head - limit + 1)
+        records = []
+        cursor = since
+        for seq in range(start, head + 1):
+            slot = seq % self.capacity
+            published = self.seqs[slot]
+            if published > seq:
+                continue  # Already overwritten by a newer record
+            if published != seq:
+                break  # Still being written: stop at the gap so the cursor never skips it
+            record = {
+                "seq": seq,
+                "ip": self.ips[slot],
+                "method": self.methods[slot],
+                "path": self.paths[slot],
+                "response_status": self.statuses[slot],
+                "timestamp": self.timestamps[slot],
+            }
+            if self.seqs[slot] != seq:  # Slot was rewritten while copying: drop the torn record
+                continue
+            records.append(record)
+            cursor = seq
+        for record in records:  # Format timestamps outside the validation loop
+            record["timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["timestamp"]))
+        return records, cursor
+
+    def __len__(self):
+        return min(self.head, self.capacity)
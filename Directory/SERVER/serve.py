@@ -0,0 +1,87 @@
+"""Production entry point: N worker processes sharing one listening socket and one metrics segment.
+
+    python serve.py                      # one worker per CPU on 0.0.0.0:5000
+    SERVE_WORKERS=4 SERVE_PORT=8080 python serve.py
+
+The master binds the socket, creates the shared-memory metrics segment and forks the
+workers, restarting any that exit. Each worker runs the threaded Werkzeug server without
+the debugger or reloader, so any worker can answer /api/traffic with the merged view of
+every worker's requests, counters and latency histograms.
+
+Per-IP state (token buckets, bans, the blocklist, flood detection) and the signature alert
+buffer stay per worker. Latency percentiles are broken down by status class only (routes
+appear as "*", and "latency_percentiles" carries "breakdown": "status_class"). Workers
+need the fork start method, so use app.py on Windows.
+"""
+import multiprocessing  # Import multiprocessing for worker processes and the ring lock
+import os  # Import os for environment-based configuration
+import signal  # Import signal for clean shutdown of the workers
+import socket  # Import socket for the shared listening socket
+import sys  # Import sys for exiting on SIGTERM
+import threading  # Import threading for the orphan watchdog
+import time  # Import time for the supervision loop
+
+from werkzeug.serving import make_server  # Import the WSGI server each worker runs
+
+import app  # Import the Flask app; module state is inherited by the forked workers
+from shared_metrics import SharedMetrics  # Import the shared-memory metrics segment
+
+SERVE_HOST = os.environ.get("SERVE_HOST", "0.0.0.0")  # Listening address
+SERVE_PORT = int(os.environ.get("SERVE_PORT", 5000))  # Listening port
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", os.cpu_count() or 1))  # Worker processes
+SERVE_BACKLOG = int(os.environ.get("SERVE_BACKLOG", 1024))  # Pending connections queued by the kernel
+RESTART_DELAY = 1.0  # Seconds between restarts of a crashing worker
+
+
+def watch_master(master):
+    """Exit the worker once the master is gone, so a killed master leaves no orphans."""
+    while os.getppid() == master:
+        time.sleep(RESTART_DELAY)
+    os._exit(0)
+
+
+def run_worker(worker, listener, shared, master):
+    """Serve requests in one worker process until it is terminated."""
+    signal.signal(signal.SIGTERM, lambda *_: os._exit(0))  # atexit handlers are not needed in workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the master
+    threading.Thread(target=watch_master, args=(master,), daemon=True).start()
+    app.use_shared_metrics(shared, worker)  # Point counters, histograms and the ring at shared memory
+    app.start_background_threads()
+    server = make_server(SERVE_HOST, SERVE_PORT, app.app, threaded=True, fd=listener.fileno())
+    server.serve_forever()
+
+
+def main():
+    """Bind the socket, fork the workers and keep them running."""
+    context = multiprocessing.get_context("fork")  # Workers inherit the socket, mapping and lock
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # Run the cleanup below on SIGTERM too
+    listener = socket.create_server((SERVE_HOST, SERVE_PORT), backlog=SERVE_BACKLOG)
+    shared = SharedMetrics(SERVE_WORKERS, app.TRAFFIC_LOG_CAPACITY, context.Lock())
+
+    def spawn(worker):
+        process = context.Process(target=run_worker, args=(worker, listener, shared, os.getpid()), name=f"worker-{worker}")
+        process.start()
+        return process
+
+    workers = [spawn(worker) for worker in range(SERVE_WORKERS)]
+    print(f"Serving on http://{SERVE_HOST}:{SERVE_PORT} with {SERVE_WORKERS} workers", flush=True)
+    try:
+        while True:
+            time.sleep(RESTART_DELAY)
+            for worker, process in enumerate(workers):
+                if not process.is_alive():  # Replace a crashed worker; its region is reused as is
+                    print(f"worker-{worker} exited with {process.exitcode}, restarting", flush=True)
+                    workers[worker] = spawn(worker)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            process.join()
+        listener.close()
+        shared.close(unlink=True)
+
+
+if __name__ == "__main__":
+    main()
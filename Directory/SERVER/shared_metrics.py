@@ -0,0 +1,392 @@
+import operator  # Import operator for C-speed element-wise bucket sums
+import threading  # Import threading for per-worker slot rotation
+import time  # Import time for sample timestamps and window bookkeeping
+from multiprocessing import shared_memory  # Import shared memory for cross-process metrics
+
+from histogram import (  # Import the bucket layout shared with the in-process histograms
+    BUCKET_COUNT, MAX_VALUE, SUB_BUCKET_BITS, SUB_BUCKET_COUNT, SUB_BUCKET_HALF, WINDOWS, ZERO_SLOT,
+    LogLinearHistogram,
+)
+from ring_buffer import RequestRing  # Import the ring whose snapshot logic is reused
+
+IP_BYTES = 48  # Longest stored client address (IPv6 text fits in 45)
+METHOD_BYTES = 16  # Longest stored HTTP method
+PATH_BYTES = 256  # Longer request paths are truncated in the shared ring
+STATUS_CLASSES = 6  # Latency is kept per status class 0xx-5xx
+HORIZON = max(WINDOWS)  # Seconds of latency history per worker
+SAMPLE_FIELDS = (  # Metric sample columns, in storage order
+    "timestamp", "bytes_sent", "bytes_recv", "packets_sent", "packets_recv", "errors", "drops",
+    "latency", "cpu_usage", "memory_usage",
+)
+COUNTER_GROUPS = {  # Per-worker counters, by the component that owns them
+    "enforcement": ("allowed", "rate_limited", "blocklisted", "banned", "bans_issued"),
+    "signatures": ("requests", "matched", "blocked"),
+}
+HISTOGRAMS = ("enforcement_overhead", "signature_cost")  # Per-worker cost histograms
+RING_HEAD, SAMPLE_SEQ, SAMPLE_ALERT = range(3)  # Slots of the global header
+
+
+class Layout:
+    """Byte offsets of every array in the segment, computed identically in each process."""
+
+    def __init__(self, workers, ring_capacity, samples):
+        self.offset = 0
+        self.header = self.take(8 * 8)
+        self.ring_seqs = self.take(8 * ring_capacity)
+        self.ring_timestamps = self.take(8 * ring_capacity)
+        self.ring_statuses = self.take(8 * ring_capacity)  # 'H' values, padded to 8-byte alignment
+        self.ring_ips = self.take(IP_BYTES * ring_capacity)
+        self.ring_methods = self.take(METHOD_BYTES * ring_capacity)
+        self.ring_paths = self.take(PATH_BYTES * ring_capacity)
+        self.samples = self.take(8 * len(SAMPLE_FIELDS) * samples)
+        counters = sum(len(names) for names in COUNTER_GROUPS.values())
+        self.workers = []
+        for _ in range(workers):
+            region = {
+                "counters": self.take(8 * counters),
+                "histograms": {name: self.take(8 * (BUCKET_COUNT + 2)) for name in HISTOGRAMS},  # counts, total, max
+                "latency_epochs": self.take(8 * STATUS_CLASSES * HORIZON),
+                "latency_maxima": self.take(8 * STATUS_CLASSES * HORIZON),
+                "latency_counts": self.take(4 * STATUS_CLASSES * HORIZON * BUCKET_COUNT),
+            }
+            self.workers.append(region)
+        self.size = self.offset
+
+    def take(self, size):
+        """Reserve `size` bytes (rounded up to 8) and return their offset."""
+        offset = self.offset
+        self.offset += (size + 7) & ~7
+        return offset
+
+
+class FixedWidthStrings:
+    """List-like view storing strings as NUL-padded UTF-8 in fixed-width slots."""
+
+    __slots__ = ("view", "width")
+
+    def __init__(self, view, width):
+        self.view = view  # memoryview over capacity * width bytes
+        self.width = width  # Bytes per slot
+
+    def __getitem__(self, slot):
+        start = slot * self.width
+        return bytes(self.view[start:start + self.width]).rstrip(b"\0").decode("utf-8", "replace")
+
+    def __setitem__(self, slot, value):
+        encoded = (value or "").encode("utf-8")[:self.width]
+        start = slot * self.width
+        self.view[start:start + self.width] = encoded.ljust(self.width, b"\0")
+
+
+class SharedRequestRing(RequestRing):
+    """RequestRing stored in shared memory; sequence numbers are global across workers.
+
+    Appends from every worker take one short cross-process lock, so sequence numbers are
+    allocated and published in order and the inherited lock-free snapshot stays valid.
+    """
+
+    def __init__(self, buffer, layout, capacity, lock):
+        self.capacity = capacity  # Number of records kept
+        self.lock = lock  # multiprocessing.Lock shared by every worker
+        self.header = buffer[layout.header:layout.header + 64].cast("q")
+        self.seqs = buffer[layout.ring_seqs:layout.ring_seqs + 8 * capacity].cast("q")
+        self.timestamps = buffer[layout.ring_timestamps:layout.ring_timestamps + 8 * capacity].cast("d")
+        self.statuses = buffer[layout.ring_statuses:layout.ring_statuses + 2 * capacity].cast("H")
+        self.ips = FixedWidthStrings(buffer[layout.ring_ips:layout.ring_ips + IP_BYTES * capacity], IP_BYTES)
+        self.methods = FixedWidthStrings(
+            buffer[layout.ring_methods:layout.ring_methods + METHOD_BYTES * capacity], METHOD_BYTES)
+        self.paths = FixedWidthStrings(buffer[layout.ring_paths:layout.ring_paths + PATH_BYTES * capacity], PATH_BYTES)
+
+    @property
+    def head(self):
+        """Highest sequence number published by any worker."""
+        return self.header[RING_HEAD]
+
+    def append(self, ip, method, path, status, timestamp):
+        """Store one request record and return its global sequence number."""
+        with self.lock:
+            seq = self.header[RING_HEAD] + 1
+            slot = seq % self.capacity
+            self.seqs[slot] = -1  # Mark the slot as being written so readers skip it
+            self.timestamps[slot] = timestamp
+            self.statuses[slot] = status
+            self.ips[slot] = ip
+            self.methods[slot] = method
+            self.paths[slot] = path
+            self.seqs[slot] = seq  # Publish the record
+            self.header[RING_HEAD] = seq
+        return seq
+
+
+class SharedCounters:
+    """Dict-like counters of one worker; `totals()` sums the same counters over every worker."""
+
+    def __init__(self, views, worker, names):
+        self.views = views  # One int64 view per worker
+        self.own = views[worker]  # This worker's counters (only this process writes them)
+        self.index = {name: position for position, name in enumerate(names)}
+
+    def __getitem__(self, name):
+        return self.own[self.index[name]]
+
+    def __setitem__(self, name, value):
+        self.own[self.index[name]] = value
+
+    def keys(self):
+        return self.index.keys()
+
+    def totals(self):
+        """Return every counter summed over all workers."""
+        return {name: sum(view[position] for view in self.views) for name, position in self.index.items()}
+
+
+class SharedHistogram:
+    """LogLinearHistogram-compatible recorder whose reads merge every worker's buckets."""
+
+    def __init__(self, views, worker):
+        self.views = views  # One int64 view per worker: BUCKET_COUNT counts, total, max
+        self.own = views[worker]
+
+    def record(self, value):
+        """Record a single value into this worker's buckets."""
+        own = self.own
+        if value < SUB_BUCKET_COUNT:  # Same mapping as bucket_index(), inlined for speed
+            index = value if value > 0 else 0
+        else:
+            if value > MAX_VALUE:
+                value = MAX_VALUE
+            shift = value.bit_length() - SUB_BUCKET_BITS
+            index = shift * SUB_BUCKET_HALF + (value >> shift)
+        own[index] += 1
+        own[BUCKET_COUNT] += 1
+        if value > own[BUCKET_COUNT + 1]:
+            own[BUCKET_COUNT + 1] = value
+
+    def merged(self):
+        """Return a LogLinearHistogram holding the sum over every worker."""
+        counts = [0] * BUCKET_COUNT
+        for view in self.views:
+            counts = list(map(operator.add, counts, view[:BUCKET_COUNT]))
+        merged = LogLinearHistogram()
+        merged.merge(counts, sum(view[BUCKET_COUNT] for view in self.views),
+                     max(view[BUCKET_COUNT + 1] for view in self.views))
+        return merged
+
+    def summary(self, scale=1e-6):
+        """Return the merged count, percentiles and max, scaled (default: ns to ms)."""
+        return self.merged().summary(scale)
+
+
+class SharedLatencyRecorder:
+    """LatencyRecorder-compatible rolling histograms per status class in shared memory.
+
+    Each worker records into its own one-second slots; `window()` and `summary()` merge
+    the matching slots of every worker. Routes are not tracked across workers (a rolling
+    window per route would multiply the segment size by the number of routes), so the
+    per-key breakdown is reported per status class under the route "*", and `summary()`
+    says so with "breakdown": "status_class".
+    """
+
+    def __init__(self, regions, worker, horizon=HORIZON):
+        self.regions = regions  # Per worker: (epochs, maxima, counts) views
+        self.horizon = horizon  # One-second slots per status class
+        self.epochs, self.maxima, self.counts = regions[worker]  # This worker's slots
+        self.current = {}  # Status class -> (epoch, slot offset) receiving samples
+        self.lock = threading.Lock()  # Serializes slot rotation inside this worker
+        self.cached_summary = None  # (second, windows, result) of the last summary() call
+
+    def record(self, route, status_code, start_ns, end_ns):
+        """Record one request latency given perf_counter_ns() start and end stamps."""
+        value = end_ns - start_ns
+        now_s = end_ns // 1_000_000_000  # perf_counter is system-wide, so workers share the clock
+        status_class = min(status_code // 100, STATUS_CLASSES - 1)
+        current = self.current.get(status_class)
+        if current is None or current[0] != now_s:
+            with self.lock:
+                position = status_class * self.horizon + now_s % self.horizon
+                if self.epochs[position] != now_s:  # Slot holds an older second: clear it
+                    if self.epochs[position] > now_s:  # Straggler from an older second: drop it
+                        return
+                    start = position * BUCKET_COUNT
+                    self.counts[start:start + BUCKET_COUNT] = ZERO_SLOT
+                    self.maxima[position] = 0
+                    self.epochs[position] = now_s
+                current = self.current[status_class] = (now_s, position)
+        position = current[1]
+        if value < SUB_BUCKET_COUNT:
+            index = value if value > 0 else 0
+        else:
+            if value > MAX_VALUE:
+                value = MAX_VALUE
+            shift = value.bit_length() - SUB_BUCKET_BITS
+            index = shift * SUB_BUCKET_HALF + (value >> shift)
+        self.counts[position * BUCKET_COUNT + index] += 1
+        if value > self.maxima[position]:
+            self.maxima[position] = value
+
+    def window(self, seconds, now_s=None):
+        """Return (overall, per (route, status class)) histograms merged over every worker."""
+        now_s = time.perf_counter_ns() // 1_000_000_000 if now_s is None else now_s
+        oldest = now_s - seconds
+        overall = LogLinearHistogram()
+        per_key = {}
+        for status_class in range(STATUS_CLASSES):
+            counts = None
+            maximum = 0
+            for epochs, maxima, slots in self.regions:
+                for position in range(status_class * self.horizon, (status_class + 1) * self.horizon):
+                    if oldest < epochs[position] <= now_s:
+                        start = position * BUCKET_COUNT
+                        slot = slots[start:start + BUCKET_COUNT]
+                        counts = slot.tolist() if counts is None else list(map(operator.add, counts, slot))
+                        maximum = max(maximum, maxima[position])
+            if counts is None:
+                continue
+            merged = LogLinearHistogram()
+            merged.merge(counts, sum(counts), maximum)
+            if merged.total:
+                per_key[("*", status_class)] = merged
+                overall.merge(merged.counts, merged.total, merged.max_value)
+        return overall, per_key
+
+    def summary(self, windows=WINDOWS):
+        """Return percentile summaries (ms) for every window, overall and per status class.
+
+        Like LatencyRecorder.summary(), the merge over every worker's slots is computed at
+        most once per second and shared by every poll and broadcaster tick within it.
+        """
+        now_s = time.perf_counter_ns() // 1_000_000_000
+        cached = self.cached_summary
+        if cached is not None and cached[0] == now_s and cached[1] == windows:  # Already merged this second
+            return cached[2]
+        result = {"breakdown": "status_class"}  # "routes" entries are "* <status>xx", not per route
+        for seconds in windows:
+            overall, per_key = self.window(seconds, now_s)
+            result[f"{seconds}s"] = {
+                "all": overall.summary(),
+                "routes": {f"{route} {status}xx": merged.summary() for (route, status), merged in per_key.items()},
+            }
+        self.cached_summary = (now_s, windows, result)
+        return result
+
+
+class SharedSampleHistory:
+    """SampleHistory-compatible metric samples in shared memory, published by one worker."""
+
+    def __init__(self, buffer, layout, size, publisher):
+        self.size = size  # Samples retained
+        self.publisher = publisher  # Only the publishing worker writes samples
+        self.header = buffer[layout.header:layout.header + 64].cast("q")
+        self.rows = buffer[layout.samples:layout.samples + 8 * len(SAMPLE_FIELDS) * size].cast("d")
+
+    @property
+    def seq(self):
+        """Sequence number of the newest published sample."""
+        return self.header[SAMPLE_SEQ]
+
+    @property
+    def alert(self):
+        """High-traffic flag of the newest sample."""
+        return bool(self.header[SAMPLE_ALERT])
+
+    def publish(self, throughput, latency, cpu_usage, memory_usage, alert):
+        """Append one sample; a no-op in workers that are not the publisher."""
+        if not self.publisher:
+            return
+        seq = self.header[SAMPLE_SEQ] + 1
+        row = (seq % self.size) * len(SAMPLE_FIELDS)
+        values = (
+            time.time(), throughput["bytes_sent"], throughput["bytes_recv"], throughput["packets_sent"],
+            throughput["packets_recv"], throughput["errors"], throughput["drops"], latency, cpu_usage, memory_usage,
+        )
+        for column, value in enumerate(values):
+            self.rows[row + column] = float(value)
+        self.header[SAMPLE_ALERT] = int(alert)
+        self.header[SAMPLE_SEQ] = seq  # Publish after the row is complete
+
+    def since(self, since_sample=None):
+        """Return ({series: newest samples}, seq) for samples newer than `since_sample`."""
+        seq = self.header[SAMPLE_SEQ]
+        available = min(seq, self.size - 1)  # Keep one row spare: it may be mid-write
+        count = available if since_sample is None else max(0, min(available, seq - since_sample))
+        samples = {"throughput": [], "latency": [], "cpu_usage": [], "memory_usage": []}
+        for sample in range(seq - count + 1, seq + 1):
+            row = (sample % self.size) * len(SAMPLE_FIELDS)
+            values = dict(zip(SAMPLE_FIELDS, self.rows[row:row + len(SAMPLE_FIELDS)]))
+            samples["throughput"].append({
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(values["timestamp"])),
+                **{field: values[field] for field in SAMPLE_FIELDS[1:7]},
+            })
+            samples["latency"].append(values["latency"])
+            samples["cpu_usage"].append(values["cpu_usage"])
+            samples["memory_usage"].append(values["memory_usage"])
+        return samples, seq
+
+
+class SharedMetrics:
+    """One shared-memory segment holding the request ring, samples and per-worker regions.
+
+    The master process creates the segment before forking the workers, which inherit the
+    mapping and the ring lock. Each worker writes only its own region; any worker can read
+    every region to produce the merged view.
+    """
+
+    def __init__(self, workers, ring_capacity, lock, samples=60):
+        self.workers = workers  # Number of worker regions
+        self.ring_capacity = ring_capacity  # Records in the shared request ring
+        self.sample_size = samples  # Metric samples retained
+        self.lock = lock  # multiprocessing.Lock guarding ring appends
+        self.layout = Layout(workers, ring_capacity, samples)
+        self.memory = shared_memory.SharedMemory(create=True, size=self.layout.size)
+        self.memory.buf[:self.layout.size] = bytes(self.layout.size)
+        slots = STATUS_CLASSES * HORIZON
+        for region in self.layout.workers:  # Epoch -1 marks latency slots that never held a second
+            self.memory.buf[region["latency_epochs"]:region["latency_epochs"] + 8 * slots] = b"\xff" * (8 * slots)
+
+    def region_views(self, name, code, length):
+        """Return one typed view per worker of a per-worker array."""
+        buffer = self.memory.buf
+        return [buffer[region[name]:region[name] + length * (8 if code in "qd" else 4)].cast(code)
+                for region in self.layout.workers]
+
+    def ring(self):
+        """Return the shared request ring."""
+        return SharedRequestRing(self.memory.buf, self.layout, self.ring_capacity, self.lock)
+
+    def samples(self, publisher):
+        """Return the shared metric sample history."""
+        return SharedSampleHistory(self.memory.buf, self.layout, self.sample_size, publisher)
+
+    def counters(self, worker, group):
+        """Return one worker's counters of a COUNTER_GROUPS group."""
+        names = COUNTER_GROUPS[group]
+        groups = list(COUNTER_GROUPS)
+        offset = 8 * sum(len(COUNTER_GROUPS[key]) for key in groups[:groups.index(group)])  # Groups stored in order
+        buffer = self.memory.buf
+        views = [buffer[region["counters"] + offset:region["counters"] + offset + 8 * len(names)].cast("q")
+                 for region in self.layout.workers]
+        return SharedCounters(views, worker, names)
+
+    def histogram(self, worker, name):
+        """Return one worker's recorder for a HISTOGRAMS histogram."""
+        buffer = self.memory.buf
+        size = 8 * (BUCKET_COUNT + 2)
+        views = [buffer[region["histograms"][name]:region["histograms"][name] + size].cast("q")
+                 for region in self.layout.workers]
+        return SharedHistogram(views, worker)
+
+    def latency(self, worker):
+        """Return one worker's latency recorder."""
+        slots = STATUS_CLASSES * HORIZON
+        regions = list(zip(
+            self.region_views("latency_epochs", "q", slots),
+            self.region_views("latency_maxima", "q", slots),
+            self.region_views("latency_counts", "I", slots * BUCKET_COUNT),
+        ))
+        return SharedLatencyRecorder(regions, worker)
+
+    def close(self, unlink=False):
+        """Release the mapping; the creating process also unlinks the segment."""
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
@@ -0,0 +1,222 @@
+import re  # Import re for regex signatures
+import time  # Import time for measuring per-request matching cost
+from collections import deque  # Import deque for the recent-alert buffer
+from urllib.parse import unquote_plus  # Import unquote_plus for decoding query strings
+
+from histogram import LogLinearHistogram  # Import histogram for matching cost
+
+try:  # Prefer the C implementation of Aho-Corasick when it is installed
+    import ahocorasick  # pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:  # Regex parser used to pull required literals out of regex signatures
+    from re import _parser as regex_parser  # Python 3.11+
+except ImportError:
+    import sre_parse as regex_parser  # Older Pythons
+
+REGEX_FLAGS = re.IGNORECASE | re.MULTILINE  # Each inspected field is its own line, so ^/$ anchor per field
+MIN_ATOM_LENGTH = 3  # Shorter required literals are too common to be a useful prefilter
+PREFILTER_GROUP = 64  # Regexes without a required literal combined into one alternation
+ACTIONS = ("alert", "block")  # "block" rejects the request, "alert" only records it
+KINDS = ("literal", "regex")  # Signature types accepted in rule files
+
+
+class Signature:
+    """One rule loaded from the rule file."""
+
+    __slots__ = ("rule_id", "action", "kind", "pattern", "regex", "hits")
+
+    def __init__(self, rule_id, action, kind, pattern):
+        self.rule_id = rule_id  # Identifier reported in alerts
+        self.action = action  # "alert" or "block"
+        self.kind = kind  # "literal" or "regex"
+        self.pattern = pattern  # Literal text or regex source
+        self.regex = re.compile(pattern, REGEX_FLAGS) if kind == "regex" else None
+        self.hits = 0  # Requests matched so far
+
+
+class AhoCorasick:
+    """Pure-Python Aho-Corasick automaton mapping literals to payload values."""
+
+    def __init__(self):
+        self.goto = [{}]  # State -> {character: next state}
+        self.fail = [0]  # State -> failure link
+        self.output = [()]  # State -> payloads of literals ending here
+
+    def add(self, literal, payload):
+        """Add a literal; call build() after the last add()."""
+        state = 0
+        for char in literal:
+            following = self.goto[state].get(char)
+            if following is None:
+                following = len(self.goto)
+                self.goto[state][char] = following
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            state = following
+        self.output[state] = self.output[state] + (payload,)
+
+    def build(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self.goto[state].items():
+                queue.append(following)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[following] = target if target != following else 0
+                if self.output[self.fail[following]]:
+                    self.output[following] = self.output[following] + self.output[self.fail[following]]
+
+    def iter(self, text):
+        """Yield (end index, payload) for every literal occurrence in `text`."""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for payload in output[state]:
+                    yield index, payload
+
+
+def required_atom(pattern):
+    """Return the longest literal every match of `pattern` must contain, or '' if none is known."""
+    try:
+        parsed = regex_parser.parse(pattern)
+    except re.error:
+        return ""
+    best, run = "", []
+    for op, value in list(parsed) + [(None, None)]:  # Sentinel flushes the last run
+        if op == regex_parser.LITERAL:
+            run.append(chr(value).lower())
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    return best if len(best) >= MIN_ATOM_LENGTH else ""
+
+
+class SignatureEngine:
+    """Multi-pattern matcher over path, query, headers and body.
+
+    Literal signatures and the required literals ("atoms") of regex signatures share one
+    Aho-Corasick automaton, so each request is scanned once. A regex only runs when its
+    atom was seen. Regexes without a usable atom are combined, PREFILTER_GROUP at a time,
+    into alternations that act as their prefilter; only the members of a group whose
+    alternation matches are tried one by one.
+    """
+
+    def __init__(self, signatures, max_body=64 * 1024, recent=200):
+        self.signatures = signatures  # Loaded Signature objects
+        self.max_body = max_body  # Body bytes inspected per request
+        self.alerts = deque(maxlen=recent)  # Most recent matches
+        self.cost = LogLinearHistogram()  # Nanoseconds spent matching each request
+        self.counters = {"requests": 0, "matched": 0, "blocked": 0}  # Inspected, matched and blocked requests
+
+        self.automaton = ahocorasick.Automaton() if ahocorasick else AhoCorasick()
+        keys = {}  # Automaton key -> list of (signature, is_atom)
+        self.unanchored = []  # Regex signatures without an atom
+        for signature in signatures:
+            if signature.kind == "literal":
+                keys.setdefault(signature.pattern.lower(), []).append((signature, False))
+                continue
+            atom = required_atom(signature.pattern)
+            if atom:
+                keys.setdefault(atom, []).append((signature, True))
+            else:
+                self.unanchored.append(signature)
+        for key, payload in keys.items():
+            if ahocorasick:
+                self.automaton.add_word(key, tuple(payload))
+            else:
+                self.automaton.add(key, tuple(payload))
+        if ahocorasick:
+            if keys:
+                self.automaton.make_automaton()
+            else:
+                self.automaton = None  # pyahocorasick cannot search an empty automaton
+        else:
+            self.automaton.build()
+        self.prefilters = []  # (combined regex, member signatures) per group of unanchored regexes
+        for first in range(0, len(self.unanchored), PREFILTER_GROUP):
+            members = self.unanchored[first:first + PREFILTER_GROUP]
+            combined = re.compile("|".join(f"(?:{signature.pattern})" for signature in members), REGEX_FLAGS)
+            self.prefilters.append((combined, members))
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Load rules of the form `<alert|block> <literal|regex> <id> <pattern>` ('#' starts a comment)."""
+        signatures = []
+        with open(path, encoding="utf-8") as file:
+            for number, line in enumerate(file, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = line.split(None, 3)
+                if len(parts) != 4 or parts[0] not in ACTIONS or parts[1] not in KINDS:
+                    raise ValueError(f"{path}:{number}: expected '<alert|block> <literal|regex> <id> <pattern>'")
+                signatures.append(Signature(parts[2], parts[0], parts[1], parts[3]))
+        return cls(signatures, **kwargs)
+
+    def match(self, haystack):
+        """Return the signatures matching an already lower-cased haystack (single automaton pass)."""
+        found = {}
+        if self.automaton is not None:
+            for _, payload in self.automaton.iter(haystack):
+                for signature, is_atom in payload:
+                    if signature.rule_id in found:
+                        continue
+                    if not is_atom or signature.regex.search(haystack):  # Atom seen: confirm the regex
+                        found[signature.rule_id] = signature
+        for combined, members in self.prefilters:
+            if combined.search(haystack):  # Some member matches: find out which
+                for signature in members:
+                    if signature.rule_id not in found and signature.regex.search(haystack):
+                        found[signature.rule_id] = signature
+        return list(found.values())
+
+    def build_haystack(self, path, query, headers, body):
+        """Join the inspected request parts into one lower-cased string for a single scan.
+
+        A query with escapes is scanned both raw and decoded, so rules can match either
+        the encoded form (e.g. %2e%2e%2f) or what it decodes to.
+        """
+        header_text = "\n".join(f"{name}: {value}" for name, value in headers)
+        decoded = unquote_plus(query)
+        query_text = decoded if decoded == query else f"{query}\n{decoded}"
+        return "\n".join((path, query_text, header_text, body[:self.max_body])).lower()
+
+    def inspect(self, ip, method, path, query, headers, body):
+        """Match one request, record cost and alerts, and return the matched signatures."""
+        start = time.perf_counter_ns()
+        matches = self.match(self.build_haystack(path, query, headers, body))
+        self.cost.record(time.perf_counter_ns() - start)
+        self.counters["requests"] += 1
+        if matches:
+            self.counters["matched"] += 1
+            now = time.strftime("%Y-%m-%d %H:%M:%S")
+            for signature in matches:
+                signature.hits += 1
+                self.alerts.append({
+                    "timestamp": now, "ip": ip, "method": method, "path": path,
+                    "rule": signature.rule_id, "action": signature.action,
+                })
+            if any(signature.action == "block" for signature in matches):
+                self.counters["blocked"] += 1
+        return matches
+
+    def metrics(self):
+        """Return rule counts, match counters and the per-request cost distribution (microseconds)."""
+        return {
+            "rules": len(self.signatures),
+            "unanchored_regexes": len(self.unanchored),
+            **self.counters,
+            "cost_us": self.cost.summary(scale=1e-3),
+        }
@@ -1,23 +1,40 @@
 import tkinter as tk
 from tkinter import messagebox
+import os
+import shutil
+import time
 import yaml
-import subprocess
 
+from runner import BenchmarkRunner, RUNNING, DONE, RUNS_DIR, snapshot_run
+from results import RunStore, compare, format_comparison
+from sweep import SWEEP_FILE, Sweep, load_sweep
 
-# Function to generate the config.yaml file
+OUTPUT_POLL_MS = 100  # How often streamed benchmark output is moved into the window
+MAX_OUTPUT_LINES = 5000  # Oldest lines are dropped from the output view beyond this
+
+runner = BenchmarkRunner()  # Runs labench on a background thread, one queued run at a time
+store = RunStore()  # Parsed results of every finished run (runs.db)
+run_counter = 0  # Numbers the runs queued in this session
+queue_rows = []  # Runs shown in the queue list, row by row
+
+
+# Function to generate the config.yaml file, keeping any other settings already in it
 def load_config():
     url = url_entry.get()
     if not url:
         messagebox.showerror("Error", "Please enter a valid URL")
         return
 
-    config_data = {
-        'RequestRatePerSec': 2,
-        'Duration': '3s',
-        'Request': {
-            'URL': url
-        }
-    }
+    try:
+        with open('config.yaml', 'r') as file:
+            config_data = yaml.safe_load(file) or {}
+    except FileNotFoundError:
+        config_data = {}
+    config_data.setdefault('RequestRatePerSec', 2)
+    config_data.setdefault('Duration', '3s')
+    request = config_data.setdefault('Request', {})
+    request['URL'] = url
+    request.pop('URLs', None)  # URL and URLs are mutually exclusive
 
     # Write to config.yaml
     with open('config.yaml', 'w') as file:
@@ -26,19 +43,160 @@ def load_config():
     messagebox.showinfo("Success", "config.yaml file generated successfully!")
 
 
-# Function to run the benchmarking executable and store the output in output.txt
+# Function to queue a benchmark run of the current config.yaml
 def run_benchmark():
     try:
-        # Run the benchmarking.exe and capture the output
-        result = subprocess.run(['benchmarking.exe'], capture_output=True, text=True, check=True)
+        with open('config.yaml', 'r') as file:
+            config = yaml.safe_load(file) or {}
+    except FileNotFoundError:
+        messagebox.showerror("Error", "config.yaml file not found! Press Load first.")
+        return
+    queue_run(config)
+
+
+# Function to snapshot a config and queue it, so later edits do not affect it
+def queue_run(config, name=None, on_finished=None, delay=0, warmup=False):
+    global run_counter
+    run_counter += 1
+    name = name or f"run-{time.strftime('%Y%m%d-%H%M%S')}-{run_counter}"
+    run = snapshot_run(config, name, on_finished, delay, warmup)
+    runner.submit(run)
+    refresh_queue()
+    return run
+
+
+# Function to cancel the selected queued run, or the running one
+def cancel_run():
+    selection = queue_list.curselection()
+    if selection and selection[0] < len(queue_rows):
+        runner.cancel(queue_rows[selection[0]])  # The run shown in that row, running or queued
+    else:
+        runner.cancel()
+    refresh_queue()
+
+
+# Function to move streamed output and run status changes into the window (Tk main thread only)
+def pump_output():
+    events = runner.poll()
+    lines = []
+    for event in events:
+        kind, run = event[0], event[1]
+        if kind == "line":
+            lines.append(event[2])
+        elif kind == "started":
+            lines.append(f"=== {run.name} started ({run.config_file}) ===\n")
+        else:
+            lines.append(f"=== {run.name} {run.status} ===\n")
+            if run.status == DONE and not run.warmup:  # Latest results where Show Results and run.bat users expect them
+                shutil.copyfile(run.output_file, 'output.txt')
+                histogram = os.path.splitext(run.output_file)[0] + '.hgrm'
+                if os.path.exists(histogram):
+                    os.makedirs('out', exist_ok=True)
+                    shutil.copyfile(histogram, os.path.join('out', 'res.hgrm'))
+                lines.append(store_run(run, histogram))
+            if run.on_finished is not None:
+                run.on_finished(run)
+    if lines:
+        output_text.config(state=tk.NORMAL)
+        output_text.insert(tk.END, "".join(lines))
+        excess = int(output_text.index('end-1c').split('.')[0]) - MAX_OUTPUT_LINES
+        if excess > 0:
+            output_text.delete('1.0', f'{excess + 1}.0')
+        output_text.see(tk.END)
+        output_text.config(state=tk.DISABLED)
+    if events:
+        refresh_queue()
+    root.after(OUTPUT_POLL_MS, pump_output)
+
+
+# Function to parse a finished run into the run store and compare it with the previous run of its target and config
+def store_run(run, histogram):
+    try:
+        run.store_id = store.ingest_files(run.output_file, histogram, run.config_file, run.name)
+    except (OSError, ValueError) as e:
+        return f"Could not store {run.name}: {e}\n"
+    previous = store.previous(run.store_id)
+    if previous is None:
+        return f"Stored as run #{run.store_id}\n"
+    regressions = [row[0] for row in compare(previous, store.run(run.store_id)) if row[4]]
+    verdict = f"REGRESSED: {', '.join(regressions)}" if regressions else "no regressions"
+    return f"Stored as run #{run.store_id}; vs run #{previous['id']} with the same target and config: {verdict}\n"
+
+
+# Function to open the run comparison window
+def show_comparison():
+    window = tk.Toplevel(root)
+    window.title("Compare Runs")
+    tk.Label(window, text="Select one run (compared with the previous run of its target and config) or two runs:").pack(pady=5)
+    runs = store.runs()
+    run_list = tk.Listbox(window, width=110, height=10, selectmode=tk.EXTENDED)
+    for stored in runs:
+        p99 = f"{stored['p99']:.2f} ms" if stored['p99'] is not None else "-"
+        run_list.insert(tk.END, f"#{stored['id']:<5} {stored['name']:<32} {stored['target'] or '-':<40} "
+                                f"{stored['throughput'] or 0:>9.2f} req/s  p99 {p99}")
+    run_list.pack(padx=10, pady=5)
+    report = tk.Text(window, wrap='none', width=110, height=16, state=tk.DISABLED)
+    report.tag_config('regression', foreground='red')
+
+    def compare_selected():
+        selection = [runs[index] for index in run_list.curselection()]
+        if len(selection) == 1:
+            baseline, candidate = store.previous(selection[0]['id']), selection[0]
+            if baseline is None:
+                messagebox.showinfo("Compare Runs", "No earlier run of this target and config to compare with.")
+                return
+        elif len(selection) == 2:
+            baseline, candidate = sorted(selection, key=lambda stored: stored['id'])
+        else:
+            messagebox.showerror("Error", "Select one or two runs.")
+            return
+        report.config(state=tk.NORMAL)
+        report.delete('1.0', tk.END)
+        for line in format_comparison(baseline, candidate, compare(baseline, candidate)).splitlines():
+            report.insert(tk.END, line + "\n", 'regression' if line.endswith('REGRESSION') else ())
+        report.config(state=tk.DISABLED)
+
+    tk.Button(window, text="Compare", command=compare_selected).pack(pady=5)
+    report.pack(padx=10, pady=10)
+
+
+# Function to queue every point of the sweep in sweep.yaml and report them together once done
+def run_sweep():
+    try:
+        sweep = Sweep(*load_sweep(SWEEP_FILE))
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        messagebox.showerror("Error", f"Cannot load {SWEEP_FILE}: {e}")
+        return
+    if not messagebox.askokcancel("Sweep", f"Queue {len(sweep.points)} benchmark runs from {SWEEP_FILE}?"):
+        return
+
+    def point_finished(index, run):
+        sweep.record(index, store.run(run.store_id) if run.store_id else None)
+        if sweep.finished:
+            sweep.write_csv(os.path.join(RUNS_DIR, f"{sweep.name}.csv"))
+            show_sweep_report(sweep)
+
+    sweep.queue(queue_run, point_finished)
+
+
+# Function to display a finished sweep's comparison table and curves
+def show_sweep_report(sweep):
+    window = tk.Toplevel(root)
+    window.title(f"Sweep {sweep.name}")
+    text_widget = tk.Text(window, wrap='none', width=140, height=30)
+    text_widget.insert(tk.END, sweep.report())
+    text_widget.config(state=tk.DISABLED)
+    text_widget.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
 
-        # Write the captured output to output.txt
-        with open('output.txt', 'w') as file:
-            file.write(result.stdout)
 
-        messagebox.showinfo("Success", "Benchmark executed successfully and output saved!")
-    except subprocess.CalledProcessError as e:
-        messagebox.showerror("Error", f"Error while running benchmark: {e}")
+# Function to show the running and queued runs
+def refresh_queue():
+    queue_list.delete(0, tk.END)
+    current = runner.current
+    queue_rows[:] = ([current] if current is not None and current.status == RUNNING else []) + runner.queued()
+    for run in queue_rows:
+        queue_list.insert(tk.END, f"{run.name}  ({'running' if run is current else 'queued'})")
+    status_label.config(text=f"Running {current.name}" if current is not None else "Idle")
 
 
 # Function to display the results from the output.txt file
@@ -60,6 +218,12 @@ def show_results():
         messagebox.showerror("Error", "output.txt file not found!")
 
 
+# Function to stop the running benchmark when the window is closed
+def on_close():
+    runner.cancel_all()
+    root.destroy()
+
+
 # Create the main Tkinter window
 root = tk.Tk()
 root.title("Benchmark Tool")
@@ -77,8 +241,29 @@ load_button.pack(pady=5)
 benchmark_button = tk.Button(root, text="Benchmark", command=run_benchmark)
 benchmark_button.pack(pady=5)
 
+cancel_button = tk.Button(root, text="Cancel Run", command=cancel_run)
+cancel_button.pack(pady=5)
+
 show_results_button = tk.Button(root, text="Show Results", command=show_results)
 show_results_button.pack(pady=5)
 
+compare_button = tk.Button(root, text="Compare Runs", command=show_comparison)
+compare_button.pack(pady=5)
+
+sweep_button = tk.Button(root, text="Run Sweep", command=run_sweep)  # One run per point of sweep.yaml
+sweep_button.pack(pady=5)
+
+status_label = tk.Label(root, text="Idle")
+status_label.pack(pady=5)
+
+queue_list = tk.Listbox(root, width=60, height=5)  # Running run first, then queued runs
+queue_list.pack(padx=10, pady=5)
+
+output_text = tk.Text(root, wrap='none', width=100, height=20, state=tk.DISABLED)  # Streamed benchmark output
+output_text.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+
+root.protocol("WM_DELETE_WINDOW", on_close)
+root.after(OUTPUT_POLL_MS, pump_output)
+
 # Start the Tkinter event loop
 root.mainloop()
@@ -0,0 +1,334 @@
+"""Parses labench results into a local SQLite run store and compares runs.
+
+    python results.py ingest output.txt out/res.hgrm --config config.yaml [--name NAME]
+    python results.py list [--target URL]
+    python results.py compare BASELINE_ID CANDIDATE_ID
+
+Three inputs are understood: the console summary (output.txt), the `Json Output:` line
+labench prints with OutputJSON: true, and the percentile distribution (res.hgrm). A
+comparison flags a regression when throughput or success rate falls, or a latency
+percentile rises, by more than the configured tolerances.
+"""
+import argparse
+import json
+import re
+import sqlite3
+import time
+
+import yaml
+
+STORE_FILE = 'runs.db'  # SQLite run store
+PERCENTILES = (50, 90, 99, 99.9, 100)  # Latency percentiles kept per run (100 = max)
+THROUGHPUT_TOLERANCE = 0.05  # Relative throughput drop flagged as a regression
+LATENCY_TOLERANCE = 0.10  # Relative percentile increase flagged as a regression
+RUN_SPECIFIC_KEYS = ('Name', 'OutFile', 'Duration')  # Config keys ignored when looking for a comparable run
+
+SUMMARY_FIELDS = {  # Field of the {SuccessRate: ...} console line -> run column
+    'SuccessRate': 'success_rate', 'Throughput': 'throughput', 'AvgRequestTime': 'avg_request_ms',
+    'Connections': 'connections', 'RequestRate': 'request_rate', 'RequestTotal': 'request_total',
+    'SuccessTotal': 'success_total', 'ErrorTotal': 'error_total', 'TimeElapsed': 'elapsed_s',
+}
+
+
+def percentile_column(percentile):
+    """Return the runs column holding a latency percentile (99.9 -> p99_9)."""
+    return f'p{percentile:g}'.replace('.', '_')
+
+
+RUN_COLUMNS = (
+    'name', 'target', 'protocol', 'started', 'ended', 'ingested', 'config', 'success_rate', 'throughput',
+    'avg_request_ms', 'connections', 'request_rate', 'request_total', 'success_total', 'error_total', 'elapsed_s',
+    'ticks', 'timely_ticks_ratio', 'sends', 'timely_sends_ratio',
+) + tuple(percentile_column(percentile) for percentile in PERCENTILES)
+TEXT_COLUMNS = ('name', 'target', 'protocol', 'started', 'ended', 'config')
+COMPARED = (  # (column, label, True when higher is better)
+    ('throughput', 'Throughput (req/s)', True),
+    ('success_rate', 'Success rate (%)', True),
+    ('timely_sends_ratio', 'Timely sends (%)', True),
+) + tuple(
+    (percentile_column(percentile), f"{'max' if percentile == 100 else f'p{percentile:g}'} latency (ms)", False)
+    for percentile in PERCENTILES
+)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    {', '.join(f"{column} {'TEXT' if column in TEXT_COLUMNS else 'REAL'}" for column in RUN_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS runs_target ON runs (target, id);
+CREATE TABLE IF NOT EXISTS distribution (
+    run_id INTEGER REFERENCES runs (id) ON DELETE CASCADE,
+    percentile REAL,
+    value_ms REAL
+);
+CREATE TABLE IF NOT EXISTS errors (
+    run_id INTEGER REFERENCES runs (id) ON DELETE CASCADE,
+    error TEXT,
+    count INTEGER
+);
+"""
+
+
+def parse_duration(text):
+    """Convert a Go duration string (1m2.5s, 3.0002002s, 150ms) to seconds."""
+    units = {'h': 3600, 'm': 60, 's': 1, 'ms': 1e-3, 'us': 1e-6, 'µs': 1e-6, 'ns': 1e-9}
+    return sum(float(value) * units[unit] for value, unit in re.findall(r'([\d.]+)(ms|us|µs|ns|h|m|s)', text))
+
+
+def parse_hgrm(text):
+    """Return [(percentile 0-100, value ms)] from a labench .hgrm distribution."""
+    rows = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) >= 2 and not line.startswith(('Value', '#')):
+            try:
+                rows.append((float(fields[1]) * 100, float(fields[0])))
+            except ValueError:
+                continue
+    return rows
+
+
+def percentile_at(distribution, percentile):
+    """Return the value of the first distribution row at or above `percentile`."""
+    for row_percentile, value in distribution:
+        if row_percentile >= percentile - 1e-9:
+            return value
+    return distribution[-1][1] if distribution else None
+
+
+def parse_console(text):
+    """Return the run fields found in labench's console output (output.txt)."""
+    run = {}
+    match = re.search(r'timeStart = (.+)', text)
+    if match:
+        run['started'] = match.group(1).strip()
+    match = re.search(r'timeEnd\s+= (.+)', text)
+    if match:
+        run['ended'] = match.group(1).strip()
+    match = re.search(r'Protocol: (\S+)', text)
+    if match:
+        run['protocol'] = match.group(1)
+    match = re.search(r'Ticks=(\d+), TimelyTicks = (\d+)', text)
+    if match:
+        ticks, timely = int(match.group(1)), int(match.group(2))
+        run['ticks'], run['timely_ticks_ratio'] = ticks, round(timely / ticks * 100, 2) if ticks else 0.0
+    match = re.search(r'Sends=(\d+), TimelySends = (\d+)', text)
+    if match:
+        sends, timely = int(match.group(1)), int(match.group(2))
+        run['sends'], run['timely_sends_ratio'] = sends, round(timely / sends * 100, 2) if sends else 0.0
+    match = re.search(r'\{(SuccessRate:[^}]*)\}', text)
+    if match:
+        for field in match.group(1).split(', '):
+            key, _, value = field.partition(': ')
+            if key in SUMMARY_FIELDS:
+                number = parse_duration(value) if key == 'TimeElapsed' else float(re.sub(r'[^\d.]', '', value) or 0)
+                run[SUMMARY_FIELDS[key]] = number
+    run['errors'] = parse_error_table(text)
+    return run
+
+
+def parse_error_table(text):
+    """Return {error: count} from the ERROR table, joining wrapped cells."""
+    errors = {}
+    header = re.search(r'^\|\s+ERROR\s+\|.*$', text, re.MULTILINE)
+    if not header:
+        return errors
+    error, count = [], None
+    for line in text[header.end():].splitlines()[2:]:  # Skip the rest of the header line and the border
+        if not line.startswith('|'):
+            break
+        cells = [cell.strip() for cell in line.strip('|').split('|')]
+        if len(cells) < 2:
+            continue
+        if cells[1] and error:  # A new error starts; store the previous one
+            errors[' '.join(error)] = count
+            error = []
+        if cells[1]:
+            count = int(cells[1])
+        if cells[0]:
+            error.append(cells[0])
+    if error:
+        errors[' '.join(error)] = count
+    return errors
+
+
+def parse_json_output(text):
+    """Return the run fields of the `Json Output:` line (OutputJSON: true), or {} when absent."""
+    match = re.search(r'Json Output: (\{.*\})', text)
+    if not match:
+        return {}
+    data = json.loads(match.group(1))
+    total = data.get('SuccessTotal', 0) + data.get('ErrorTotal', 0)
+    return {
+        'connections': data.get('Connections'), 'request_rate': data.get('RequestRate'),
+        'success_total': data.get('SuccessTotal'), 'error_total': data.get('ErrorTotal'), 'request_total': total,
+        'success_rate': round(data.get('SuccessTotal', 0) / total * 100, 2) if total else 0.0,
+        'elapsed_s': data.get('TimeElapsed', 0) / 1e9, 'throughput': data.get('Throughput'),
+        'avg_request_ms': data.get('AvgRequestTime'),
+        'timely_ticks_ratio': data.get('TicksTimelyRatio'), 'timely_sends_ratio': data.get('SendsTimelyRatio'),
+        'errors': data.get('Errors') or {},
+    }
+
+
+class RunStore:
+    """SQLite store of parsed runs, their configs, latency distributions and errors."""
+
+    def __init__(self, path=STORE_FILE):
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def ingest(self, output_text, hgrm_text='', config=None, name=None):
+        """Parse one run's outputs, store it with its config and return its id."""
+        run = parse_console(output_text)
+        run.update({key: value for key, value in parse_json_output(output_text).items() if value is not None})
+        distribution = parse_hgrm(hgrm_text)
+        for percentile in PERCENTILES:
+            run[percentile_column(percentile)] = percentile_at(distribution, percentile)
+        config = config or {}
+        request = config.get('Request') or {}
+        run.update(
+            name=name or run.get('started') or time.strftime('%Y-%m-%d %H:%M:%S'), ingested=time.time(),
+            target=request.get('URL') or ','.join(request.get('URLs') or []), config=json.dumps(config, default=str),
+        )
+        run.setdefault('protocol', config.get('Protocol', 'HTTP/1.1'))
+        errors = run.pop('errors', {})
+        columns = [column for column in RUN_COLUMNS if column in run]
+        with self.db:
+            cursor = self.db.execute(
+                f"INSERT INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [run[column] for column in columns],
+            )
+            run_id = cursor.lastrowid
+            self.db.executemany("INSERT INTO distribution VALUES (?, ?, ?)",
+                                [(run_id, percentile, value) for percentile, value in distribution])
+            self.db.executemany("INSERT INTO errors VALUES (?, ?, ?)",
+                                [(run_id, error, count) for error, count in errors.items()])
+        return run_id
+
+    def ingest_files(self, output_file, hgrm_file=None, config_file=None, name=None):
+        """Ingest a run from its output, histogram and config files."""
+        with open(output_file) as file:
+            output_text = file.read()
+        hgrm_text = ''
+        if hgrm_file:
+            try:
+                with open(hgrm_file) as file:
+                    hgrm_text = file.read()
+            except FileNotFoundError:  # Failed runs write no histogram
+                pass
+        config = None
+        if config_file:
+            with open(config_file) as file:
+                config = yaml.safe_load(file)
+        return self.ingest(output_text, hgrm_text, config, name)
+
+    def runs(self, target=None, limit=100):
+        """Return the newest runs, optionally of one target only."""
+        if target:
+            query = "SELECT * FROM runs WHERE target = ? ORDER BY id DESC LIMIT ?", (target, limit)
+        else:
+            query = "SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,)
+        return [dict(row) for row in self.db.execute(*query)]
+
+    def run(self, run_id):
+        row = self.db.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No run {run_id}")
+        return dict(row)
+
+    def distribution(self, run_id):
+        """Return [(percentile, value ms)] of one run."""
+        return self.db.execute("SELECT percentile, value_ms FROM distribution WHERE run_id = ? ORDER BY percentile",
+                               (run_id,)).fetchall()
+
+    def previous(self, run_id):
+        """Return the latest run before `run_id` with the same target and config, or None.
+
+        Configs are compared without RUN_SPECIFIC_KEYS, so sweep points with a different
+        rate, client count or protocol are never compared with each other.
+        """
+        rows = self.db.execute(
+            "SELECT * FROM runs WHERE target = (SELECT target FROM runs WHERE id = ?) AND id <= ? ORDER BY id DESC",
+            (run_id, run_id),
+        ).fetchall()
+        if not rows or rows[0]['id'] != run_id:
+            return None
+        wanted = comparable_config(rows[0]['config'])
+        for row in rows[1:]:
+            if comparable_config(row['config']) == wanted:
+                return dict(row)
+        return None
+
+    def close(self):
+        self.db.close()
+
+
+def comparable_config(config_text):
+    """Return a stored config as canonical JSON without its RUN_SPECIFIC_KEYS."""
+    try:
+        config = json.loads(config_text or '{}')
+    except ValueError:
+        config = {}
+    return json.dumps({key: value for key, value in config.items() if key not in RUN_SPECIFIC_KEYS}, sort_keys=True)
+
+
+def compare(baseline, candidate, throughput_tolerance=THROUGHPUT_TOLERANCE, latency_tolerance=LATENCY_TOLERANCE):
+    """Return [(label, baseline, candidate, relative change, regressed)] for the compared metrics."""
+    rows = []
+    for column, label, higher_is_better in COMPARED:
+        before, after = baseline.get(column), candidate.get(column)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before if before else 0.0
+        if higher_is_better:
+            regressed = change < -throughput_tolerance
+        else:
+            regressed = change > latency_tolerance
+        rows.append((label, before, after, change, regressed))
+    return rows
+
+
+def format_comparison(baseline, candidate, rows):
+    """Return a comparison as printable lines, marking regressions."""
+    lines = [f"Baseline  #{baseline['id']} {baseline['name']} ({baseline['target']})",
+             f"Candidate #{candidate['id']} {candidate['name']} ({candidate['target']})", "",
+             f"{'Metric':<22} {'Baseline':>12} {'Candidate':>12} {'Change':>9}"]
+    for label, before, after, change, regressed in rows:
+        lines.append(f"{label:<22} {before:>12.2f} {after:>12.2f} {change:>+9.1%}{'  REGRESSION' if regressed else ''}")
+    if baseline['target'] != candidate['target']:
+        lines.append("\nNote: the runs have different targets")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store and compare labench runs.")
+    parser.add_argument('--store', default=STORE_FILE, help="SQLite run store")
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help="Parse and store one run")
+    ingest.add_argument('output', help="Console output (output.txt)")
+    ingest.add_argument('hgrm', nargs='?', help="Latency distribution (out/res.hgrm)")
+    ingest.add_argument('--config', help="Config the run used")
+    ingest.add_argument('--name')
+    listing = commands.add_parser('list', help="List stored runs")
+    listing.add_argument('--target')
+    comparison = commands.add_parser('compare', help="Compare two runs")
+    comparison.add_argument('baseline', type=int)
+    comparison.add_argument('candidate', type=int)
+    args = parser.parse_args()
+
+    store = RunStore(args.store)
+    if args.command == 'ingest':
+        print(f"Stored run {store.ingest_files(args.output, args.hgrm, args.config, args.name)}")
+    elif args.command == 'list':
+        for run in store.runs(args.target):
+            print(f"#{run['id']:<5} {run['name']:<28} {run['target'] or '-':<40} {run['throughput'] or 0:>9.2f} req/s "
+                  f"p99 {run['p99'] if run['p99'] is not None else '-'} ms")
+    else:
+        baseline, candidate = store.run(args.baseline), store.run(args.candidate)
+        print(format_comparison(baseline, candidate, compare(baseline, candidate)))
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""Runs labench in the background: queued runs one after another, output streamed line by line.
+
+The GUI (app.py) submits Run objects and drains `BenchmarkRunner.poll()` from the Tk main
+loop; nothing here touches Tk, so the runner never blocks the UI.
+"""
+import os  # For locating the binary
+import queue  # For handing events to the UI thread
+import subprocess  # For launching labench
+import sys  # For the platform binary name
+import threading  # For the background worker
+import time  # For run timestamps
+from collections import deque  # For the run queue
+
+import yaml  # For config snapshots
+
+BINARY_ENV = "LABENCH_BINARY"  # Environment variable naming the labench binary explicitly
+BINARY_NAMES = ("benchmarking.exe", "labench.exe") if sys.platform == "win32" else ("benchmarking", "labench")
+CODE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Code")  # Where `go build` puts the binary
+STOP_TIMEOUT = 5  # Seconds a cancelled run gets to exit before it is killed
+RUNS_DIR = "runs"  # Config snapshot, console output and histogram of every queued run
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+def find_binary():
+    """Return the labench binary for this platform: $LABENCH_BINARY, else the working directory or Code/."""
+    explicit = os.environ.get(BINARY_ENV)
+    if explicit:
+        return explicit
+    for directory in (os.getcwd(), os.path.dirname(os.path.abspath(__file__)), CODE_DIR):
+        for name in BINARY_NAMES:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                return path
+    raise FileNotFoundError(f"No labench binary ({' or '.join(BINARY_NAMES)}) found; build it in Code/ "
+                            f"or set {BINARY_ENV}")
+
+
+def kill(process):
+    """Kill a process that is still running."""
+    if process.poll() is None:
+        process.kill()
+
+
+class Run:
+    """One queued benchmark: a config file and the file its console output is written to."""
+
+    def __init__(self, name, config_file, output_file, on_finished=None, delay=0, warmup=False):
+        self.name = name
+        self.config_file = config_file
+        self.output_file = output_file
+        self.on_finished = on_finished  # Called on the UI thread with the run once it ends
+        self.delay = delay  # Cool-down seconds waited before starting
+        self.warmup = warmup  # Warm-up runs are not stored or compared
+        self.status = QUEUED
+        self.returncode = None
+        self.started = None  # Epoch seconds
+        self.finished = None
+        self.store_id = None  # Id in the run store once ingested
+
+
+def snapshot_run(config, name, on_finished=None, delay=0, warmup=False):
+    """Write `config` to RUNS_DIR/<name>.yaml with its own OutFile and return a Run of it.
+
+    The snapshot keeps queued runs independent of later edits to config.yaml.
+    """
+    os.makedirs(RUNS_DIR, exist_ok=True)
+    config = dict(config, OutFile=os.path.join(RUNS_DIR, f"{name}.hgrm"))  # Keep every run's histogram
+    config_file = os.path.join(RUNS_DIR, f"{name}.yaml")
+    with open(config_file, "w") as file:
+        yaml.dump(config, file)
+    return Run(name, config_file, os.path.join(RUNS_DIR, f"{name}.txt"), on_finished, delay, warmup)
+
+
+class BenchmarkRunner:
+    """Runs queued labench runs one at a time on a background thread.
+
+    Events for the UI are put on a queue as ("started", run), ("line", run, text) and
+    ("finished", run); `poll()` drains them without blocking.
+    """
+
+    def __init__(self, binary=None):
+        self.binary = binary  # Resolved on the first run when None
+        self.pending = deque()  # Runs waiting to start
+        self.current = None  # Run in progress
+        self.process = None  # Its labench process
+        self.events = queue.Queue()
+        self.condition = threading.Condition()  # Guards pending/current and wakes the worker
+        self.thread = None
+
+    def submit(self, run):
+        """Queue a run; it starts as soon as the runs before it have finished."""
+        with self.condition:
+            self.pending.append(run)
+            self.condition.notify()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.work, name="labench-runner", daemon=True)
+                self.thread.start()
+
+    def cancel(self, run=None):
+        """Cancel a queued run, or the current run when `run` is None or is the current run."""
+        with self.condition:
+            if run is not None and run in self.pending:
+                self.pending.remove(run)
+                run.status = CANCELLED
+                self.events.put(("finished", run))
+                return
+            if self.current is not None and run in (None, self.current):
+                self.current.status = CANCELLED
+                self.condition.notify_all()  # Ends a cool-down wait
+                process = self.process
+                if process is not None and process.poll() is None:
+                    process.terminate()
+                    threading.Timer(STOP_TIMEOUT, kill, args=(process,)).start()  # In case it ignores terminate
+
+    def cancel_all(self):
+        """Cancel the current run and empty the queue."""
+        with self.condition:
+            queued = list(self.pending)
+        for run in queued:
+            self.cancel(run)
+        self.cancel()
+
+    def queued(self):
+        """Return the runs waiting to start."""
+        with self.condition:
+            return list(self.pending)
+
+    def poll(self, limit=1000):
+        """Return up to `limit` pending events without blocking."""
+        events = []
+        try:
+            while len(events) < limit:
+                events.append(self.events.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+    def work(self):
+        """Worker loop: start the next queued run, stream its output, repeat.
+
+        If the loop ever ends, `thread` is cleared so the next `submit()` starts a new worker.
+        """
+        try:
+            while True:
+                with self.condition:
+                    while not self.pending:
+                        self.condition.wait()
+                    run = self.current = self.pending.popleft()
+                    run.status = RUNNING
+                    deadline = time.monotonic() + run.delay
+                    while run.status != CANCELLED and deadline > time.monotonic():
+                        self.condition.wait(deadline - time.monotonic())
+                self.execute(run)
+                with self.condition:
+                    self.current = self.process = None
+                self.events.put(("finished", run))
+        finally:
+            with self.condition:
+                self.thread = None
+                self.current = self.process = None
+                if self.pending:  # Runs were queued while this worker was failing: hand them to a new one
+                    self.thread = threading.Thread(target=self.work, name="labench-runner", daemon=True)
+                    self.thread.start()
+
+    def execute(self, run):
+        """Run labench on the run's config, copying each output line to its file and the event queue."""
+        run.started = time.time()
+        self.events.put(("started", run))
+        try:
+            binary = self.binary or find_binary()
+            with open(run.output_file, "w") as output:
+                with self.condition:
+                    if run.status == CANCELLED:  # Cancelled before it got going
+                        return
+                    self.process = subprocess.Popen(
+                        [binary, run.config_file], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                        text=True, bufsize=1, errors="replace",
+                    )
+                for line in self.process.stdout:
+                    output.write(line)
+                    output.flush()  # Keep the file current for long soak runs
+                    self.events.put(("line", run, line))
+                self.process.stdout.close()
+                run.returncode = self.process.wait()
+        except Exception as e:  # Missing binary, unwritable output file, ...: fail this run, keep the worker
+            self.events.put(("line", run, f"Error while running benchmark: {e}\n"))
+            run.returncode = -1
+            if self.process is not None:
+                kill(self.process)
+        finally:
+            run.finished = time.time()
+            if run.status != CANCELLED:
+                run.status = DONE if run.returncode == 0 else FAILED
@@ -0,0 +1,221 @@
+"""Config matrix sweeps: one labench run per point of a parameter grid.
+
+    python sweep.py sweep.yaml
+
+A sweep file names a base config and a grid of values to cross:
+
+    base: config.yaml             # or an inline mapping
+    grid:
+      RequestRatePerSec: [100, 200, 400]
+      Clients: [100, 500]
+      Protocol: [HTTP/1.1, HTTP/2]
+      ReuseConnections: [true, false]
+      Request.HTTPMethod: [GET]   # dotted keys reach nested settings
+    warmup: 5s                    # unmeasured run before each point ('' to skip)
+    cooldown: 10                  # idle seconds before each run
+
+Points run one after another through the same runner and run store as the GUI. The
+result is one table of every point, throughput/p99 curves over the request rate, and
+the best point: the highest throughput among points with at least MIN_SUCCESS_RATE %
+success and MIN_TIMELY_SENDS % timely sends (lowest p99 breaks ties).
+"""
+import argparse
+import copy
+import csv
+import itertools
+import os
+import time
+
+import yaml
+
+from results import RunStore
+from runner import BenchmarkRunner, DONE, RUNS_DIR, snapshot_run
+
+SWEEP_FILE = 'sweep.yaml'
+RATE_KEY = 'RequestRatePerSec'  # Curves are drawn over this parameter
+MIN_SUCCESS_RATE = 99.0  # Percent of requests that must succeed for a point to qualify as best
+MIN_TIMELY_SENDS = 95.0  # Percent of sends that must be timely for a point to qualify as best
+TABLE_METRICS = ('throughput', 'success_rate', 'timely_sends_ratio', 'p50', 'p99', 'p99_9')
+
+
+def load_sweep(path=SWEEP_FILE):
+    """Return (base config, grid, warm-up duration, cool-down seconds) from a sweep file."""
+    with open(path) as file:
+        sweep = yaml.safe_load(file) or {}
+    base = sweep.get('base', 'config.yaml')
+    if isinstance(base, str):
+        with open(os.path.join(os.path.dirname(path), base) if not os.path.isabs(base) else base) as file:
+            base = yaml.safe_load(file) or {}
+    grid = sweep.get('grid') or {}
+    if not grid:
+        raise ValueError(f"{path} has no grid to sweep")
+    grid = {key: values if isinstance(values, list) else [values] for key, values in grid.items()}
+    return base, grid, str(sweep.get('warmup', '') or ''), float(sweep.get('cooldown', 0))
+
+
+def set_path(config, key, value):
+    """Set a dotted key (Request.HTTPMethod) in a nested config."""
+    *parents, leaf = key.split('.')
+    for parent in parents:
+        config = config.setdefault(parent, {})
+    config[leaf] = value
+
+
+def expand_grid(base, grid):
+    """Return [(point, config)] for every combination of grid values, in grid order."""
+    keys = list(grid)
+    points = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        point = dict(zip(keys, values))
+        config = copy.deepcopy(base)
+        for key, value in point.items():
+            set_path(config, key, value)
+        points.append((point, config))
+    return points
+
+
+def point_label(point):
+    return ', '.join(f"{key.split('.')[-1]}={value}" for key, value in point.items())
+
+
+class Sweep:
+    """Queues the warm-up and measured runs of every grid point and collects their stored results.
+
+    Cool-down is waited before each point's first run (its warm-up when there is one).
+    """
+
+    def __init__(self, base, grid, warmup='', cooldown=0, name=None):
+        self.points = expand_grid(base, grid)
+        self.grid = grid
+        self.warmup = warmup
+        self.cooldown = cooldown
+        self.name = name or f"sweep-{time.strftime('%Y%m%d-%H%M%S')}"
+        self.results = {}  # Point index -> stored run (dict), None when the run failed
+        self.runs = []
+
+    def queue(self, queue_run, on_point_finished):
+        """Queue every point (with its warm-up) through `queue_run(config, name, on_finished, delay, warmup)`.
+
+        `on_point_finished(index, run)` is called as each measured run ends.
+        """
+        for index, (point, config) in enumerate(self.points):
+            name = f"{self.name}-{index + 1:03d}"
+            if self.warmup:
+                warmup_config = dict(copy.deepcopy(config), Duration=self.warmup)
+                self.runs.append(queue_run(warmup_config, f"{name}-warmup", None, self.cooldown, True))
+            self.runs.append(queue_run(config, name, lambda run, index=index: on_point_finished(index, run),
+                                       0 if self.warmup else self.cooldown, False))
+
+    def record(self, index, stored):
+        self.results[index] = stored
+
+    @property
+    def finished(self):
+        return len(self.results) == len(self.points)
+
+    def rows(self):
+        """Return one row per point: its parameters followed by its stored metrics."""
+        rows = []
+        for index, (point, _) in enumerate(self.points):
+            stored = self.results.get(index) or {}
+            rows.append({**point, **{metric: stored.get(metric) for metric in TABLE_METRICS},
+                         'run': stored.get('id')})
+        return rows
+
+    def best(self):
+        """Return the best qualifying row, or None."""
+        qualifying = [row for row in self.rows() if row['throughput'] is not None
+                      and (row['success_rate'] or 0) >= MIN_SUCCESS_RATE
+                      and (row['timely_sends_ratio'] or 0) >= MIN_TIMELY_SENDS]
+        if not qualifying:
+            return None
+        return max(qualifying, key=lambda row: (row['throughput'], -(row['p99'] or float('inf'))))
+
+    def report(self):
+        """Return the comparison table, throughput/p99 curves and best point as text."""
+        keys = list(self.grid)
+        rows = self.rows()
+        headers = [key.split('.')[-1] for key in keys] + ['Throughput', 'Success %', 'Timely %', 'p50 ms', 'p99 ms',
+                                                         'p99.9 ms', 'Run']
+        cells = [[str(row[key]) for key in keys] + [format_metric(row[metric]) for metric in TABLE_METRICS]
+                 + [f"#{row['run']}" if row['run'] else 'failed'] for row in rows]
+        widths = [max(len(text) for text in column) for column in zip(headers, *cells)]
+        lines = ['  '.join(text.rjust(width) for text, width in zip(line, widths)) for line in [headers] + cells]
+
+        if RATE_KEY in keys and len(self.grid[RATE_KEY]) > 1:  # One curve per combination of the other parameters
+            lines.append('\nCurves over RequestRatePerSec (throughput req/s / p99 ms):')
+            others = [key for key in keys if key != RATE_KEY]
+            for group, members in itertools.groupby(sorted(rows, key=lambda row: [str(row[key]) for key in others]),
+                                                    key=lambda row: [str(row[key]) for key in others]):
+                label = ', '.join(f"{key.split('.')[-1]}={value}" for key, value in zip(others, group)) or 'all'
+                points = '  '.join(f"{row[RATE_KEY]}: {format_metric(row['throughput'])} / {format_metric(row['p99'])}"
+                                   for row in sorted(members, key=lambda row: row[RATE_KEY]))
+                lines.append(f"  {label}: {points}")
+
+        best = self.best()
+        lines.append('')
+        if best is None:
+            lines.append(f"No point reached {MIN_SUCCESS_RATE:g}% success with {MIN_TIMELY_SENDS:g}% timely sends")
+        else:
+            lines.append(f"Best: {point_label({key: best[key] for key in keys})} -> "
+                         f"{format_metric(best['throughput'])} req/s, p99 {format_metric(best['p99'])} ms")
+        return '\n'.join(lines)
+
+    def write_csv(self, path):
+        """Write the comparison table to a CSV file."""
+        rows = self.rows()
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def format_metric(value):
+    return '-' if value is None else f"{value:.2f}"
+
+
+def main():
+    """Run a sweep without the GUI, printing labench's output as it streams."""
+    parser = argparse.ArgumentParser(description="Run one labench benchmark per point of a parameter grid.")
+    parser.add_argument('sweep', nargs='?', default=SWEEP_FILE, help="Sweep file")
+    parser.add_argument('--csv', help="Also write the comparison table to this CSV file")
+    args = parser.parse_args()
+
+    sweep = Sweep(*load_sweep(args.sweep))
+    runner = BenchmarkRunner()
+    store = RunStore()
+
+    def queue_run(config, name, on_finished, delay, warmup):
+        run = snapshot_run(config, name, on_finished, delay, warmup)
+        runner.submit(run)
+        return run
+
+    def point_finished(index, run):
+        sweep.record(index, store.run(run.store_id) if run.store_id else None)
+        print(f"Point {index + 1}/{len(sweep.points)} ({point_label(sweep.points[index][0])}): {run.status}")
+
+    print(f"Sweeping {len(sweep.points)} points")
+    sweep.queue(queue_run, point_finished)
+    try:
+        while not sweep.finished:
+            for event in runner.poll():
+                kind, run = event[0], event[1]
+                if kind == 'line':
+                    print(event[2], end='')
+                elif kind == 'finished':
+                    if run.status == DONE and not run.warmup:
+                        run.store_id = store.ingest_files(run.output_file, os.path.splitext(run.output_file)[0]
+                                                          + '.hgrm', run.config_file, run.name)
+                    if run.on_finished is not None:
+                        run.on_finished(run)
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        runner.cancel_all()
+        print("\nSweep cancelled; reporting the points so far.")
+    print('\n' + sweep.report())
+    if args.csv:
+        sweep.write_csv(args.csv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+import asyncio  # For the event loop, streams and semaphores
+import itertools  # For numbering pool threads
+import socket  # For SO_LINGER on new connections
+import ssl  # For https connections
+import threading  # For per-thread worker ids of the blocking transport
+import time  # For timing connection setup and requests
+from concurrent.futures import ThreadPoolExecutor  # For the blocking transport
+from urllib.parse import urlencode, urlsplit  # For building request targets
+
+from connection_pool import LINGER_OFF  # For closing sockets without TIME_WAIT
+from result_log import FAILED  # For recording requests that got no response
+from scheduler import OpenLoopScheduler, make_arrivals  # For open-loop arrival schedules
+
+try:  # For HTTP/2 (optional: pip install httpx[http2])
+    import httpx
+except ImportError:
+    httpx = None
+
+try:  # For raising the open-file limit (POSIX only)
+    import resource
+except ImportError:
+    resource = None
+
+
+class AsyncHTTPClient:
+    """Minimal non-blocking HTTP/1.1 client with a per-host keep-alive connection pool.
+
+    Idle connections are reused LIFO. A reused connection that turns out to be closed by
+    the server is retried once on a fresh connection. New connections are timed into the
+    same ConnectionStats the threaded engine uses.
+    """
+
+    def __init__(self, stats, keep_alive=True, reconnect_every=0, dont_linger=False):
+        self.stats = stats  # connection_pool.ConnectionStats
+        self.keep_alive = keep_alive  # Reuse connections
+        self.reconnect_every = reconnect_every  # Requests per connection before closing it (0 = unlimited)
+        self.dont_linger = dont_linger  # Close sockets with SO_LINGER 0
+        self.idle = {}  # (scheme, host, port) -> list of [reader, writer, requests sent]
+        self.ssl_context = ssl.create_default_context()
+
+    async def connect(self, scheme, host, port):
+        """Open and time a new connection."""
+        start = time.perf_counter_ns()
+        try:
+            reader, writer = await asyncio.open_connection(
+                host, port, ssl=self.ssl_context if scheme == "https" else None,
+                server_hostname=host if scheme == "https" else None,
+            )
+        except (OSError, asyncio.TimeoutError):
+            self.stats.record_connect(time.perf_counter_ns() - start, failed=True)
+            raise
+        self.stats.record_connect(time.perf_counter_ns() - start)
+        if self.dont_linger:
+            writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER_OFF)
+        return [reader, writer, 0]
+
+    async def request(self, method, url, headers, body, params=None):
+        """Send one request and read the whole response; return (status, response bytes)."""
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        host = parts.hostname
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        if params:
+            target += ("&" if parts.query else "?") + urlencode(params)
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc}", f"Content-Length: {len(body)}"]
+        if not self.keep_alive:
+            lines.append("Connection: close")
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        key = (scheme, host, port)
+        pool = self.idle.setdefault(key, [])
+        self.stats.record_request()
+        for attempt in range(2):
+            reused = bool(pool) and attempt == 0
+            connection = pool.pop() if reused else await self.connect(scheme, host, port)
+            reader, writer = connection[0], connection[1]
+            try:
+                writer.write(head)
+                if body:
+                    writer.write(body)
+                await writer.drain()
+                status, size, keep = await read_response(reader, method)
+            except (ConnectionError, asyncio.IncompleteReadError) as error:
+                writer.close()
+                stale = not isinstance(error, asyncio.IncompleteReadError) or not error.partial
+                if reused and stale:
+                    continue  # Server closed an idle keep-alive connection: retry on a new one
+                raise
+            except BaseException:  # Timeout or cancellation mid-exchange: the connection is unusable
+                writer.close()
+                raise
+            connection[2] += 1
+            if keep and self.keep_alive and (not self.reconnect_every or connection[2] < self.reconnect_every):
+                pool.append(connection)
+            else:
+                writer.close()
+            return status, size
+        raise ConnectionError("connection closed by server")
+
+    async def close(self):
+        """Close every idle connection."""
+        for pool in self.idle.values():
+            for _, writer, _ in pool:
+                writer.close()
+        self.idle.clear()
+
+
+async def read_response(reader, method):
+    """Read one response; return (status, body bytes, whether the connection can be reused)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise asyncio.IncompleteReadError(b"", None)
+    version, status = status_line.split(None, 2)[:2]
+    status = int(status)
+    length = None
+    chunked = False
+    keep = version == b"HTTP/1.1"
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"transfer-encoding":
+            chunked = b"chunked" in value.lower()
+        elif name == b"connection":
+            keep = value.strip().lower() == b"keep-alive" or (keep and value.strip().lower() != b"close")
+
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        return status, 0, keep
+    size = 0
+    if chunked:
+        while True:
+            chunk = int((await reader.readline()).split(b";")[0], 16)
+            if chunk == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):  # Trailers
+                    pass
+                return status, size, keep
+            await reader.readexactly(chunk + 2)  # Chunk plus CRLF
+            size += chunk
+    if length is not None:
+        if length:
+            await reader.readexactly(length)
+        return status, length, keep
+    size = len(await reader.read())  # No length: body runs until the server closes
+    return status, size, False
+
+
+def raise_open_file_limit(needed):
+    """Raise the soft RLIMIT_NOFILE towards the hard limit so `needed` sockets can be open."""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = hard if hard == resource.RLIM_INFINITY else min(hard, max(soft, needed + 256))
+    if target > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+class AsyncEngine:
+    """asyncio engine behind TrafficSimulator: `concurrency` is the in-flight request bound.
+
+    With `rps` > 0 requests follow an open-loop arrival schedule (constant, Poisson or a file
+    of offsets) and latency is measured from each intended send time. Otherwise each burst
+    issues `concurrency * burst_size` requests and, when a delay is set, waits for them
+    before sleeping; with no delay requests are issued continuously. Either way the
+    traffic-volume budget is reserved when a request is issued, so it is never overshot.
+
+    :param blocking: Send through the simulator's threaded PooledClient on `concurrency`
+        threads instead of an asyncio transport (the "threads" engine under open-loop scheduling)
+    :param shard: Index of this engine's process when the schedule is split across `shards` processes
+    """
+
+    def __init__(self, simulator, http2=False, blocking=False, shard=0, shards=1):
+        if http2 and httpx is None:
+            raise RuntimeError("HTTP/2 needs httpx: pip install httpx[http2]")
+        self.simulator = simulator
+        self.http2 = http2  # Use httpx with HTTP/2 instead of the built-in HTTP/1.1 client
+        self.blocking = blocking
+        self.shard = shard
+        self.shards = shards
+        self.failed = 0  # Requests that raised or timed out
+        self.schedule = None  # scheduler.ScheduleStats of an open-loop run
+
+    def run(self, report=True, workload=None):
+        """Run the simulation to completion in a new event loop.
+
+        `workload`, when given, is an async function called with this engine once the
+        transport is up; it replaces the built-in burst and open-loop drivers.
+        """
+        raise_open_file_limit(self.simulator.concurrency)
+        try:
+            asyncio.run(self.main(workload))
+        finally:
+            if report and self.schedule is not None:
+                print("\n" + self.schedule.report())  # Timeliness and latency from intended send times
+
+    async def main(self, workload=None):
+        simulator = self.simulator
+        client = self.simulator.client
+        if self.blocking:
+            worker_ids = itertools.count()
+            local = threading.local()
+            self.transport = ThreadPoolExecutor(
+                simulator.concurrency, initializer=lambda: setattr(local, "worker", next(worker_ids)),
+            )
+            self.local = local
+        elif self.http2:
+            self.transport = httpx.AsyncClient(
+                http2=True, timeout=simulator.timeout,
+                limits=httpx.Limits(max_connections=simulator.concurrency),
+            )
+        else:
+            self.transport = AsyncHTTPClient(client.stats, client.keep_alive, client.reconnect_every,
+                                             client.dont_linger)
+        try:
+            if workload is not None:
+                await workload(self)
+            elif simulator.rps > 0:
+                await self.open_loop()
+            else:
+                await self.bursts()
+        finally:
+            if self.blocking:
+                self.transport.shutdown(wait=True)
+            elif self.http2:
+                await self.transport.aclose()
+            else:
+                await self.transport.close()
+
+    def next_payload(self):
+        """Reserve budget for the next request; return (body, data size) or None when spent."""
+        simulator = self.simulator
+        if simulator.sent_bytes >= simulator.traffic_volume:
+            return None
+        payload, data_size = simulator.generate_random_payload()  # memoryview into the payload arena
+        remaining = simulator.traffic_volume - simulator.sent_bytes
+        if data_size > remaining:  # The last request takes exactly what is left of the budget
+            payload, data_size = payload[:remaining], remaining
+        simulator.sent_bytes += data_size  # Reserve the budget before sending
+        return payload, data_size
+
+    async def open_loop(self):
+        """Send on the arrival schedule until the budget or the schedule runs out."""
+        simulator = self.simulator
+        arrivals = make_arrivals(simulator.arrivals, simulator.rps, self.shard, self.shards)
+        scheduler = OpenLoopScheduler(arrivals, simulator.concurrency, tolerance=self.shards / simulator.rps)
+        self.schedule = scheduler.stats
+
+        def next_request():
+            reserved = self.next_payload()
+            if reserved is None:
+                return None
+            return lambda intended: self.send(*reserved, intended=intended)
+
+        await scheduler.run(next_request)
+
+    async def bursts(self):
+        """Send closed-loop bursts bounded by `concurrency` in-flight requests."""
+        simulator = self.simulator
+        semaphore = asyncio.BoundedSemaphore(simulator.concurrency)
+        pending = set()
+
+        async def bounded(body, data_size):
+            try:
+                await self.send(body, data_size)
+            finally:
+                semaphore.release()
+
+        while simulator.sent_bytes < simulator.traffic_volume:
+            for _ in range(simulator.concurrency * simulator.burst_size):
+                await semaphore.acquire()
+                reserved = self.next_payload()
+                if reserved is None:
+                    semaphore.release()
+                    break
+                task = asyncio.create_task(bounded(*reserved))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if simulator.delay > 0 and pending:
+                await asyncio.wait(pending)  # Bursts end when their requests complete
+                await asyncio.sleep(simulator.delay)
+        if pending:
+            await asyncio.wait(pending)
+
+    def blocking_request(self, body, method, url, headers):
+        """Send one request on the calling pool thread's PooledClient worker; return (status, worker)."""
+        simulator = self.simulator
+        response = simulator.client.request(
+            self.local.worker, method=method, url=url, headers=headers,
+            data=bytes(body), params=simulator.params, timeout=simulator.timeout,
+        )
+        return response.status_code, self.local.worker
+
+    async def send(self, body, data_size, intended=None, method=None, url=None, headers=None):
+        """Send one request with a per-request timeout, log the result and return its status.
+
+        The logged latency runs from `intended` (perf_counter ns) when given, so time spent
+        waiting behind a late schedule is included. `method`, `url` and `headers` default
+        to the simulator's.
+        """
+        simulator = self.simulator
+        method = method or simulator.method
+        url = url or simulator.url
+        headers = headers or simulator.headers
+        now = time.perf_counter_ns()
+        start = intended if intended is not None else now
+        start_ns = time.time_ns() - (now - start)  # Wall-clock send time for the result log
+        worker = 0  # Result buffer of the event loop
+        try:
+            if self.blocking:
+                status, worker = await asyncio.get_running_loop().run_in_executor(
+                    self.transport, self.blocking_request, body, method, url, headers,
+                )
+            elif self.http2:
+                simulator.client.stats.record_request()
+                response = await self.transport.request(
+                    method, url, headers=headers, content=bytes(body),
+                    params=simulator.params,
+                )
+                status = response.status_code
+            else:
+                status, _ = await asyncio.wait_for(
+                    self.transport.request(method, url, headers, body, simulator.params),
+                    simulator.timeout,
+                )
+        except Exception:  # Connection errors, protocol errors and timeouts
+            self.failed += 1
+            status = FAILED
+        simulator.log_request(worker, status, start_ns, time.perf_counter_ns() - start, data_size, method)
+        return status
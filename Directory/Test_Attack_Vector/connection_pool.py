@@ -0,0 +1,191 @@
+import socket  # For SO_LINGER on new connections
+import struct  # For packing the linger option
+import threading  # For guarding shared statistics
+import time  # For timing connection setup
+from array import array  # For compact connect-time samples
+
+import requests  # For HTTP sessions
+from requests.adapters import HTTPAdapter  # For per-session pool sizing
+from urllib3.connection import HTTPConnection, HTTPSConnection  # For timing TCP/TLS setup
+from urllib3.poolmanager import PoolManager  # For attaching timed connections to each pool
+
+LINGER_OFF = struct.pack("ii", 1, 0)  # SO_LINGER on with a zero timeout: close with RST, no TIME_WAIT
+
+
+class ConnectionStats:
+    """Counts requests and new connections and keeps connect times (ns) for a report."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0  # Requests sent
+        self.connections = 0  # Connections opened (TCP, plus TLS for https)
+        self.failed_connects = 0  # Connection attempts that raised
+        self.connect_ns = array("q")  # Setup time of every new connection
+
+    def record_connect(self, elapsed_ns, failed=False):
+        """Record one connection attempt."""
+        with self.lock:
+            if failed:
+                self.failed_connects += 1
+            else:
+                self.connections += 1
+                self.connect_ns.append(elapsed_ns)
+
+    def record_request(self):
+        """Record one request sent over the pool."""
+        with self.lock:
+            self.requests += 1
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]  # Locks do not pickle; stats travel between processes as plain counts
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def merge(self, other):
+        """Add another worker process's statistics."""
+        with self.lock:
+            self.requests += other.requests
+            self.connections += other.connections
+            self.failed_connects += other.failed_connects
+            self.connect_ns.extend(other.connect_ns)
+
+    def summary(self):
+        """Return reuse ratio and connect-time percentiles (ms)."""
+        with self.lock:
+            samples = sorted(self.connect_ns)
+            requests_sent, connections, failed = self.requests, self.connections, self.failed_connects
+
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(len(samples) * p / 100))] / 1e6, 3) if samples else 0.0
+
+        reused = max(requests_sent - connections, 0)
+        return {
+            "requests": requests_sent,
+            "new_connections": connections,
+            "reused_requests": reused,
+            "reuse_ratio": round(reused / requests_sent, 3) if requests_sent else 0.0,
+            "failed_connects": failed,
+            "connect_ms": {
+                "mean": round(sum(samples) / len(samples) / 1e6, 3) if samples else 0.0,
+                "p50": percentile(50), "p99": percentile(99),
+                "max": round(samples[-1] / 1e6, 3) if samples else 0.0,
+            },
+        }
+
+    def report(self):
+        """Return the summary as two printable lines."""
+        stats = self.summary()
+        connect = stats["connect_ms"]
+        return (
+            f"Requests: {stats['requests']}, New Connections: {stats['new_connections']}, "
+            f"Reused: {stats['reused_requests']} ({stats['reuse_ratio']:.1%}), "
+            f"Failed Connects: {stats['failed_connects']}\n"
+            f"Connect Time (ms): mean {connect['mean']}, p50 {connect['p50']}, p99 {connect['p99']}, max {connect['max']}"
+        )
+
+
+class TimedConnectionMixin:
+    """Times connect() and optionally disables lingering on the new socket."""
+
+    def __init__(self, *args, stats=None, dont_linger=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+        self.dont_linger = dont_linger
+
+    def connect(self):
+        start = time.perf_counter_ns()
+        try:
+            super().connect()
+        except Exception:
+            self.stats.record_connect(time.perf_counter_ns() - start, failed=True)
+            raise
+        self.stats.record_connect(time.perf_counter_ns() - start)
+        if self.dont_linger:  # Like DontLinger in TLBS: free the local port immediately on close
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER_OFF)
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedPoolManager(PoolManager):
+    """PoolManager whose pools open TimedHTTP(S)Connections reporting to `stats`."""
+
+    def __init__(self, *args, stats=None, dont_linger=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+        self.dont_linger = dont_linger
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.ConnectionCls = TimedHTTPSConnection if scheme == "https" else TimedHTTPConnection
+        pool.conn_kw.update(stats=self.stats, dont_linger=self.dont_linger)
+        return pool
+
+
+class TimedAdapter(HTTPAdapter):
+    """HTTPAdapter using a TimedPoolManager."""
+
+    def __init__(self, stats, dont_linger, **kwargs):
+        self.stats = stats
+        self.dont_linger = dont_linger
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self.poolmanager = TimedPoolManager(
+            num_pools=connections, maxsize=maxsize, block=block,
+            stats=self.stats, dont_linger=self.dont_linger, **pool_kwargs,
+        )
+
+
+class PooledClient:
+    """One keep-alive Session per simulator worker, with reuse and connect-time statistics.
+
+    :param workers: Number of workers; each gets its own Session and pool
+    :param pool_size: Connections kept per host in each worker's pool
+    :param keep_alive: Reuse connections; when False every request asks the server to close
+    :param reconnect_every: Drop the worker's connections every N requests (0 = never)
+    :param dont_linger: Close sockets with SO_LINGER 0 so ports are not left in TIME_WAIT
+    """
+
+    def __init__(self, workers, pool_size=1, keep_alive=True, reconnect_every=0, dont_linger=False):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.reconnect_every = reconnect_every
+        self.dont_linger = dont_linger
+        self.stats = ConnectionStats()
+        self.sessions = [self.new_session() for _ in range(workers)]
+        self.sent = [0] * workers  # Requests sent by each worker
+
+    def new_session(self):
+        """Create a Session whose adapters time new connections."""
+        session = requests.Session()
+        adapter = TimedAdapter(self.stats, self.dont_linger, pool_connections=self.pool_size,
+                               pool_maxsize=self.pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"  # Server closes after each response
+        return session
+
+    def request(self, worker, method, url, **kwargs):
+        """Send one request on the given worker's Session."""
+        session = self.sessions[worker]
+        if self.reconnect_every and self.sent[worker] and self.sent[worker] % self.reconnect_every == 0:
+            session.close()  # Pools are rebuilt on the next request, forcing a fresh connection
+        self.sent[worker] += 1
+        self.stats.record_request()
+        return session.request(method=method, url=url, **kwargs)
+
+    def close(self):
+        """Close every worker's connections."""
+        for session in self.sessions:
+            session.close()
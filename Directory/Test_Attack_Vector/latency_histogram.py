@@ -0,0 +1,254 @@
+"""Fixed-memory log-linear latency histograms that merge across threads, processes and runs.
+
+Values are integer nanoseconds (time.perf_counter_ns() deltas) with ~3.1% worst-case relative
+error. Histograms are saved as compact .hist files and exported as .hgrm percentile
+distributions in the exact layout labench writes (TLBS OutFile), so Python and labench
+results can be merged and compared:
+
+    python latency_histogram.py traffic_log.hist ../TLBS/out/res.hgrm --count 5000 --hgrm merged.hgrm
+"""
+import argparse  # For the merge/compare command line
+import struct  # For the .hist header
+import zlib  # For compressing .hist counts
+import os  # For locating the shared bucket layout
+import sys  # For putting the shared bucket layout on the import path
+from array import array  # For compact fixed-size bucket storage
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from log_linear import (  # For the bucket layout shared with SERVER/histogram.py
+    BUCKET_COUNT, MAX_VALUE_BITS, SUB_BUCKET_BITS, bucket_index, percentile_from_counts,
+)
+
+MAGIC = b"LATHIST1"  # .hist file signature and format version
+HEADER = struct.Struct("<8sBBxxxxxxQQQ")  # Magic, sub-bucket bits, value bits, total, min, max
+HGRM_SCALE = 1e-6  # .hgrm values are milliseconds, like labench's
+HGRM_HEADER = "Value    Percentile    TotalCount    1/(1-Percentile)\n\n"
+# Percentile rows of labench's logarithmic scale (TLBS/Code/bench/percentiles.go), so exports line up row by row
+HGRM_PERCENTILES = (
+    0.0, 10.0, 20.0, 30.0, 40.0, 50.0, 55.0, 60.0, 65.0, 70.0, 75.0, 77.5, 80.0, 82.5, 85.0, 87.5, 88.75, 90.0,
+    91.25, 92.5, 93.75, 94.375, 95.0, 95.625, 96.25, 96.875, 97.1875, 97.5, 97.8125, 98.125, 98.4375, 98.5938,
+    98.75, 98.9062, 99.0625, 99.2188, 99.2969, 99.375, 99.4531, 99.5313, 99.6094, 99.6484, 99.6875, 99.7266,
+    99.7656, 99.8047, 99.8242, 99.8437, 99.8633, 99.8828, 99.9023, 99.9121, 99.9219, 99.9316, 99.9414, 99.9512,
+    99.9561, 99.9609, 99.9658, 99.9707, 99.9756, 99.978, 99.9805, 99.9829, 99.9854, 99.9878, 99.989, 99.9902,
+    99.9915, 99.9927, 99.9939, 99.9945, 99.9951, 99.9957, 99.9963, 99.9969, 99.9973, 99.9976, 99.9979, 99.9982,
+    99.9985, 99.9986, 99.9988, 99.9989, 99.9991, 99.9992, 99.9993, 99.9994, 99.9995, 99.9996, 99.9997, 99.9998,
+    99.9999, 100.0,
+)
+
+
+class LatencyHistogram:
+    """Fixed-memory log-linear histogram of nanosecond values that merges across processes.
+
+    Same bucket layout as SERVER/histogram.py (both import common/log_linear.py). Instances pickle as ~9 KB of counts, so
+    worker processes can send theirs back to a coordinator to be added together.
+    """
+
+    __slots__ = ("counts", "total", "min_value", "max_value")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKET_COUNT))
+        self.total = 0
+        self.min_value = 0
+        self.max_value = 0
+
+    def __getstate__(self):
+        return self.counts.tobytes(), self.total, self.min_value, self.max_value
+
+    def __setstate__(self, state):
+        counts, self.total, self.min_value, self.max_value = state
+        self.counts = array("Q")
+        self.counts.frombytes(counts)
+
+    def record(self, value):
+        """Record a single value."""
+        self.counts[bucket_index(value)] += 1
+        if not self.total or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+        self.total += 1
+
+    def record_many(self, value, count):
+        """Record `count` occurrences of a value."""
+        if count <= 0:
+            return
+        self.counts[bucket_index(value)] += count
+        if not self.total or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+        self.total += count
+
+    def merge(self, other):
+        """Add another histogram's counts into this one."""
+        if not other.total:
+            return
+        mine = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                mine[index] += count
+        self.min_value = other.min_value if not self.total else min(self.min_value, other.min_value)
+        self.max_value = max(self.max_value, other.max_value)
+        self.total += other.total
+
+    def percentile(self, percentile):
+        """Return the value at the given percentile (0-100)."""
+        return percentile_from_counts(self.counts, self.total, percentile, self.max_value)
+
+    def summary(self, percentiles=(50, 90, 99, 99.9), scale=1e-6):
+        """Return count, percentiles and max, scaled (default: ns to ms)."""
+        result = {"count": self.total}
+        for percentile in percentiles:
+            result[percentile] = round(self.percentile(percentile) * scale, 3)
+        result[100] = round(self.max_value * scale, 3)
+        return result
+
+    def to_hgrm(self, percentiles=HGRM_PERCENTILES, scale=HGRM_SCALE):
+        """Return the distribution as .hgrm text (default: labench's rows, values in ms).
+
+        Unlike labench, the TotalCount column holds the count at or below each row's value,
+        and a trailing comment records the total so the file can be read back exactly.
+        """
+        lines = [HGRM_HEADER]
+        for percentile in percentiles:
+            value = self.percentile(percentile)
+            fraction = percentile / 100
+            inverse = f"{1 / (1 - fraction):f}" if fraction < 1 else "+Inf"
+            lines.append(f"{value * scale:f}    {fraction:f}        {self.count_at_or_below(value)}            {inverse}\n")
+        lines.append(f"#[Max = {self.max_value * scale:f}, Total count = {self.total}]\n")
+        return "".join(lines)
+
+    def count_at_or_below(self, value):
+        """Return how many recorded values fall in buckets up to the one holding `value`."""
+        if not self.total:
+            return 0
+        return sum(self.counts[:bucket_index(value) + 1])
+
+    @classmethod
+    def from_hgrm(cls, text, count=None, scale=HGRM_SCALE):
+        """Rebuild a histogram from .hgrm text (labench's or to_hgrm()'s).
+
+        labench leaves TotalCount at 0, so its files need the number of values they describe
+        (SuccessTotal in its console output) as `count`; it is ignored when the file has counts. Values between two rows are counted
+        at the upper row's value, so percentiles read back at or above the originals.
+        """
+        rows = []
+        recorded = 0  # Total from to_hgrm()'s trailing comment
+        for line in text.splitlines():
+            fields = line.split()
+            if line.startswith("#"):
+                if "Total count = " in line:
+                    recorded = int(line.split("Total count = ")[1].split("]")[0])
+                continue
+            try:
+                rows.append((float(fields[1]), int(round(float(fields[0]) / scale)), int(fields[2])))
+            except (IndexError, ValueError):
+                continue  # Header and blank lines
+        histogram = cls()
+        if not rows:
+            return histogram
+        count = recorded or rows[-1][2] or count  # Counts in the file take precedence
+        if not count:
+            raise ValueError("the .hgrm has no counts; pass the number of values it describes")
+        previous = 0
+        for fraction, value, _ in rows:
+            cumulative = int(round(fraction * count))
+            histogram.record_many(value, cumulative - previous)
+            previous = max(previous, cumulative)
+        histogram.record_many(rows[-1][1], count - histogram.total)  # Rounding leftovers belong to the maximum
+        histogram.min_value = min(histogram.min_value, rows[0][1])
+        return histogram
+
+    def save(self, path):
+        """Write the histogram to a compact .hist file (header plus compressed counts)."""
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, SUB_BUCKET_BITS, MAX_VALUE_BITS, self.total, self.min_value, self.max_value))
+            file.write(zlib.compress(self.counts.tobytes()))
+
+    @classmethod
+    def load(cls, path):
+        """Read a histogram written by save()."""
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, sub_bucket_bits, value_bits, total, min_value, max_value = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a latency histogram file")
+        if (sub_bucket_bits, value_bits) != (SUB_BUCKET_BITS, MAX_VALUE_BITS):
+            raise ValueError(f"{path} uses a different bucket layout ({sub_bucket_bits}/{value_bits} bits)")
+        histogram = cls()
+        histogram.__setstate__((zlib.decompress(data[HEADER.size:]), total, min_value, max_value))
+        return histogram
+
+
+class WorkerHistograms:
+    """One LatencyHistogram per worker, merged on demand.
+
+    Each worker only ever records into its own histogram, so recording takes no lock and
+    worker threads never contend; histograms are allocated on a worker's first value.
+
+    :param workers: Number of histograms; `record()` takes a worker index below this
+    """
+
+    def __init__(self, workers=1):
+        self.histograms = [None] * workers
+
+    def record(self, worker, value):
+        """Record one value for a worker."""
+        histogram = self.histograms[worker]
+        if histogram is None:
+            histogram = self.histograms[worker] = LatencyHistogram()
+        histogram.record(value)
+
+    def add(self, histogram):
+        """Include a histogram recorded elsewhere, such as by a worker process."""
+        self.histograms.append(histogram)
+
+    def merged(self):
+        """Return one histogram holding every worker's values."""
+        merged = LatencyHistogram()
+        for histogram in self.histograms:
+            if histogram is not None:
+                merged.merge(histogram)
+        return merged
+
+
+def load_histogram(path, count=None):
+    """Read a .hist file, or a .hgrm distribution (labench's needs `count`)."""
+    if path.endswith(".hgrm"):
+        with open(path) as file:
+            return LatencyHistogram.from_hgrm(file.read(), count)
+    return LatencyHistogram.load(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare and merge latency histograms from Python tools and labench.")
+    parser.add_argument("histograms", nargs="+", help=".hist files or .hgrm distributions")
+    parser.add_argument("--count", type=int, help="Values in each labench .hgrm (its SuccessTotal)")
+    parser.add_argument("--hgrm", help="Write the merged distribution to this .hgrm file")
+    parser.add_argument("--save", help="Write the merged histogram to this .hist file")
+    args = parser.parse_args()
+
+    merged = LatencyHistogram()
+    width = max(len(path) for path in args.histograms + ["merged"])
+    print(f"{'Histogram':<{width}} {'Count':>9} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'p99.9 ms':>10} {'Max ms':>10}")
+    rows = []
+    for path in args.histograms:
+        try:
+            histogram = load_histogram(path, args.count)
+        except ValueError as e:
+            parser.error(f"{path}: {e}")
+        merged.merge(histogram)
+        rows.append((path, histogram.summary()))
+    rows.append(("merged", merged.summary()))
+    for path, summary in rows:
+        print(f"{path:<{width}} {summary['count']:>9} {summary[50]:>10} {summary[90]:>10} {summary[99]:>10} "
+              f"{summary[99.9]:>10} {summary[100]:>10}")
+    if args.hgrm:
+        with open(args.hgrm, "w") as file:
+            file.write(merged.to_hgrm())
+    if args.save:
+        merged.save(args.save)
+
+
+if __name__ == "__main__":
+    main()
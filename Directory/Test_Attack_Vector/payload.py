@@ -1,24 +1,26 @@
 import threading  # For concurrent execution
 import requests  # For HTTP requests
 import time  # For time-based calculations
-import csv  # For logging to CSV
-from datetime import datetime  # For timestamping
-import random  # For generating random data payloads
+from connection_pool import PooledClient  # For keep-alive connection pools and reuse stats
+from async_engine import AsyncEngine  # For the asyncio engine
+from process_pool import run_processes  # For sharding the load across processes
+import os  # For the histogram file name
+from result_log import FAILED, ResultLog  # For buffered binary result records
+from latency_histogram import WorkerHistograms  # For lock-free per-worker latency histograms
+from payload_arena import PayloadArena  # For request bodies sliced from a prebuilt buffer
 
-# Default log file
-LOG_FILE = 'traffic_log.csv'
-
-# Initialize the log file with headers
-with open(LOG_FILE, mode='w', newline='') as file:
-    writer = csv.writer(file)
-    writer.writerow(["Timestamp", "Method", "Status_Code", "Response_Time", "Requests_Per_Second", "Packet_Size"])
+# Default log file (convert to CSV with: python result_log.py traffic_log.bin)
+LOG_FILE = 'traffic_log.bin'
 
 
 class TrafficSimulator:
     """Class for simulating HTTP traffic with advanced features."""
 
     def __init__(self, url, method, headers, data, params, rps, concurrency, timeout,
-                 burst_size, delay, ttl, max_packet_size, max_data_size, traffic_volume):
+                 burst_size, delay, ttl, max_packet_size, max_data_size, traffic_volume,
+                 keep_alive=True, pool_size=1, reconnect_every=0, dont_linger=False,
+                 engine="threads", http2=False, arrivals="constant", processes=1,
+                 log_file=LOG_FILE, corpus="filler", sizes="uniform"):
         """
         Initialize the traffic simulator.
         :param url: Target URL
@@ -26,7 +28,7 @@ class TrafficSimulator:
         :param headers: Request headers
         :param data: Payload
         :param params: Query parameters
-        :param rps: Requests per second
+        :param rps: Requests per second on the open-loop schedule (0 = closed-loop bursts)
         :param concurrency: Concurrent threads
         :param timeout: Request timeout
         :param burst_size: Number of requests per burst
@@ -35,11 +37,26 @@ class TrafficSimulator:
         :param max_packet_size: Max packet size in bytes
         :param max_data_size: Max data size per packet
         :param traffic_volume: Total traffic volume in bytes
+        :param keep_alive: Reuse connections between requests
+        :param pool_size: Connections kept per host in each worker's pool
+        :param reconnect_every: Open a new connection every N requests per worker (0 = never)
+        :param dont_linger: Close sockets without TIME_WAIT so ports are freed immediately
+        :param engine: "threads" (one thread per concurrent worker) or "asyncio" (one event loop,
+            concurrency is the in-flight request bound; suits 10k+ concurrent requests)
+        :param http2: Use HTTP/2 via httpx with the asyncio engine (needs httpx[http2])
+        :param arrivals: "constant", "poisson" or a file of send offsets (seconds), used when rps > 0
+        :param processes: Worker processes, each running the asyncio engine on its own event loop
+            with an exact share of the rate, concurrency and traffic volume
+        :param log_file: Binary result log; worker processes write one file each (traffic_log.<n>.bin)
+        :param corpus: Body corpus: "filler", "random", "json", "form" or a file path
+        :param sizes: Body size distribution: "uniform", "fixed:<n>", "lognormal:<median>[:<sigma>]"
+            or "empirical:<csv>"
         """
         self.url = url
         self.method = method.upper()
         self.headers = headers
         self.data = data
+        self.data_view = memoryview(data.encode()[:max_data_size]) if data else None  # User-provided body
         self.params = params
         self.rps = rps
         self.concurrency = concurrency
@@ -50,92 +67,125 @@ class TrafficSimulator:
         self.max_packet_size = max_packet_size
         self.max_data_size = max_data_size
         self.traffic_volume = traffic_volume
+        self.corpus = corpus
+        self.sizes = sizes
+        self.arena = PayloadArena(max_data_size, corpus, sizes)  # Built once; requests get slices of it
+        if self.arena.content_type and not any(name.lower() == "content-type" for name in headers):
+            self.headers = {"Content-Type": self.arena.content_type, **headers}
         self.sent_bytes = 0
-        self.request_count = 0
-        self.start_time_window = time.time()
-
-    def log_request(self, status_code, response_time, packet_size):
-        """Logs request details to a CSV file."""
-        current_time = time.time()
-        requests_per_second = self.request_count if current_time - self.start_time_window < 1 else 0
-
-        with open(LOG_FILE, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                datetime.now(),
-                self.method,
-                status_code,
-                response_time,
-                requests_per_second,
-                packet_size
-            ])
-
-        if current_time - self.start_time_window >= 1:
-            self.request_count = 1
-            self.start_time_window = current_time
-        else:
-            self.request_count += 1
+        self.lock = threading.Lock()  # Guards the byte budget across worker threads
+        self.log_file = log_file
+        self.results = None  # ResultLog, opened by start_simulation or the worker process
+        self.latencies = None  # WorkerHistograms opened alongside it; merged and saved next to the log
+        self.result_paths = [log_file]  # Logs written by the last run
+        self.engine = engine
+        self.arrivals = arrivals
+        self.http2 = http2
+        self.processes = processes
+        # The asyncio engine has its own connection pool and only shares the client's settings and stats
+        threaded = engine == "threads" and processes == 1
+        self.client = PooledClient(concurrency if threaded else 0, pool_size, keep_alive, reconnect_every, dont_linger)
+
+    def log_request(self, worker, status_code, start_ns, latency_ns, packet_size, method=None):
+        """Records request details in the worker's result buffer."""
+        self.results.record(worker, start_ns, latency_ns, packet_size, status_code, method or self.method)
+        if self.latencies is not None:
+            self.latencies.record(worker, latency_ns)
+
+    def report_latency(self):
+        """Prints the latency percentiles of the last run and saves its histogram next to the result log."""
+        if self.latencies is None:
+            return
+        histogram = self.latencies.merged()
+        path = os.path.splitext(self.log_file)[0] + ".hist"  # Merge or export with: python latency_histogram.py
+        histogram.save(path)
+        summary = histogram.summary()
+        print(f"Latency (ms): p50 {summary[50]}, p90 {summary[90]}, p99 {summary[99]}, p99.9 {summary[99.9]}, "
+              f"max {summary[100]} over {summary['count']} requests ({path})")
 
     def generate_random_payload(self):
-        """Generates a random payload to simulate variable packet sizes."""
-        data_size = random.randint(1, self.max_data_size)
-        payload = "X" * data_size  # Simulate random data with 'X' characters
-        return payload, data_size
+        """Returns the next body and its size: the user-provided data, else a slice of the payload arena."""
+        if self.data_view is not None:
+            return self.data_view, len(self.data_view)
+        return self.arena.take()
 
-    def send_request(self):
+    def send_request(self, worker=0):
         """Sends a single HTTP request with random payload and logs the response."""
-        if self.sent_bytes >= self.traffic_volume:
-            return
-
         payload, data_size = self.generate_random_payload()
-        if self.data:  # Use user-provided data if given, else use random payload
-            payload = self.data[:self.max_data_size]
-
-        start_time = time.time()
+        with self.lock:  # Reserve the bytes before sending so concurrent workers never overshoot the volume
+            remaining = self.traffic_volume - self.sent_bytes
+            if remaining <= 0:
+                return
+            if data_size > remaining:  # The last request takes exactly what is left of the budget
+                payload, data_size = payload[:remaining], remaining
+            self.sent_bytes += data_size
+
+        start_ns = time.time_ns()
+        start = time.perf_counter_ns()
         try:
-            response = requests.request(
+            response = self.client.request(
+                worker,
                 method=self.method,
                 url=self.url,
                 headers=self.headers,
-                data=payload,
+                data=bytes(payload),  # requests would treat a memoryview as a stream
                 params=self.params,
                 timeout=self.timeout
             )
-            response_time = round(time.time() - start_time, 2)
-            self.log_request(response.status_code, response_time, data_size)
+            self.log_request(worker, response.status_code, start_ns, time.perf_counter_ns() - start, data_size)
         except requests.exceptions.RequestException:
-            response_time = round(time.time() - start_time, 2)
-            self.log_request("Failed", response_time, data_size)
-
-        self.sent_bytes += data_size
+            self.log_request(worker, FAILED, start_ns, time.perf_counter_ns() - start, data_size)
 
     def start_simulation(self):
         """Starts the traffic simulation with burst and delay features."""
         print(f"\nSimulating traffic to {self.url}")
-        print(f"Method: {self.method}, Burst Size: {self.burst_size}, Delay: {self.delay}s")
+        if self.rps > 0:
+            print(f"Method: {self.method}, Rate: {self.rps} req/s, Arrivals: {self.arrivals}")
+        else:
+            print(f"Method: {self.method}, Burst Size: {self.burst_size}, Delay: {self.delay}s")
         print(f"Traffic Volume: {self.traffic_volume} bytes, TTL: {self.ttl}, Max Packet Size: {self.max_packet_size}")
+        print(f"Engine: {'asyncio' if self.processes > 1 else self.engine}{' (HTTP/2)' if self.http2 else ''}, "
+              f"Concurrency: {self.concurrency}, Processes: {self.processes}")
+        print(f"Keep-Alive: {self.client.keep_alive}, Pool Size: {self.client.pool_size}, "
+              f"Reconnect Every: {self.client.reconnect_every or 'never'}, Don't Linger: {self.client.dont_linger}")
         print("Press Ctrl+C to stop.\n")
 
-        interval = 1 / self.rps if self.rps > 0 else 0
-
-        def worker():
+        def worker(index):
             """Worker function for threading."""
             for _ in range(self.burst_size):
                 if self.sent_bytes < self.traffic_volume:
-                    self.send_request()
+                    self.send_request(index)
 
         try:
-            while self.sent_bytes < self.traffic_volume:
-                threads = []
-                for _ in range(self.concurrency):
-                    thread = threading.Thread(target=worker)
-                    threads.append(thread)
-                    thread.start()
-                for thread in threads:
-                    thread.join()
-                time.sleep(self.delay)  # Add delay between bursts
+            if self.processes == 1:
+                workers = self.concurrency if self.engine == "threads" else 1
+                self.results = ResultLog(self.log_file, workers=workers)
+                self.latencies = WorkerHistograms(workers)
+            if self.processes > 1:
+                schedule = run_processes(self, self.processes)
+                if schedule is not None:
+                    print("\n" + schedule.report())
+            elif self.engine == "asyncio" or self.rps > 0:  # Open-loop schedules always run on the event loop
+                AsyncEngine(self, self.http2, blocking=self.engine == "threads").run()
+            else:  # Closed-loop bursts on one thread per worker
+                while self.sent_bytes < self.traffic_volume:
+                    threads = []
+                    for index in range(self.concurrency):
+                        thread = threading.Thread(target=worker, args=(index,))
+                        threads.append(thread)
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                    time.sleep(self.delay)  # Add delay between bursts
         except KeyboardInterrupt:
             print("\nTraffic simulation stopped.")
+        finally:
+            self.client.close()
+            if self.results is not None:
+                self.results.close()
+            print("\n" + self.client.stats.report())  # Connection reuse and connect-time statistics
+            self.report_latency()
+            print(f"Results: {' '.join(self.result_paths)} (export: python result_log.py {' '.join(self.result_paths)})")
 
 
 def get_user_input():
@@ -157,8 +207,14 @@ def get_user_input():
     data = input("Enter data payload (optional): ").strip()
     params = eval(input("Enter query parameters as JSON (optional): ").strip() or "{}")
 
-    rps = float(input("Enter requests per second: ").strip())
-    concurrency = int(input("Enter concurrency level (threads): ").strip())
+    rps = float(input("Enter requests per second (0 = bursts without a schedule): ").strip() or 0)
+    arrivals = "constant"
+    if rps > 0:
+        arrivals = input("Arrivals: constant, poisson or a file of send offsets (default constant): ").strip() or "constant"
+    engine = "asyncio" if input("Engine: 1. threads  2. asyncio (default 1): ").strip() == "2" else "threads"
+    http2 = engine == "asyncio" and input("Use HTTP/2 (needs httpx[http2])? (y/N): ").strip().lower() == "y"
+    concurrency = int(input("Enter concurrency level (threads, or in-flight requests for asyncio): ").strip())
+    processes = int(input("Enter worker processes (default 1; more than 1 runs asyncio in each): ").strip() or 1)
     timeout = float(input("Enter request timeout (seconds): ").strip())
 
     burst_size = int(input("Enter burst size: ").strip())
@@ -167,8 +223,18 @@ def get_user_input():
     max_packet_size = int(input("Enter max packet size (bytes, default 1500): ").strip() or 1500)
     max_data_size = int(input("Enter max data size per packet (bytes, default 1000): ").strip() or 1000)
     traffic_volume = int(input("Enter total traffic volume (bytes, default 10000): ").strip() or 10_000)
-
-    return url, method, headers, data, params, rps, concurrency, timeout, burst_size, delay, ttl, max_packet_size, max_data_size, traffic_volume
+    corpus = input("Payload corpus: filler, random, json, form or a file path (default filler): ").strip() or "filler"
+    sizes = input("Payload sizes: uniform, fixed:<n>, lognormal:<median>[:<sigma>], empirical:<csv> "
+                  "(default uniform): ").strip() or "uniform"
+
+    keep_alive = input("Reuse connections with keep-alive? (Y/n): ").strip().lower() != "n"
+    pool_size = int(input("Enter connection pool size per worker (default 1): ").strip() or 1)
+    reconnect_every = int(input("Open a new connection every N requests (0 = never, default 0): ").strip() or 0)
+    dont_linger = input("Close sockets without lingering? (y/N): ").strip().lower() == "y"
+
+    return (url, method, headers, data, params, rps, concurrency, timeout, burst_size, delay, ttl, max_packet_size,
+            max_data_size, traffic_volume, keep_alive, pool_size, reconnect_every, dont_linger, engine, http2,
+            arrivals, processes, LOG_FILE, corpus, sizes)
 
 
 def main():
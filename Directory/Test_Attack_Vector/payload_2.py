@@ -1,33 +1,35 @@
 import threading
 import requests
 import time
-import csv
-from datetime import datetime
 import random
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
+from connection_pool import PooledClient
+from async_engine import AsyncEngine
+from process_pool import run_processes
+import os
+from result_log import FAILED, ResultLog
+from latency_histogram import WorkerHistograms
+from payload_arena import PayloadArena
 
-# Default log file
-LOG_FILE = 'traffic_log.csv'
-
-# Initialize the log file with headers
-with open(LOG_FILE, mode='w', newline='') as file:
-    writer = csv.writer(file)
-    writer.writerow([
-        "Timestamp", "Method", "Status_Code", "Response_Time", "Requests_Per_Second", "Packet_Size"
-    ])
+# Default log file (convert to CSV with: python result_log.py traffic_log.bin)
+LOG_FILE = 'traffic_log.bin'
 
 
 class TrafficSimulator:
     """Class for simulating HTTP traffic."""
 
     def __init__(self, url, method, headers, data, params, rps, concurrency, timeout,
-                 burst_size, delay, ttl, max_packet_size, max_data_size, traffic_volume, random_packets=False):
+                 burst_size, delay, ttl, max_packet_size, max_data_size, traffic_volume, random_packets=False,
+                 keep_alive=True, pool_size=1, reconnect_every=0, dont_linger=False,
+                 engine="threads", http2=False, arrivals="constant", processes=1,
+                 log_file=LOG_FILE, corpus="filler", sizes="uniform"):
         self.url = url
         self.method = method.upper()
         self.headers = headers
         self.data = data
+        self.data_view = memoryview(data.encode()[:max_data_size]) if data else None
         self.params = params
         self.rps = rps
         self.concurrency = concurrency
@@ -38,93 +40,126 @@ class TrafficSimulator:
         self.max_packet_size = max_packet_size
         self.max_data_size = max_data_size
         self.traffic_volume = traffic_volume
+        self.corpus = corpus  # "filler", "random", "json", "form" or a file path
+        self.sizes = sizes  # "uniform", "fixed:<n>", "lognormal:<median>[:<sigma>]" or "empirical:<csv>"
+        self.arena = PayloadArena(max_data_size, corpus, sizes)  # Built once; requests get slices of it
+        if self.arena.content_type and not any(name.lower() == "content-type" for name in headers):
+            self.headers = {"Content-Type": self.arena.content_type, **headers}
         self.sent_bytes = 0
-        self.request_count = 0
-        self.start_time_window = time.time()
+        self.lock = threading.Lock()  # Guards the byte budget across worker threads
+        self.log_file = log_file
+        self.results = None  # ResultLog, opened by start_simulation or the worker process
+        self.latencies = None  # WorkerHistograms opened alongside it; merged and saved next to the log
+        self.result_paths = [log_file]  # Logs written by the last run
         self.random_packets = random_packets
-
-    def log_request(self, status_code, response_time, packet_size):
-        current_time = time.time()
-        requests_per_second = self.request_count if current_time - self.start_time_window < 1 else 0
-
-        with open(LOG_FILE, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                datetime.now(),
-                self.method,
-                status_code,
-                response_time,
-                requests_per_second,
-                packet_size
-            ])
-
-        if current_time - self.start_time_window >= 1:
-            self.request_count = 1
-            self.start_time_window = current_time
-        else:
-            self.request_count += 1
+        self.engine = engine  # "threads" or "asyncio"
+        self.http2 = http2  # HTTP/2 via httpx (asyncio engine only)
+        self.arrivals = arrivals  # "constant", "poisson" or a file of send offsets, used when rps > 0
+        self.processes = processes  # Worker processes, each running the asyncio engine with a share of the load
+        # One pooled Session and result buffer per burst thread (or one for the event loop),
+        # plus one for the randomized packet worker
+        self.random_worker = concurrency if engine == "threads" and processes == 1 else 1
+        self.client = PooledClient(self.random_worker + 1, pool_size, keep_alive, reconnect_every, dont_linger)
+
+    def log_request(self, worker, status_code, start_ns, latency_ns, packet_size, method=None):
+        self.results.record(worker, start_ns, latency_ns, packet_size, status_code, method or self.method)
+        if self.latencies is not None:
+            self.latencies.record(worker, latency_ns)
+
+    def report_latency(self):
+        if self.latencies is None:
+            return
+        histogram = self.latencies.merged()
+        path = os.path.splitext(self.log_file)[0] + ".hist"
+        histogram.save(path)
+        summary = histogram.summary()
+        print(f"Latency (ms): p50 {summary[50]}, p90 {summary[90]}, p99 {summary[99]}, p99.9 {summary[99.9]}, "
+              f"max {summary[100]} over {summary['count']} requests ({path})")
 
     def generate_random_payload(self):
-        data_size = random.randint(1, self.max_data_size)
-        payload = "X" * data_size
-        return payload, data_size
-
-    def send_request(self, randomize=False):
-        if self.sent_bytes >= self.traffic_volume:
-            return
+        if self.data_view is not None:
+            return self.data_view, len(self.data_view)
+        return self.arena.take()
 
+    def send_request(self, randomize=False, worker=0):
         if randomize:
             self.url = f"http://example.com/api/{random.randint(1, 100)}"
             self.method = random.choice(["GET", "POST", "PUT", "DELETE", "PATCH"])
             self.headers = {"Random-Header": f"Value{random.randint(1, 100)}"}
-            self.data, _ = self.generate_random_payload()
 
         payload, data_size = self.generate_random_payload()
-        if self.data:
-            payload = self.data[:self.max_data_size]
-
-        start_time = time.time()
+        with self.lock:  # Reserve the bytes before sending so concurrent workers never overshoot the volume
+            remaining = self.traffic_volume - self.sent_bytes
+            if remaining <= 0:
+                return
+            if data_size > remaining:  # The last request takes exactly what is left of the budget
+                payload, data_size = payload[:remaining], remaining
+            self.sent_bytes += data_size
+
+        start_ns = time.time_ns()
+        start = time.perf_counter_ns()
         try:
-            response = requests.request(
+            response = self.client.request(
+                worker,
                 method=self.method,
                 url=self.url,
                 headers=self.headers,
-                data=payload,
+                data=bytes(payload),  # requests would treat a memoryview as a stream
                 params=self.params,
                 timeout=self.timeout
             )
-            response_time = round(time.time() - start_time, 2)
-            self.log_request(response.status_code, response_time, data_size)
+            self.log_request(worker, response.status_code, start_ns, time.perf_counter_ns() - start, data_size)
         except requests.exceptions.RequestException:
-            response_time = round(time.time() - start_time, 2)
-            self.log_request("Failed", response_time, data_size)
-
-        self.sent_bytes += data_size
+            self.log_request(worker, FAILED, start_ns, time.perf_counter_ns() - start, data_size)
 
     def start_simulation(self):
-        def worker():
+        def worker(index):
             for _ in range(self.burst_size):
                 if self.sent_bytes < self.traffic_volume:
-                    self.send_request()
+                    self.send_request(worker=index)
+
+        finished = threading.Event()  # Set once the main engine is done, so the random sender stops too
 
         def random_packet_worker():
-            while self.sent_bytes < self.traffic_volume:
-                self.send_request(randomize=True)
-                time.sleep(random.uniform(0.5, 3))
+            while self.sent_bytes < self.traffic_volume and not finished.is_set():
+                self.send_request(randomize=True, worker=self.random_worker)
+                finished.wait(random.uniform(0.5, 3))
 
+        random_thread = None
         try:
-            if self.random_packets:
-                threading.Thread(target=random_packet_worker).start()
-
-            while self.sent_bytes < self.traffic_volume:
-                threads = [threading.Thread(target=worker) for _ in range(self.concurrency)]
-                for thread in threads:
-                    thread.start()
-                for thread in threads:
-                    thread.join()
-                time.sleep(self.delay)
+            if self.processes == 1:
+                self.results = ResultLog(self.log_file, workers=self.random_worker + 1)
+                self.latencies = WorkerHistograms(self.random_worker + 1)
+            if self.random_packets and self.processes == 1:  # Sharded runs split the whole budget between processes
+                random_thread = threading.Thread(target=random_packet_worker)
+                random_thread.start()
+
+            if self.processes > 1:
+                schedule = run_processes(self, self.processes)
+                if schedule is not None:
+                    print("\n" + schedule.report())
+            elif self.engine == "asyncio" or self.rps > 0:  # Open-loop schedules always run on the event loop
+                AsyncEngine(self, self.http2, blocking=self.engine == "threads").run()
+            else:
+                while self.sent_bytes < self.traffic_volume:
+                    threads = [threading.Thread(target=worker, args=(index,)) for index in range(self.concurrency)]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                    time.sleep(self.delay)
         except KeyboardInterrupt:
             print("\nTraffic simulation stopped.")
+        finally:
+            finished.set()
+            if random_thread is not None:
+                random_thread.join(self.timeout + 3)  # Let its last request land in the log
+            self.client.close()
+            if self.results is not None:
+                self.results.close()
+            print("\n" + self.client.stats.report())
+            self.report_latency()
+            print(f"Results: {' '.join(self.result_paths)} (export: python result_log.py {' '.join(self.result_paths)})")
 
 
 class TrafficSimulatorGUI:
@@ -153,13 +188,43 @@ class TrafficSimulatorGUI:
         self.add_field(main_frame, "Delay (s):", "delay", "0", 9, randomize=True)
         self.add_field(main_frame, "Max Data Size:", "max_data_size", "1000", 10, randomize=True)
         self.add_field(main_frame, "Traffic Volume:", "traffic_volume", "10000", 11, randomize=True)
+        self.add_field(main_frame, "Pool Size / Worker:", "pool_size", "1", 12)
+        self.add_field(main_frame, "Reconnect Every N:", "reconnect_every", "0", 13)
+        ttk.Label(main_frame, text="Processes:").grid(row=6, column=3, sticky=tk.W, padx=5)
+        self.processes_entry = ttk.Entry(main_frame, width=20)
+        self.processes_entry.insert(0, "1")
+        self.processes_entry.grid(row=6, column=4, padx=5)
+
+        # Payload Corpus and Size Distribution
+        ttk.Label(main_frame, text="Payload Corpus:").grid(row=7, column=3, sticky=tk.W, padx=5)
+        self.corpus_var = tk.StringVar(value="filler")
+        ttk.Combobox(main_frame, textvariable=self.corpus_var, values=["filler", "random", "json", "form"], width=17).grid(row=7, column=4, padx=5)
+        ttk.Label(main_frame, text="Payload Sizes:").grid(row=8, column=3, sticky=tk.W, padx=5)
+        self.sizes_var = tk.StringVar(value="uniform")
+        ttk.Combobox(main_frame, textvariable=self.sizes_var, values=["uniform", "fixed:512", "lognormal:300:1.0", "empirical:sizes.csv"], width=17).grid(row=8, column=4, padx=5)
+
+        # Engine Selection
+        ttk.Label(main_frame, text="Engine:").grid(row=12, column=3, sticky=tk.W, padx=5)
+        self.engine_var = tk.StringVar(value="threads")
+        ttk.Combobox(main_frame, textvariable=self.engine_var, values=["threads", "asyncio"], width=17, state="readonly").grid(row=12, column=4, padx=5)
+        self.http2_var = tk.BooleanVar()
+        ttk.Checkbutton(main_frame, text="HTTP/2 (asyncio + httpx)", variable=self.http2_var).grid(row=13, column=3, columnspan=2, pady=5)
+        ttk.Label(main_frame, text="Arrivals (RPS > 0):").grid(row=5, column=3, sticky=tk.W, padx=5)
+        self.arrivals_var = tk.StringVar(value="constant")
+        ttk.Combobox(main_frame, textvariable=self.arrivals_var, values=["constant", "poisson"], width=17).grid(row=5, column=4, padx=5)
 
         # Randomized Packets Checkbox
         self.random_packets_var = tk.BooleanVar()
-        ttk.Checkbutton(main_frame, text="Enable Randomized Packets", variable=self.random_packets_var).grid(row=12, column=0, columnspan=3, pady=10)
+        ttk.Checkbutton(main_frame, text="Enable Randomized Packets", variable=self.random_packets_var).grid(row=14, column=0, columnspan=3, pady=10)
+
+        # Connection Checkboxes
+        self.keep_alive_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(main_frame, text="Keep-Alive (Reuse Connections)", variable=self.keep_alive_var).grid(row=15, column=0, columnspan=3, pady=5)
+        self.dont_linger_var = tk.BooleanVar()
+        ttk.Checkbutton(main_frame, text="Don't Linger", variable=self.dont_linger_var).grid(row=16, column=0, columnspan=3, pady=5)
 
         # Start Button
-        ttk.Button(main_frame, text="Start Simulation", command=self.start_simulation).grid(row=12, column=4, columnspan=2, pady=10)
+        ttk.Button(main_frame, text="Start Simulation", command=self.start_simulation).grid(row=14, column=4, columnspan=2, pady=10)
 
     def add_field(self, frame, label, var_name, default, row, randomize=False):
         ttk.Label(frame, text=label).grid(row=row, column=0, sticky=tk.W, padx=5)
@@ -192,7 +257,7 @@ class TrafficSimulatorGUI:
                 headers=eval(self.headers_entry.get()),
                 data=self.data_entry.get(),
                 params=eval(self.params_entry.get()),
-                rps=int(self.rps_entry.get()),
+                rps=float(self.rps_entry.get()),
                 concurrency=int(self.concurrency_entry.get()),
                 timeout=int(self.timeout_entry.get()),
                 burst_size=int(self.burst_size_entry.get()),
@@ -201,7 +266,17 @@ class TrafficSimulatorGUI:
                 max_packet_size=1500,
                 max_data_size=int(self.max_data_size_entry.get()),
                 traffic_volume=int(self.traffic_volume_entry.get()),
-                random_packets=self.random_packets_var.get()
+                random_packets=self.random_packets_var.get(),
+                keep_alive=self.keep_alive_var.get(),
+                pool_size=int(self.pool_size_entry.get()),
+                reconnect_every=int(self.reconnect_every_entry.get()),
+                dont_linger=self.dont_linger_var.get(),
+                engine=self.engine_var.get(),
+                http2=self.http2_var.get(),
+                arrivals=self.arrivals_var.get(),
+                processes=int(self.processes_entry.get()),
+                corpus=self.corpus_var.get(),
+                sizes=self.sizes_var.get()
             )
             threading.Thread(target=simulator.start_simulation).start()
             messagebox.showinfo("Info", "Traffic simulation started!")
@@ -0,0 +1,164 @@
+"""Request bodies sliced from one buffer built at startup.
+
+Corpora: "filler" ('X' bytes), "random" (random bytes), "json" (one whole JSON object per
+body, padded with trailing whitespace to the drawn size), "form" (url-encoded fields), or a
+path to a file whose contents are used as is. A JSON body is never shorter than the
+smallest record, so tiny drawn sizes are raised to it.
+
+Size distributions, given as a spec string:
+    uniform                  1 .. max size (the default)
+    fixed:<n>                always n bytes
+    lognormal:<median>[:<sigma>]
+    empirical:<csv path>     sizes drawn from a CSV column (Packet_Size when present, else the first)
+"""
+import bisect  # For finding the last record a full-size body can start at
+import csv  # For empirical size distributions
+import json  # For the JSON corpus
+import math  # For lognormal parameters
+import os  # For random bytes
+import random  # For offsets and sizes
+from urllib.parse import urlencode  # For the form corpus
+
+ARENA_SIZE = 4 * 1024 * 1024  # Minimum arena length; slices start anywhere a full-size body still fits
+CORPORA = ("filler", "random", "json", "form")  # Built-in corpora; anything else is a file path
+CONTENT_TYPES = {"json": "application/json", "form": "application/x-www-form-urlencoded"}
+ACTIONS = ("login", "logout", "search", "checkout", "update_profile", "upload", "comment")
+
+
+def json_record(rng, index):
+    """Return one JSON request body resembling an API call."""
+    return json.dumps({
+        "id": index,
+        "user": f"user{rng.randrange(100000)}",
+        "email": f"user{rng.randrange(100000)}@example.com",
+        "action": rng.choice(ACTIONS),
+        "items": [{"sku": f"SKU-{rng.randrange(10000):04d}", "qty": rng.randint(1, 5)} for _ in range(rng.randint(0, 4))],
+        "comment": " ".join(rng.choice(("lorem", "ipsum", "dolor", "sit", "amet", "quick", "brown", "fox"))
+                            for _ in range(rng.randint(0, 12))),
+        "ts": 1_700_000_000 + index,
+    }, separators=(",", ":")).encode()
+
+
+def form_record(rng, index):
+    """Return one url-encoded form body resembling a web form post."""
+    return urlencode({
+        "username": f"user{rng.randrange(100000)}",
+        "password": "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789") for _ in range(rng.randint(8, 16))),
+        "action": rng.choice(ACTIONS),
+        "redirect": f"/account/{rng.choice(ACTIONS)}?ref={index}",
+        "csrf_token": f"{rng.getrandbits(128):032x}",
+    }).encode()
+
+
+def build_json_corpus(length, max_size, rng):
+    """Return (buffer, sorted (record length, offset) pairs) of JSON records in `max_size` slots.
+
+    Each slot holds one record followed by spaces, so any slice from a slot's start that
+    covers its record is a single valid JSON document. Records that would not fit a slot
+    fall back to a bare {"id": n} object.
+    """
+    if max_size < 2:
+        raise ValueError("JSON bodies need a max size of at least 2 bytes")
+    slots = max(1, -(-length // max_size))
+    parts, records = [], []
+    for index in range(slots):
+        record = json_record(rng, index)
+        if len(record) > max_size:
+            record = json.dumps({"id": index}, separators=(",", ":")).encode()
+            if len(record) > max_size:
+                record = b"{}"
+        records.append((len(record), index * max_size))
+        parts.append(record.ljust(max_size))
+    records.sort()
+    return b"".join(parts), records
+
+
+def build_corpus(corpus, length, rng):
+    """Return (buffer, record start offsets or None) holding at least `length` bytes."""
+    if corpus == "filler":
+        return b"X" * length, None
+    if corpus == "random":
+        return os.urandom(length), None
+    if corpus == "form":
+        parts, starts, size = [], [], 0
+        while size < length:
+            record = form_record(rng, len(parts))
+            starts.append(size)
+            parts.append(record)
+            size += len(record) + 1
+        return b"&".join(parts) + b"&", starts
+    with open(corpus, "rb") as file:  # File corpus, repeated until it is long enough
+        content = file.read()
+    if not content:
+        raise ValueError(f"Payload corpus file {corpus} is empty")
+    return content * -(-length // len(content)) if len(content) < length else content, None
+
+
+def make_size_sampler(spec, max_size, rng):
+    """Return a function drawing body sizes in 1..max_size from a distribution spec."""
+    kind, _, argument = spec.partition(":")
+
+    def clamp(size):
+        return max(1, min(max_size, int(size)))
+
+    if kind == "uniform":
+        return lambda: int(rng.random() * max_size) + 1
+    if kind == "fixed":
+        size = clamp(argument or max_size)
+        return lambda: size
+    if kind == "lognormal":
+        median, _, sigma = argument.partition(":")
+        mu, sigma = math.log(float(median or max_size / 4)), float(sigma or 1.0)
+        return lambda: clamp(rng.lognormvariate(mu, sigma))
+    if kind == "empirical":
+        with open(argument, newline="") as file:
+            rows = list(csv.reader(file))
+        column = rows[0].index("Packet_Size") if rows and "Packet_Size" in rows[0] else 0
+        sizes = [clamp(float(row[column])) for row in rows if len(row) > column and row[column].replace(".", "", 1).isdigit()]
+        if not sizes:
+            raise ValueError(f"No sizes found in {argument}")
+        return lambda: rng.choice(sizes)
+    raise ValueError(f"Unknown size distribution {spec!r}")
+
+
+class PayloadArena:
+    """Hands out read-only memoryview slices of one prebuilt corpus buffer.
+
+    :param max_size: Largest body size
+    :param corpus: A CORPORA name or a file path
+    :param sizes: Size distribution spec (see module docstring)
+    """
+
+    def __init__(self, max_size, corpus="filler", sizes="uniform", seed=None):
+        self.rng = random.Random(seed)
+        self.max_size = max_size
+        self.corpus = corpus
+        self.content_type = CONTENT_TYPES.get(corpus)  # Default Content-Type for the corpus, if any
+        self.records = None  # Sorted (record length, slot offset) pairs of the JSON corpus
+        if corpus == "json":
+            buffer, self.records = build_json_corpus(max(ARENA_SIZE, 2 * max_size), max_size, self.rng)
+            self.record_lengths = [length for length, _ in self.records]
+            starts = None
+        else:
+            buffer, starts = build_corpus(corpus, max(ARENA_SIZE, 2 * max_size), self.rng)
+        self.view = memoryview(buffer)
+        self.starts = starts  # Record boundaries for structured corpora
+        # Bodies start anywhere a full-size body still fits, so take() needs no per-size bounds
+        last = len(buffer) - max_size
+        self.start_count = last + 1 if starts is None else max(1, bisect.bisect_right(starts, last))
+        self.sample_size = make_size_sampler(sizes, max_size, self.rng)
+
+    def take(self, size=None):
+        """Return (body view, size); structured corpora start bodies on a record boundary."""
+        if size is None:
+            size = self.sample_size()
+        if self.records is not None:  # A whole JSON record that fits, padded to `size`
+            fitting = bisect.bisect_right(self.record_lengths, size)
+            if not fitting:  # Every record is longer: send the shortest one as is
+                length, offset = self.records[0]
+                return self.view[offset:offset + length], length
+            offset = self.records[int(self.rng.random() * fitting)][1]
+            return self.view[offset:offset + size], size
+        index = int(self.rng.random() * self.start_count)
+        offset = index if self.starts is None else self.starts[index]
+        return self.view[offset:offset + size], size
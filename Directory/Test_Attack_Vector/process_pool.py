@@ -0,0 +1,117 @@
+import multiprocessing  # For worker processes, the start barrier and the result queue
+import queue  # For result-queue timeouts
+import sys  # For a failing exit status when a shard cannot start
+import threading  # For BrokenBarrierError
+
+from async_engine import AsyncEngine  # For each worker's event loop
+from latency_histogram import WorkerHistograms  # For each process's latency histogram
+from result_log import ResultLog, shard_path  # For one result log per process
+from scheduler import ScheduleStats  # For merging open-loop statistics
+
+# TrafficSimulator constructor arguments that are stored under the same attribute name
+SETTINGS = ("url", "method", "headers", "data", "params", "rps", "concurrency", "timeout", "burst_size", "delay",
+            "ttl", "max_packet_size", "max_data_size", "traffic_volume", "engine", "http2", "arrivals", "log_file",
+            "corpus", "sizes")
+RESULT_POLL = 1.0  # Seconds between liveness checks while waiting for results
+BARRIER_TIMEOUT = 60.0  # Seconds a shard waits for the others to finish setting up
+
+
+def split_evenly(total, parts):
+    """Split an integer into `parts` integers that differ by at most one and sum to `total`."""
+    share, extra = divmod(total, parts)
+    return [share + (1 if index < extra else 0) for index in range(parts)]
+
+
+def simulator_settings(simulator):
+    """Return the constructor arguments that rebuild `simulator` in another process."""
+    settings = {name: getattr(simulator, name) for name in SETTINGS}
+    client = simulator.client
+    settings.update(keep_alive=client.keep_alive, pool_size=client.pool_size,
+                    reconnect_every=client.reconnect_every, dont_linger=client.dont_linger)
+    return settings
+
+
+def run_shard(simulator_class, settings, shard, shards, barrier, results):
+    """Worker process: rebuild the simulator, wait for the others, run one event loop, report back."""
+    simulator = simulator_class(**settings)
+    simulator.results = ResultLog(shard_path(simulator.log_file, shard), worker_offset=shard)
+    simulator.latencies = WorkerHistograms()
+    engine = AsyncEngine(simulator, simulator.http2, shard=shard, shards=shards)
+    try:
+        barrier.wait(BARRIER_TIMEOUT)  # Every process starts sending at the same moment
+    except threading.BrokenBarrierError:  # Another shard died during setup, or setup took too long
+        print(f"Shard {shard}: not every process started; sending nothing")
+        simulator.results.close()
+        sys.exit(1)
+    try:
+        engine.run(report=False)
+    except KeyboardInterrupt:  # Ctrl+C reaches every process; report what was sent so far
+        pass
+    finally:
+        simulator.results.close()
+    results.put((shard, simulator.sent_bytes, engine.failed, simulator.client.stats, engine.schedule,
+                 simulator.latencies.merged()))
+
+
+def run_processes(simulator, processes):
+    """Run `simulator` sharded across `processes` processes and merge their results into it.
+
+    Each process gets an exact share of the traffic volume and the concurrency and, with
+    rps > 0, its share of the arrival schedule, and runs the asyncio engine on its own event
+    loop. Connection statistics are merged into `simulator.client.stats`, latency histograms
+    into `simulator.latencies`, `sent_bytes` is set to the total and `result_paths` to the
+    per-process result logs; the merged open-loop statistics are returned (None for bursts).
+    A Ctrl+C is re-raised once every worker's results are merged. If a shard dies before
+    the start barrier, the barrier is aborted so the others exit instead of waiting.
+    """
+    processes = max(1, min(processes, simulator.traffic_volume, simulator.concurrency))
+    context = multiprocessing.get_context()
+    barrier = context.Barrier(processes)
+    results = context.Queue()
+    settings = simulator_settings(simulator)
+    volumes = split_evenly(simulator.traffic_volume, processes)
+    concurrency = split_evenly(simulator.concurrency, processes)
+    workers = []
+    for shard in range(processes):
+        shard_settings = dict(settings, traffic_volume=volumes[shard], concurrency=concurrency[shard], engine="asyncio")
+        worker = context.Process(target=run_shard, name=f"shard-{shard}",
+                                 args=(type(simulator), shard_settings, shard, processes, barrier, results))
+        worker.start()
+        workers.append(worker)
+
+    collected = []
+    interrupted = False
+    while len(collected) < processes:  # Drain the queue before joining so no worker blocks on put()
+        try:
+            collected.append(results.get(timeout=RESULT_POLL))
+        except queue.Empty:
+            if any(worker.exitcode not in (None, 0) for worker in workers):
+                barrier.abort()  # A shard died, possibly before the barrier: release the ones waiting there
+            if not any(worker.is_alive() for worker in workers) and results.empty():
+                break  # A worker died without reporting
+        except KeyboardInterrupt:  # Workers stop on the same Ctrl+C; keep collecting what they sent
+            print("\nStopping worker processes...")
+            interrupted = True
+    for worker in workers:
+        worker.join()
+
+    schedule = None
+    simulator.sent_bytes = 0
+    simulator.result_paths = [shard_path(simulator.log_file, shard) for shard in range(processes)]
+    simulator.latencies = WorkerHistograms(0)
+    for shard, sent_bytes, failed, stats, shard_schedule, latencies in sorted(collected, key=lambda result: result[0]):
+        print(f"Process {shard}: {stats.requests} requests, {sent_bytes} bytes, {failed} failed")
+        simulator.sent_bytes += sent_bytes
+        simulator.client.stats.merge(stats)
+        simulator.latencies.add(latencies)
+        if shard_schedule is not None:
+            if schedule is None:
+                schedule = ScheduleStats(shard_schedule.tolerance_ns)
+            schedule.merge(shard_schedule)
+    if len(collected) < processes:
+        print(f"{processes - len(collected)} worker process(es) exited without reporting")
+    if interrupted:  # Results are merged; let the caller stop instead of carrying on
+        if schedule is not None:
+            print("\n" + schedule.report())
+        raise KeyboardInterrupt
+    return schedule
@@ -0,0 +1,300 @@
+"""Declarative traffic profiles: timed phases of ramp, step, spike, sine, soak and replay.
+
+    python profiles.py profile_day.yaml [--url URL] [--engine asyncio|threads] [--report phases.json]
+
+A profile is a YAML mapping with a target `url`, optional `headers`, `timeout`, `defaults`
+applied to every phase, and a list of `phases` run back to back on one timeline:
+
+    ramp    rate goes linearly from `from` to `to`
+    step    `steps` equal stairs from `from` to `to`
+    spike   `rate`, jumping to `peak` for `spike` seconds starting at `at`
+    sine    `rate` +/- `amplitude` over `period` seconds
+    soak    constant `rate`
+    replay  send times, methods and sizes of an exported traffic_log.csv (`file`, `speed`)
+
+Every phase may set its own `duration`, `concurrency`, `arrivals` (constant or poisson),
+`methods` and `urls` mixes ({value: weight} or a list), and payload `corpus`, `sizes` and
+`max_size`. Phases start at their scheduled time whatever is still in flight, and each
+gets its own timeliness, latency, status and throughput report.
+
+With a `labels` CSV (or --labels) every request carries a ground-truth ID and phases may
+mix in attacks with `attack_ratio`, `attacks`, `flood_burst` and `attack_sources` (see
+traffic_mix.py); run one phase per load level and score the sensor with score.py.
+"""
+import argparse  # For the command line
+import asyncio  # For waiting on phase boundaries
+import csv  # For replaying exported logs
+import itertools  # For weighted choices
+import json  # For the per-phase report file
+import math  # For sine phases
+import random  # For arrivals and mixes
+import time  # For the phase timeline
+from datetime import datetime  # For replay timestamps
+from urllib.parse import urljoin  # For URL mixes relative to the target
+
+import yaml  # For profile files
+
+from async_engine import AsyncEngine  # For sending on the event loop
+from payload import LOG_FILE, TrafficSimulator  # For transport settings, result logging and connection stats
+from payload_arena import PayloadArena  # For per-phase payload distributions
+from result_log import FAILED, ResultLog  # For per-request result records
+from scheduler import OpenLoopScheduler  # For per-phase open-loop schedules
+from traffic_mix import ATTACK_SOURCES, FLOOD_SOURCE, TRUTH_HEADER, LabelLog, TrafficMix  # For labelled traffic
+
+PHASE_TYPES = ("ramp", "step", "spike", "sine", "soak", "replay")
+PHASE_DEFAULTS = {"concurrency": 100, "arrivals": "constant", "corpus": "filler", "sizes": "uniform",
+                  "max_size": 1000, "methods": ["GET"], "urls": [""]}
+IDLE_STEP = 0.01  # Seconds skipped at a time while a phase's rate is zero
+
+
+def weighted(mix):
+    """Return (values, cumulative weights) from {value: weight}, a list or a single value."""
+    if isinstance(mix, dict):
+        values, weights = list(mix), [float(weight) for weight in mix.values()]
+    else:
+        values = list(mix) if isinstance(mix, list) else [mix]
+        weights = [1.0] * len(values)
+    return values, list(itertools.accumulate(weights))
+
+
+def rate_function(kind, settings, duration):
+    """Return (rate at phase time t, peak rate) for a synthetic phase."""
+    if kind == "ramp":
+        start, end = float(settings["from"]), float(settings["to"])
+        return (lambda t: start + (end - start) * t / duration), max(start, end)
+    if kind == "step":
+        start, end, steps = float(settings["from"]), float(settings["to"]), int(settings.get("steps", 4))
+        size = (end - start) / max(1, steps - 1)
+        return (lambda t: start + size * min(steps - 1, int(t / duration * steps))), max(start, end)
+    if kind == "spike":
+        base, peak = float(settings["rate"]), float(settings["peak"])
+        width = float(settings.get("spike", duration / 10))
+        at = float(settings.get("at", (duration - width) / 2))
+        return (lambda t: peak if at <= t < at + width else base), max(base, peak)
+    if kind == "sine":
+        mean, amplitude = float(settings["rate"]), float(settings["amplitude"])
+        period = float(settings.get("period", duration))
+        return (lambda t: max(0.0, mean + amplitude * math.sin(2 * math.pi * t / period))), mean + abs(amplitude)
+    rate = float(settings["rate"])  # soak
+    return (lambda t: rate), rate
+
+
+def load_replay(path, speed):
+    """Return [(offset seconds, method, size)] from an exported traffic_log.csv, scaled by `speed`."""
+    events = []
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            completed = datetime.fromisoformat(row["Timestamp"]).timestamp()
+            events.append((completed - float(row["Response_Time"] or 0), row["Method"], int(row["Packet_Size"])))
+    if not events:
+        raise ValueError(f"{path} has no requests to replay")
+    events.sort()
+    first = events[0][0]
+    return [((sent - first) / speed, method, size) for sent, method, size in events]
+
+
+class Phase:
+    """One timed phase of a profile with its own schedule, mixes, payloads and metrics."""
+
+    def __init__(self, spec, defaults, target, index):
+        settings = {**PHASE_DEFAULTS, **defaults, **spec}
+        self.kind = settings.get("type")
+        if self.kind not in PHASE_TYPES:
+            raise ValueError(f"Phase {index}: type must be one of {', '.join(PHASE_TYPES)}")
+        self.name = settings.get("name", f"{self.kind}-{index}")
+        self.concurrency = int(settings["concurrency"])
+        self.process = settings["arrivals"]
+        self.methods, self.method_weights = weighted(settings["methods"])
+        urls, self.url_weights = weighted(settings["urls"])
+        self.urls = [urljoin(target, url) for url in urls]
+        self.arena = PayloadArena(int(settings["max_size"]), settings["corpus"], settings["sizes"])
+        self.rng = random.Random(settings.get("seed"))
+        self.mix = TrafficMix(settings.get("attack_ratio", 0.0), settings.get("attacks", ("sqli", "xss", "traversal")),
+                              settings.get("flood_burst", 20), settings.get("attack_sources", ATTACK_SOURCES),
+                              settings.get("flood_source", FLOOD_SOURCE))
+        self.replay = None
+        if self.kind == "replay":
+            self.replay = load_replay(settings["file"], float(settings.get("speed", 1.0)))
+            self.duration = float(settings.get("duration", self.replay[-1][0] + IDLE_STEP))
+            self.peak = len(self.replay) / max(self.duration, IDLE_STEP)
+        else:
+            self.duration = float(settings["duration"])
+            self.rate, self.peak = rate_function(self.kind, settings, self.duration)
+        self.replayed = iter(())  # (method, size) of replayed requests, consumed in step with arrivals()
+        self.stats = None  # scheduler.ScheduleStats, set when the phase runs
+        self.statuses = {}  # Status class ("2xx", "failed") -> requests
+        self.sent_bytes = 0
+
+    def arrivals(self):
+        """Yield send offsets (seconds into the phase) until the phase ends."""
+        if self.replay is not None:
+            events = [event for event in self.replay if event[0] < self.duration]
+            self.replayed = iter([(method, size) for _, method, size in events])
+            yield from (offset for offset, _, _ in events)
+            return
+        offset = 0.0
+        while offset < self.duration:
+            if self.process == "poisson":  # Thinning: candidates at the peak rate, kept with probability rate/peak
+                offset += self.rng.expovariate(self.peak) if self.peak > 0 else self.duration
+                if offset < self.duration and self.rng.random() * self.peak < self.rate(offset):
+                    yield offset
+                continue
+            rate = self.rate(offset)
+            if rate <= 0:
+                offset += IDLE_STEP
+                continue
+            yield offset
+            offset += 1 / rate
+
+    def next_request(self, engine, simulator, labels=None):
+        """Return the scheduler callback that builds each tick's requests, labelled when `labels` is given."""
+        rng = self.rng
+
+        def next_request():
+            if self.replay is not None:
+                method, size = next(self.replayed)
+                body, size = self.arena.take(max(1, min(size, self.arena.max_size)))
+            else:
+                method = rng.choices(self.methods, cum_weights=self.method_weights)[0]
+                body, size = self.arena.take()
+            url = rng.choices(self.urls, cum_weights=self.url_weights)[0]
+            if labels is None:
+                batch = [(method, url, body, size, None)]
+            else:
+                batch = []
+                for label, kind, source, method, url, body in self.mix.requests(rng, method, url, body):
+                    traffic_id = labels.record(self.name, self.peak, label, kind, source)
+                    headers = {**simulator.headers, TRUTH_HEADER: traffic_id, "User-Agent": source}
+                    batch.append((method, url, body, len(body), headers))
+            for item in batch:
+                simulator.sent_bytes += item[3]
+                self.sent_bytes += item[3]
+
+            async def send(intended, method, url, body, size, headers):
+                status = await engine.send(body, size, intended, method, url, headers)
+                key = "failed" if status == FAILED else f"{status // 100}xx"
+                self.statuses[key] = self.statuses.get(key, 0) + 1
+
+            async def request(intended):
+                if len(batch) == 1:
+                    await send(intended, *batch[0])
+                else:  # Flood burst: everything at once
+                    await asyncio.gather(*(send(intended, *item) for item in batch))
+
+            return request
+
+        return next_request
+
+    def summary(self):
+        """Return this phase's metrics."""
+        stats = self.stats.summary()
+        return {
+            "name": self.name, "type": self.kind, "duration_s": self.duration,
+            "requests": sum(self.statuses.values()), "bytes": self.sent_bytes, "achieved_rps": stats["achieved_rps"],
+            "timely_sends_ratio": stats["timely_sends_ratio"], "latency_ms": stats["latency_ms"],
+            "statuses": dict(sorted(self.statuses.items())),
+        }
+
+
+class ProfileRunner:
+    """Runs the phases of a profile back to back on one timeline through an AsyncEngine."""
+
+    def __init__(self, simulator, profile, labels=None):
+        self.simulator = simulator
+        self.labels = labels or profile.get("labels")  # Label CSV path; None sends unlabelled traffic
+        defaults = profile.get("defaults", {})
+        self.phases = [Phase(spec, defaults, simulator.url, index) for index, spec in enumerate(profile["phases"])]
+        self.stopped = False  # Interrupted with Ctrl+C
+
+    async def execute(self, engine):
+        """Engine workload: run the phases with a fresh label log when labelling is on."""
+        labels = LabelLog(self.labels) if self.labels else None
+        try:
+            await self.run_phases(engine, labels)
+        finally:
+            if labels is not None:
+                labels.close()
+
+    async def run_phases(self, engine, labels):
+        """Tick every phase at its scheduled time, then drain in-flight requests."""
+        pending = set()
+        phase_start = time.perf_counter_ns()
+        for phase in self.phases:
+            print(f"Phase {phase.name} ({phase.kind}, {phase.duration:g}s, up to {phase.peak:g} req/s)", flush=True)
+            scheduler = OpenLoopScheduler(phase.arrivals(), phase.concurrency, tolerance=1 / max(phase.peak, 1e-9))
+            phase.stats = scheduler.stats
+            next_request = phase.next_request(engine, self.simulator, labels)
+            pending |= await scheduler.run(next_request, start_ns=phase_start, drain=False)
+            phase_start += int(phase.duration * 1e9)
+            phase.stats.finished_ns = phase_start  # Rates are reported over the planned phase window
+            wait = phase_start - time.perf_counter_ns()
+            if wait > 0:  # Arrivals ended early: hold the next phase until its start time
+                await asyncio.sleep(wait / 1e9)
+        pending = {task for task in pending if not task.done()}
+        if pending:
+            await asyncio.wait(pending)
+
+    def run(self):
+        """Run the profile and return the per-phase summaries."""
+        simulator = self.simulator
+        simulator.results = ResultLog(simulator.log_file, workers=simulator.concurrency)
+        engine = AsyncEngine(simulator, simulator.http2, blocking=simulator.engine == "threads")
+        try:
+            engine.run(report=False, workload=self.execute)
+        except KeyboardInterrupt:
+            print("\nProfile stopped.")
+            self.stopped = True
+        finally:
+            simulator.client.close()
+            simulator.results.close()
+        return [phase.summary() for phase in self.phases if phase.stats is not None]
+
+
+def format_report(summaries):
+    """Return the per-phase summaries as a printable table."""
+    lines = [f"{'Phase':<16} {'Type':<7} {'Secs':>6} {'Requests':>9} {'Req/s':>9} {'Timely':>7} "
+             f"{'p50 ms':>9} {'p99 ms':>9}  Statuses"]
+    for phase in summaries:
+        latency = phase["latency_ms"]
+        statuses = ", ".join(f"{key} {count}" for key, count in phase["statuses"].items())
+        lines.append(f"{phase['name'][:16]:<16} {phase['type']:<7} {phase['duration_s']:>6g} {phase['requests']:>9} "
+                     f"{phase['achieved_rps']:>9} {phase['timely_sends_ratio']:>7.1%} {latency[50]:>9} {latency[99]:>9}"
+                     f"  {statuses}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a YAML traffic profile against a target.")
+    parser.add_argument("profile", help="Profile YAML file")
+    parser.add_argument("--url", help="Override the profile's target URL")
+    parser.add_argument("--engine", choices=("asyncio", "threads"), default="asyncio")
+    parser.add_argument("--log-file", default=LOG_FILE, help="Binary result log")
+    parser.add_argument("--report", help="Write the per-phase metrics to this JSON file")
+    parser.add_argument("--labels", help="Label every request and write the ground truth to this CSV")
+    args = parser.parse_args()
+
+    with open(args.profile) as file:
+        profile = yaml.safe_load(file)
+    defaults = {**PHASE_DEFAULTS, **profile.get("defaults", {})}
+    concurrency = sum(int(phase.get("concurrency", defaults["concurrency"])) for phase in profile["phases"])
+    simulator = TrafficSimulator(
+        args.url or profile["url"], "GET", profile.get("headers", {}), "", profile.get("params", {}), 0,
+        concurrency, float(profile.get("timeout", 5)), 1, 0, 64, 1500, int(defaults["max_size"]), 0,
+        engine=args.engine, log_file=args.log_file,
+    )
+    runner = ProfileRunner(simulator, profile, args.labels)
+    print(f"Running profile {profile.get('name', args.profile)} against {simulator.url} "
+          f"({sum(phase.duration for phase in runner.phases):g}s, {len(runner.phases)} phases)")
+    summaries = runner.run()
+    print("\n" + format_report(summaries))
+    print("\n" + simulator.client.stats.report())
+    print(f"Results: {args.log_file} (export: python result_log.py {args.log_file})")
+    if runner.labels:
+        print(f"Labels: {runner.labels} (score: python score.py {runner.labels} <sensor verdict logs>)")
+    if args.report:
+        with open(args.report, "w") as file:
+            json.dump(summaries, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Binary per-request result log written by TrafficSimulator, with a CSV exporter.
+
+The file is a 16-byte header followed by fixed-size little-endian records, so it can be
+memory-mapped directly, e.g. with numpy:
+
+    numpy.memmap("traffic_log.bin", dtype=NUMPY_DTYPE, offset=HEADER.size)
+
+Export to the CSV format of earlier versions with:
+
+    python result_log.py traffic_log.bin [more.bin ...] -o traffic_log.csv
+"""
+import argparse  # For the exporter command line
+import csv  # For the CSV export
+import mmap  # For reading logs without loading them
+import os  # For empty-file checks
+import struct  # For the record layout
+import threading  # For serializing chunk writes
+from datetime import datetime  # For CSV timestamps
+
+MAGIC = b"TRAFLOG1"  # File signature and format version
+HEADER = struct.Struct("<8sII")  # Magic, record size, reserved
+RECORD = struct.Struct("<qqIHHB7x")  # Send time ns, latency ns, bytes, status, worker, method; 32 bytes aligned
+NUMPY_DTYPE = [("timestamp_ns", "<i8"), ("latency_ns", "<i8"), ("bytes", "<u4"), ("status", "<u2"),
+               ("worker", "<u2"), ("method", "u1"), ("reserved", "V7")]
+FAILED = 0  # Status recorded for requests that got no response
+METHODS = ("GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS")  # Method codes are indexes into this
+METHOD_CODES = {method: code for code, method in enumerate(METHODS)}
+UNKNOWN_METHOD = 255
+CHUNK_RECORDS = 4096  # Records buffered per worker before a write (128 KiB)
+CSV_COLUMNS = ["Timestamp", "Method", "Status_Code", "Response_Time", "Requests_Per_Second", "Packet_Size"]
+
+
+def shard_path(path, shard):
+    """Return the log path of one worker process: traffic_log.bin -> traffic_log.<shard>.bin."""
+    root, extension = os.path.splitext(path)
+    return f"{root}.{shard}{extension}"
+
+
+class ResultLog:
+    """Preallocated per-worker record buffers flushed to one file in large chunks.
+
+    Each worker only ever touches its own buffer, so recording takes no lock; the lock
+    is held only while a full chunk is written.
+
+    :param path: Output file, truncated on open
+    :param workers: Number of buffers; `record()` takes a worker index below this
+    :param worker_offset: Added to the worker index stored in each record (process shard base)
+    """
+
+    def __init__(self, path, workers=1, worker_offset=0, chunk_records=CHUNK_RECORDS):
+        self.path = path
+        self.worker_offset = worker_offset
+        self.chunk_records = chunk_records
+        self.buffers = [bytearray(RECORD.size * chunk_records) for _ in range(workers)]
+        self.fill = [0] * workers  # Records waiting in each buffer
+        self.records = 0  # Records written to the file
+        self.lock = threading.Lock()
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, RECORD.size, 0))
+
+    def record(self, worker, start_ns, latency_ns, size, status, method):
+        """Append one request to the worker's buffer (status FAILED when there was no response)."""
+        count = self.fill[worker]
+        RECORD.pack_into(self.buffers[worker], count * RECORD.size, start_ns, latency_ns, size, status,
+                         worker + self.worker_offset, METHOD_CODES.get(method, UNKNOWN_METHOD))
+        count += 1
+        if count == self.chunk_records:
+            self.flush(worker, count)
+            count = 0
+        self.fill[worker] = count
+
+    def flush(self, worker, count):
+        """Write the first `count` records of a worker's buffer."""
+        with self.lock:
+            self.file.write(memoryview(self.buffers[worker])[:count * RECORD.size])
+            self.records += count
+
+    def close(self):
+        """Write every partial buffer and close the file."""
+        for worker, count in enumerate(self.fill):
+            if count:
+                self.flush(worker, count)
+                self.fill[worker] = 0
+        self.file.close()
+
+
+def iter_records(path):
+    """Yield (send time ns, latency ns, bytes, status, worker, method) from a log, via mmap."""
+    if os.path.getsize(path) <= HEADER.size:
+        return
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        magic, record_size, _ = HEADER.unpack_from(mapped)
+        if magic != MAGIC or record_size != RECORD.size:
+            raise ValueError(f"{path} is not a traffic result log")
+        view = memoryview(mapped)
+        end = HEADER.size + (len(mapped) - HEADER.size) // RECORD.size * RECORD.size  # Ignore a torn tail
+        try:
+            for timestamp, latency, size, status, worker, method in RECORD.iter_unpack(view[HEADER.size:end]):
+                yield timestamp, latency, size, status, worker, METHODS[method] if method < len(METHODS) else "?"
+        finally:
+            view.release()
+
+
+def export_csv(paths, csv_path):
+    """Merge result logs into a CSV in completion order with the historical columns; return the row count."""
+    rows = sorted((record for path in paths for record in iter_records(path)), key=lambda record: record[0] + record[1])
+    window_start = None  # Start of the current one-second window (ns)
+    in_window = 0  # Requests completed so far in that window
+    with open(csv_path, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_COLUMNS)
+        for timestamp, latency, size, status, _, method in rows:
+            completed = timestamp + latency
+            if window_start is None or completed - window_start >= 1_000_000_000:
+                window_start, in_window = completed, 0
+            in_window += 1
+            writer.writerow([
+                datetime.fromtimestamp(completed / 1e9),
+                method,
+                status if status != FAILED else "Failed",
+                round(latency / 1e9, 2),
+                in_window,
+                size,
+            ])
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert traffic result logs to CSV.")
+    parser.add_argument("paths", nargs="+", help="Binary result logs (one per worker process)")
+    parser.add_argument("-o", "--output", default="traffic_log.csv", help="CSV file to write")
+    args = parser.parse_args()
+    count = export_csv(args.paths, args.output)
+    print(f"Wrote {count} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Saturation search: find the highest sustained request rate that still meets the SLOs.
+
+    python saturation.py --url http://target:8080/ --min-rate 100 --max-rate 20000 --p99-ms 50
+    python saturation.py --profile profile_day.yaml --search step --step-factor 1.5 --repeats 3
+
+Every trial is a warm-up followed by a measured soak at one offered rate (see profiles.py).
+A rate passes when every repeat meets the p99 latency (measured from the intended send
+time), error rate (failed requests and 5xx) and timely-send ratio SLOs.
+
+    binary  check the maximum rate, then bisect between the highest pass and the lowest fail
+    step    multiply the rate from the minimum until a trial fails, then bisect that interval
+
+Searches stop once the pass/fail interval is narrower than --resolution. The report lists
+every trial as a throughput/latency curve and names the saturation point; --report also
+writes it as JSON, and --curve as CSV.
+"""
+import argparse  # For the command line
+import csv  # For the curve export
+import json  # For the report file
+import os  # For per-trial result log names
+import statistics  # For combining repeats
+import time  # For cool-down between trials
+
+import yaml  # For reusing a profile's target and defaults
+
+from payload import LOG_FILE, TrafficSimulator  # For transport settings, result logging and connection stats
+from profiles import PHASE_DEFAULTS, ProfileRunner  # For warm-up and measured phases
+
+SEARCHES = ("binary", "step")
+CURVE_COLUMNS = ["offered_rps", "achieved_rps", "p50_ms", "p99_ms", "error_rate", "timely_sends_ratio", "passed"]
+
+
+class SaturationSearch:
+    """Runs trials at chosen rates and searches for the highest rate that meets every SLO.
+
+    :param simulator: TrafficSimulator with the target, headers and transport settings
+    :param defaults: Phase settings applied to every trial (concurrency, arrivals, mixes, payloads)
+    :param slo: Dict with p99_ms, error_rate and timely_ratio limits
+    :param duration: Measured seconds per trial
+    :param warmup: Seconds sent at the trial rate before measuring
+    :param repeats: Trials per rate; all of them must pass
+    :param cooldown: Idle seconds between trials
+    """
+
+    def __init__(self, simulator, defaults, slo, duration=10, warmup=3, repeats=1, cooldown=2):
+        self.simulator = simulator
+        self.defaults = defaults
+        self.slo = slo
+        self.duration = duration
+        self.warmup = warmup
+        self.repeats = repeats
+        self.cooldown = cooldown
+        self.log_file = simulator.log_file
+        self.trials = 0
+        self.results = {}  # Offered rate -> combined result of its repeats
+
+    def trial(self, rate):
+        """Run one warm-up plus measured phase at `rate` and return the measured phase's metrics."""
+        if self.trials and self.cooldown:
+            time.sleep(self.cooldown)
+        root, extension = os.path.splitext(self.log_file)
+        self.simulator.log_file = f"{root}.trial{self.trials}{extension}"
+        self.trials += 1
+        phases = [{"name": "measure", "type": "soak", "rate": rate, "duration": self.duration}]
+        if self.warmup:
+            phases.insert(0, {"name": "warm-up", "type": "soak", "rate": rate, "duration": self.warmup})
+        runner = ProfileRunner(self.simulator, {"defaults": self.defaults, "phases": phases})
+        measured = runner.run()[-1]
+        if runner.stopped:
+            raise KeyboardInterrupt
+        requests = measured["requests"]
+        errors = sum(count for key, count in measured["statuses"].items() if key in ("failed", "5xx"))
+        return {
+            "achieved_rps": measured["achieved_rps"], "p50_ms": measured["latency_ms"][50],
+            "p99_ms": measured["latency_ms"][99], "error_rate": round(errors / requests, 4) if requests else 1.0,
+            "timely_sends_ratio": measured["timely_sends_ratio"],
+        }
+
+    def passes(self, result):
+        """Return whether one trial's metrics meet every SLO."""
+        slo = self.slo
+        return (result["p99_ms"] <= slo["p99_ms"] and result["error_rate"] <= slo["error_rate"]
+                and result["timely_sends_ratio"] >= slo["timely_ratio"])
+
+    def evaluate(self, rate):
+        """Run every repeat at `rate`; record the median metrics and return whether all repeats passed."""
+        rate = round(rate, 2)
+        if rate in self.results:
+            return self.results[rate]["passed"]
+        runs = []
+        for repeat in range(self.repeats):
+            result = self.trial(rate)
+            runs.append(result)
+            verdict = "pass" if self.passes(result) else "FAIL"
+            print(f"  {rate:g} req/s, run {repeat + 1}/{self.repeats}: achieved {result['achieved_rps']}, "
+                  f"p99 {result['p99_ms']} ms, errors {result['error_rate']:.2%}, "
+                  f"timely {result['timely_sends_ratio']:.1%} -> {verdict}", flush=True)
+            if verdict == "FAIL":
+                break  # One failed repeat fails the rate
+        combined = {key: round(statistics.median(run[key] for run in runs), 4) for key in runs[0]}
+        combined.update(offered_rps=rate, passed=all(self.passes(run) for run in runs), repeats=len(runs))
+        self.results[rate] = combined
+        return combined["passed"]
+
+    def search(self, low, high, resolution, mode="binary", step_factor=2.0):
+        """Return the highest passing rate in [low, high] (None when even `low` fails)."""
+        print(f"Checking minimum rate {low:g} req/s", flush=True)
+        if not self.evaluate(low):
+            return None
+        passed, failed = low, None
+        if mode == "step":
+            rate = low
+            while failed is None and rate < high:
+                rate = min(high, rate * step_factor)
+                print(f"Stepping up to {rate:g} req/s", flush=True)
+                if self.evaluate(rate):
+                    passed = rate
+                else:
+                    failed = rate
+        else:
+            print(f"Checking maximum rate {high:g} req/s", flush=True)
+            if self.evaluate(high):
+                passed = high
+            else:
+                failed = high
+        while failed is not None and failed - passed > resolution:
+            rate = (passed + failed) / 2
+            print(f"Refining between {passed:g} and {failed:g}: {rate:g} req/s", flush=True)
+            if self.evaluate(rate):
+                passed = rate
+            else:
+                failed = rate
+        return round(passed, 2)
+
+    def curve(self):
+        """Return every evaluated rate's combined result, lowest rate first."""
+        return [self.results[rate] for rate in sorted(self.results)]
+
+
+def format_report(curve, saturation, slo):
+    """Return the knee report: the throughput/latency curve and the saturation point."""
+    lines = [f"{'Offered':>9} {'Achieved':>9} {'p50 ms':>9} {'p99 ms':>9} {'Errors':>7} {'Timely':>7}  Result"]
+    for point in curve:
+        lines.append(f"{point['offered_rps']:>9g} {point['achieved_rps']:>9g} {point['p50_ms']:>9g} "
+                     f"{point['p99_ms']:>9g} {point['error_rate']:>7.2%} {point['timely_sends_ratio']:>7.1%}  "
+                     f"{'pass' if point['passed'] else 'FAIL'}")
+    lines.append(f"\nSLOs: p99 <= {slo['p99_ms']} ms, errors <= {slo['error_rate']:.2%}, "
+                 f"timely sends >= {slo['timely_ratio']:.1%}")
+    if saturation is None:
+        lines.append("Saturation point: not reached; the minimum rate already violates the SLOs")
+    else:
+        knee = next(point for point in curve if point["offered_rps"] == saturation)
+        lines.append(f"Saturation point: {saturation:g} req/s offered, {knee['achieved_rps']:g} req/s achieved "
+                     f"at p99 {knee['p99_ms']} ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the highest request rate that meets latency and error SLOs.")
+    parser.add_argument("--profile", help="Profile YAML whose url, headers, timeout and defaults are reused")
+    parser.add_argument("--url", help="Target URL (overrides the profile's)")
+    parser.add_argument("--engine", choices=("asyncio", "threads"), default="asyncio")
+    parser.add_argument("--concurrency", type=int, help="Maximum requests in flight")
+    parser.add_argument("--search", choices=SEARCHES, default="binary")
+    parser.add_argument("--min-rate", type=float, default=10.0)
+    parser.add_argument("--max-rate", type=float, default=10000.0)
+    parser.add_argument("--step-factor", type=float, default=2.0, help="Rate multiplier of the step search")
+    parser.add_argument("--resolution", type=float, help="Stop once pass and fail rates are this close "
+                                                         "(default: 2%% of the maximum rate)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per trial")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before each trial")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="Idle seconds between trials")
+    parser.add_argument("--repeats", type=int, default=1, help="Trials per rate; all must pass")
+    parser.add_argument("--p99-ms", type=float, default=100.0, help="p99 latency SLO (ms)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate SLO (0-1)")
+    parser.add_argument("--min-timely", type=float, default=0.95, help="Timely-send ratio SLO (0-1)")
+    parser.add_argument("--log-file", default=LOG_FILE, help="Result log; each trial writes <name>.trial<n>.bin")
+    parser.add_argument("--report", help="Write the curve and saturation point to this JSON file")
+    parser.add_argument("--curve", help="Write the throughput/latency curve to this CSV file")
+    args = parser.parse_args()
+    if args.min_rate <= 0:  # The step search multiplies from here, so it must be positive
+        parser.error("--min-rate must be greater than 0")
+    if args.max_rate < args.min_rate:
+        parser.error("--max-rate must not be below --min-rate")
+    if args.step_factor <= 1:  # A factor of 1 or less would never reach --max-rate
+        parser.error("--step-factor must be greater than 1")
+    if args.resolution is not None and args.resolution <= 0:
+        parser.error("--resolution must be greater than 0")
+
+    profile = {}
+    if args.profile:
+        with open(args.profile) as file:
+            profile = yaml.safe_load(file)
+    defaults = {**PHASE_DEFAULTS, **profile.get("defaults", {})}
+    if args.concurrency:
+        defaults["concurrency"] = args.concurrency
+    url = args.url or profile.get("url")
+    if not url:
+        parser.error("a target --url or a --profile with a url is required")
+    simulator = TrafficSimulator(
+        url, "GET", profile.get("headers", {}), "", profile.get("params", {}), 0,
+        int(defaults["concurrency"]), float(profile.get("timeout", 5)), 1, 0, 64, 1500, int(defaults["max_size"]), 0,
+        engine=args.engine, log_file=args.log_file,
+    )
+    slo = {"p99_ms": args.p99_ms, "error_rate": args.max_error_rate, "timely_ratio": args.min_timely}
+    search = SaturationSearch(simulator, defaults, slo, args.duration, args.warmup, args.repeats, args.cooldown)
+    resolution = args.resolution or args.max_rate * 0.02
+    print(f"Searching {args.min_rate:g}-{args.max_rate:g} req/s against {url} ({args.search}, "
+          f"{args.duration:g}s trials, {args.repeats} repeat(s))")
+    try:
+        saturation = search.search(args.min_rate, args.max_rate, resolution, args.search, args.step_factor)
+    except KeyboardInterrupt:
+        print("\nSearch stopped; reporting the trials so far.")
+        passing = [point["offered_rps"] for point in search.curve() if point["passed"]]
+        saturation = max(passing) if passing else None
+    curve = search.curve()
+    print("\n" + format_report(curve, saturation, slo))
+    if args.curve:
+        with open(args.curve, mode="w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=CURVE_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(curve)
+    if args.report:
+        with open(args.report, "w") as file:
+            json.dump({"saturation_rps": saturation, "slo": slo, "search": args.search, "curve": curve}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
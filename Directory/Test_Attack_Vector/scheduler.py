@@ -0,0 +1,169 @@
+import asyncio  # For the ticker and in-flight bound
+import itertools  # For unbounded arrival sequences
+import random  # For Poisson inter-arrival times
+import time  # For the perf_counter timeline
+
+from latency_histogram import LatencyHistogram  # For mergeable latency distributions
+
+ARRIVALS = ("constant", "poisson")  # Built-in arrival processes; anything else is a file of send offsets
+
+
+def constant_arrivals(rate, phase=0.0):
+    """Yield send offsets (seconds from start) exactly 1/rate apart, the first at `phase`."""
+    return (phase + index / rate for index in itertools.count())
+
+
+def poisson_arrivals(rate, seed=None):
+    """Yield send offsets of a Poisson process with mean rate `rate` (exponential gaps)."""
+    rng = random.Random(seed)
+    offset = 0.0
+    while True:
+        yield offset
+        offset += rng.expovariate(rate)
+
+
+def custom_arrivals(source):
+    """Yield send offsets from a file with one offset (seconds) per line, or from an iterable."""
+    if isinstance(source, str):
+        with open(source) as file:
+            offsets = [float(line) for line in file if line.strip() and not line.startswith("#")]
+        return iter(sorted(offsets))
+    return iter(source)
+
+
+def make_arrivals(kind, rate, shard=0, shards=1):
+    """Return the offset iterator for an ARRIVALS name, an offsets file path or an iterable.
+
+    With `shards` > 1 this returns shard `shard`'s part of the schedule: constant arrivals
+    interleave by phase, Poisson arrivals split the rate (the shards still sum to a Poisson
+    process of `rate`), and custom offsets are dealt round-robin.
+    """
+    if kind == "constant":
+        return constant_arrivals(rate / shards, phase=shard / rate)
+    if kind == "poisson":
+        return poisson_arrivals(rate / shards)
+    return itertools.islice(custom_arrivals(kind), shard, None, shards)
+
+
+class ScheduleStats:
+    """Tick and send timeliness plus latency measured from the intended send time.
+
+    A tick is timely when the ticker woke up less than `tolerance_ns` after its intended
+    time, a send when the request actually started less than `tolerance_ns` after it
+    (TimelyTicks/TimelySends in TLBS bench). Late requests are still sent, and their
+    latency includes the time they waited, so overload shows up in the percentiles.
+    """
+
+    def __init__(self, tolerance_ns):
+        self.tolerance_ns = tolerance_ns
+        self.timely_ticks = 0
+        self.missed_ticks = 0
+        self.timely_sends = 0
+        self.late_sends = 0
+        self.latency = LatencyHistogram()  # Completion minus intended send time (ns)
+        self.service = LatencyHistogram()  # Completion minus actual send time (ns)
+        self.started_ns = None
+        self.finished_ns = None
+
+    def merge(self, other):
+        """Add another process's stats; the run spans the earliest start to the latest finish."""
+        self.timely_ticks += other.timely_ticks
+        self.missed_ticks += other.missed_ticks
+        self.timely_sends += other.timely_sends
+        self.late_sends += other.late_sends
+        self.latency.merge(other.latency)
+        self.service.merge(other.service)
+        if other.started_ns is not None:
+            self.started_ns = other.started_ns if self.started_ns is None else min(self.started_ns, other.started_ns)
+        if other.finished_ns is not None:
+            self.finished_ns = max(self.finished_ns or 0, other.finished_ns)
+
+    def summary(self):
+        """Return counts, ratios and latency percentiles (ms)."""
+        ticks = self.timely_ticks + self.missed_ticks
+        sends = self.timely_sends + self.late_sends
+        elapsed = ((self.finished_ns or time.perf_counter_ns()) - self.started_ns) / 1e9 if self.started_ns else 0.0
+        return {
+            "ticks": ticks, "timely_ticks": self.timely_ticks, "missed_ticks": self.missed_ticks,
+            "timely_ticks_ratio": round(self.timely_ticks / ticks, 4) if ticks else 0.0,
+            "sends": sends, "timely_sends": self.timely_sends, "late_sends": self.late_sends,
+            "timely_sends_ratio": round(self.timely_sends / sends, 4) if sends else 0.0,
+            "elapsed_s": round(elapsed, 3),
+            "achieved_rps": round(self.latency.total / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": self.latency.summary(),
+            "service_ms": self.service.summary(),
+        }
+
+    def report(self):
+        """Return the summary as printable lines in the TLBS bench format."""
+        stats = self.summary()
+        latency, service = stats["latency_ms"], stats["service_ms"]
+        return (
+            f"Ticks={stats['ticks']}, TimelyTicks = {stats['timely_ticks']}, MissedTicks = {stats['missed_ticks']}, "
+            f"{stats['timely_ticks_ratio']:.2%} good\n"
+            f"Sends={stats['sends']}, TimelySends = {stats['timely_sends']}, LateSends   = {stats['late_sends']}, "
+            f"{stats['timely_sends_ratio']:.2%} good\n"
+            f"Achieved Rate: {stats['achieved_rps']} req/s over {stats['elapsed_s']}s\n"
+            f"Latency from intended send (ms): p50 {latency[50]}, p90 {latency[90]}, p99 {latency[99]}, "
+            f"p99.9 {latency[99.9]}, max {latency[100]}\n"
+            f"Service time (ms): p50 {service[50]}, p99 {service[99]}, max {service[100]}"
+        )
+
+
+class OpenLoopScheduler:
+    """Issues requests on a precomputed timeline, independent of how fast responses arrive.
+
+    :param arrivals: Iterator of send offsets in seconds from the start
+    :param concurrency: Maximum requests in flight; requests beyond it wait and are reported late
+    :param tolerance: Seconds a tick or send may trail its intended time and still count as timely
+    """
+
+    def __init__(self, arrivals, concurrency, tolerance):
+        self.arrivals = arrivals
+        self.semaphore = asyncio.BoundedSemaphore(concurrency)
+        self.stats = ScheduleStats(int(tolerance * 1e9))
+
+    async def run(self, next_request, start_ns=None, drain=True):
+        """Tick through the timeline until the arrivals or `next_request()` (which returns None) run out.
+
+        `next_request()` is called at every tick and returns a coroutine function taking the
+        intended send time (perf_counter ns); the scheduler awaits it once a slot is free.
+        The timeline starts at `start_ns` (perf_counter ns, default now). With `drain` False the
+        in-flight tasks are returned instead of awaited, and the caller sets `finished_ns`.
+        """
+        stats = self.stats
+        pending = set()
+        start = stats.started_ns = time.perf_counter_ns() if start_ns is None else start_ns
+        for offset in self.arrivals:
+            intended = start + int(offset * 1e9)
+            wait = intended - time.perf_counter_ns()
+            await asyncio.sleep(wait / 1e9 if wait > 0 else 0)  # Always yield so in-flight requests progress
+            request = next_request()
+            if request is None:
+                break
+            if time.perf_counter_ns() - intended < stats.tolerance_ns:
+                stats.timely_ticks += 1
+            else:
+                stats.missed_ticks += 1
+            task = asyncio.create_task(self.dispatch(request, intended))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if not drain:
+            return pending
+        if pending:
+            await asyncio.wait(pending)
+        stats.finished_ns = time.perf_counter_ns()
+
+    async def dispatch(self, request, intended):
+        """Wait for a slot, send, and record timeliness and both latencies."""
+        stats = self.stats
+        async with self.semaphore:
+            started = time.perf_counter_ns()
+            if started - intended < stats.tolerance_ns:
+                stats.timely_sends += 1
+            else:
+                stats.late_sends += 1
+            await request(intended)
+            finished = time.perf_counter_ns()
+        stats.latency.record(finished - intended)
+        stats.service.record(finished - started)
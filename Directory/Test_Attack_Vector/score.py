@@ -0,0 +1,93 @@
+"""Detection accuracy of a sensor, per offered load level, from labelled traffic.
+
+    python score.py labels.csv ../SERVER/verdicts.log [more verdict logs ...] [--json score.json]
+
+Joins the label CSV written by profiles.py --labels to the sensor's verdict logs (one
+tab-separated line per labelled request: time, traffic ID, verdict, status, rules). An
+"alert" or "block" verdict counts as a detection. Requests without a verdict never
+reached the sensor's logging and count as undetected; they are reported as "missing".
+"""
+import argparse  # For the command line
+import csv  # For the label CSV
+import json  # For the score file
+
+from traffic_mix import ATTACK, BENIGN  # For label values
+
+DETECTED = ("alert", "block")  # Verdicts that count as a positive
+
+
+def load_verdicts(paths):
+    """Return {traffic ID: verdict} from sensor verdict logs."""
+    verdicts = {}
+    for path in paths:
+        with open(path) as file:
+            for line in file:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) >= 3:
+                    verdicts[fields[1]] = fields[2]
+    return verdicts
+
+
+def ratio(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else 0.0
+
+
+def score(label_path, verdicts):
+    """Return per-phase confusion counts, TPR, FPR, precision, F1 and per-kind detection rates."""
+    phases = {}
+    with open(label_path, newline="") as file:
+        for row in csv.DictReader(file):
+            phase = phases.setdefault(row["Phase"], {
+                "phase": row["Phase"], "offered_rps": float(row["Offered_Rps"]),
+                "tp": 0, "fn": 0, "fp": 0, "tn": 0, "missing": 0, "kinds": {},
+            })
+            verdict = verdicts.get(row["Id"])
+            if verdict is None:
+                phase["missing"] += 1
+            detected = verdict in DETECTED
+            if row["Label"] == ATTACK:
+                phase["tp" if detected else "fn"] += 1
+                seen, total = phase["kinds"].get(row["Kind"], (0, 0))
+                phase["kinds"][row["Kind"]] = (seen + detected, total + 1)
+            elif row["Label"] == BENIGN:
+                phase["fp" if detected else "tn"] += 1
+    results = []
+    for phase in phases.values():
+        tp, fn, fp, tn = phase["tp"], phase["fn"], phase["fp"], phase["tn"]
+        precision, tpr = ratio(tp, tp + fp), ratio(tp, tp + fn)
+        phase.update(
+            tpr=tpr, fpr=ratio(fp, fp + tn), precision=precision,
+            f1=round(2 * precision * tpr / (precision + tpr), 4) if precision + tpr else 0.0,
+            kinds={kind: ratio(seen, total) for kind, (seen, total) in sorted(phase["kinds"].items())},
+        )
+        results.append(phase)
+    return results
+
+
+def format_report(results):
+    """Return the per-phase scores as a printable table."""
+    lines = [f"{'Phase':<16} {'Req/s':>8} {'Attacks':>8} {'Benign':>8} {'TPR':>7} {'FPR':>7} {'F1':>7} "
+             f"{'Missing':>8}  Detection by kind"]
+    for phase in results:
+        kinds = ", ".join(f"{kind} {rate:.0%}" for kind, rate in phase["kinds"].items())
+        lines.append(f"{phase['phase'][:16]:<16} {phase['offered_rps']:>8g} {phase['tp'] + phase['fn']:>8} "
+                     f"{phase['fp'] + phase['tn']:>8} {phase['tpr']:>7.1%} {phase['fpr']:>7.1%} {phase['f1']:>7.3f} "
+                     f"{phase['missing']:>8}  {kinds}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score sensor verdicts against traffic labels.")
+    parser.add_argument("labels", help="Label CSV written by profiles.py --labels")
+    parser.add_argument("verdicts", nargs="+", help="Sensor verdict logs (one per serve.py worker)")
+    parser.add_argument("--json", help="Write the scores to this JSON file")
+    args = parser.parse_args()
+    results = score(args.labels, load_verdicts(args.verdicts))
+    print(format_report(results))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
